@@ -0,0 +1,153 @@
+""" Module for extracting the docx properties from asyncio code, the CPU bound extraction runs in
+a process pool so the event loop is never blocked:
+
+    xml = await extract_docx_properties_async("manuscript.docx", engine = "lxml")
+
+    async for result in extract_many_async(docx_paths, concurrency = 8, timeout = 60):
+        if result["status"] == "ok":
+            handle(result["docx_path"], result["result"])
+"""
+import os
+import time
+import asyncio
+import functools
+import threading
+import concurrent.futures
+import docx_extraction
+
+# The process pool used when no executor is given, see get_default_executor()
+DEFAULT_EXECUTOR = None
+DEFAULT_EXECUTOR_LOCK = threading.Lock()
+
+
+# get default executor
+def get_default_executor():
+    """ Function to return the shared process pool of the async extraction, started on first use
+        with a worker per CPU
+    Returns:
+        [concurrent.futures.ProcessPoolExecutor]: The process pool
+    """
+    global DEFAULT_EXECUTOR
+    with DEFAULT_EXECUTOR_LOCK:
+        if DEFAULT_EXECUTOR is None:
+            DEFAULT_EXECUTOR = concurrent.futures.ProcessPoolExecutor()
+        return DEFAULT_EXECUTOR
+
+
+# shutdown default executor
+def shutdown_default_executor(wait = True):
+    """ Function to stop the shared process pool, a new one is started by the next extraction
+    Args:
+        wait (bool, optional): Wait for the running extractions to finish
+    """
+    global DEFAULT_EXECUTOR
+    with DEFAULT_EXECUTOR_LOCK:
+        if not DEFAULT_EXECUTOR is None:
+            DEFAULT_EXECUTOR.shutdown(wait = wait, cancel_futures = True)
+            DEFAULT_EXECUTOR = None
+
+
+# extract docx properties async
+async def extract_docx_properties_async(docx_path, read_only = False, engine = "python-docx",
+                                        output_format = "xml", timeout = None, executor = None):
+    """ Function to run docx_extraction.extract_docx_properties() in a process pool
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx, or the docx
+            as bytes (a file-like object is read into bytes, it cannot be sent to a worker process)
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml
+        output_format (str, optional): "xml" (default) or "arrow", see extract_docx_properties()
+        timeout (float, optional): Seconds to wait for the extraction, None for no limit
+        executor (concurrent.futures.Executor, optional): The pool the extraction runs in, the
+            shared process pool if None, see get_default_executor()
+    Returns:
+        [str]: The ParagraphProperties XML, or a pyarrow Table when output_format is "arrow"
+    Raises:
+        asyncio.TimeoutError: When the extraction takes longer than the timeout. A queued
+            extraction is cancelled, one already running in a worker finishes in the background
+    """
+    if hasattr(docx_path, "read"):
+        docx_path = docx_path.read()
+
+    loop = asyncio.get_running_loop()
+    extraction = loop.run_in_executor(
+        executor or get_default_executor(),
+        functools.partial(
+            docx_extraction.extract_docx_properties,
+            docx_path,
+            read_only = read_only,
+            engine = engine,
+            output_format = output_format))
+
+    return await asyncio.wait_for(extraction, timeout)
+
+
+# extract many async
+async def extract_many_async(docx_paths, read_only = False, engine = "python-docx", output_format = "xml",
+                             concurrency = None, timeout = None, executor = None):
+    """ Function to extract many docx files with at most concurrency extractions scheduled at a
+        time, the results are yielded in the order they complete. The paths are read lazily, so a
+        generator of thousands of paths never creates thousands of tasks
+    Args:
+        docx_paths (iterable): The paths of the docx files (or the docx files as bytes)
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml
+        output_format (str, optional): "xml" (default) or "arrow", see extract_docx_properties()
+        concurrency (int, optional): The number of extractions scheduled at a time, defaults to
+            the number of CPUs
+        timeout (float, optional): Seconds allowed for each document, None for no limit
+        executor (concurrent.futures.Executor, optional): The pool the extractions run in, the
+            shared process pool if None
+    Returns:
+        [async generator]: A dictionary for each docx with its "index" in docx_paths, the
+            "docx_path" (None for bytes), the "status" (ok,
+            failed or timed_out), the "result" (see extract_docx_properties_async()), the "error"
+            and the "seconds" from scheduling to completion. Closing or cancelling the generator
+            cancels the extractions which are still scheduled
+    """
+    concurrency = max(concurrency or os.cpu_count() or 1, 1)
+    docx_path_iter = enumerate(docx_paths)
+    pending_tasks = {}
+
+    def schedule_next():
+        # Schedule the next docx, False when there are no more paths
+        docx_index, docx_path = next(docx_path_iter, (None, None))
+        if docx_index is None:
+            return False
+        task = asyncio.ensure_future(extract_docx_properties_async(
+            docx_path, read_only, engine, output_format, timeout, executor))
+        pending_tasks[task] = (docx_index, docx_path, time.monotonic())
+        return True
+
+    try:
+        while len(pending_tasks) < concurrency and schedule_next():
+            pass
+
+        while len(pending_tasks) > 0:
+            done_tasks, _ = await asyncio.wait(pending_tasks, return_when = asyncio.FIRST_COMPLETED)
+            for task in done_tasks:
+                docx_index, docx_path, start_time = pending_tasks.pop(task)
+                result = {
+                    "index" : docx_index,
+                    "docx_path" : docx_path if isinstance(docx_path, str) else None,
+                    "status" : "ok",
+                    "result" : None,
+                    "error" : "",
+                    "seconds" : 0.0
+                }
+                try:
+                    result["result"] = task.result()
+                except asyncio.TimeoutError:
+                    result["status"] = "timed_out"
+                    result["error"] = f"The extraction took longer than {timeout} seconds"
+                except Exception as error:
+                    result["status"] = "failed"
+                    result["error"] = f"{type(error).__name__}: {error}"
+                result["seconds"] = time.monotonic() - start_time
+
+                # Refill before yielding, so the pool stays busy while the caller handles the result
+                schedule_next()
+                yield result
+    finally:
+        for task in pending_tasks:
+            task.cancel()
@@ -0,0 +1,365 @@
+""" Module for extracting the docx properties of a folder of manuscripts in parallel"""
+import os
+import csv
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from multiprocessing.connection import wait
+from docx_extraction import configure_logging, extract_docx_properties_to_file, iter_docx_properties
+from extraction_cache import ExtractionCache, extract_docx_properties_to_file_cached, DEFAULT_CACHE_SIZE_MB
+
+# The resource module is only available on Unix, without it the memory cap is not applied
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# find docx files
+def find_docx_files(folder_path):
+    """ Function to find all the docx files within a folder and its sub folders
+    Args:
+        folder_path (str): String containing the path to the folder of manuscripts
+    Returns:
+        [list]: A sorted list of the docx paths, Word lock files (~$) are skipped
+    """
+    docx_files = []
+    for root, dirs, files in os.walk(folder_path):
+        for file in files:
+            if file.endswith(".docx") and not file.startswith("~$"):
+                docx_files.append(os.path.join(root, file))
+
+    # Sort so the processing and report order does not depend on the file system
+    return sorted(docx_files)
+
+
+# get output path
+def get_output_path(docx_path, folder_path, output_folder, output_format):
+    """ Function to create the output path of a docx, the sub folders of the input folder are
+        kept so files with the same name in different folders do not overwrite each other
+    Args:
+        docx_path (str): String containing the path to the docx
+        folder_path (str): String containing the path to the folder of manuscripts
+        output_folder (str): String containing the path to the output folder
+        output_format (str): The output format, xml, csv or parquet
+    Returns:
+        [str]: The path of the output file
+    """
+    relative_path = os.path.relpath(docx_path, folder_path)
+    return os.path.join(output_folder, os.path.splitext(relative_path)[0] + "." + output_format)
+
+
+# write properties csv
+def write_properties_csv(para_properties_iter, output_path):
+    """ Function to write an iterable of paragraph properties dictionaries into a CSV file, one
+        row per paragraph, with the same values as the XML output
+    Args:
+        para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+            iter_docx_properties()
+        output_path (str): String containing the path of the CSV file to be written
+    Returns:
+        [int]: The number of paragraphs written
+    """
+    para_count = 0
+    with open(output_path, "w", newline = "", encoding = "utf-8-sig") as csv_file:
+        writer = None
+        for para_dict in para_properties_iter:
+            # The header is taken from the keys of the first paragraph
+            if writer is None:
+                writer = csv.DictWriter(csv_file, fieldnames = list(para_dict.keys()))
+                writer.writeheader()
+            writer.writerow(para_dict)
+            para_count += 1
+
+    return para_count
+
+
+# extract file
+def extract_file(docx_path, output_path, output_format, read_only = False, engine = "python-docx",
+                 cache = None):
+    """ Function to extract the properties of a single docx into the output file, the output is
+        written to a temporary file first so a failed extraction does not leave a partial file
+    Args:
+        docx_path (str): String containing the path to the docx
+        output_path (str): String containing the path of the output file
+        output_format (str): The output format, xml, csv or parquet
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml, see iter_docx_properties()
+        cache (ExtractionCache, optional): The cache of the xml and parquet results, None to
+            always extract
+    Returns:
+        [int]: The number of paragraphs extracted
+        [bool]: True if the result came from the cache
+    """
+    output_dir = os.path.dirname(output_path)
+    if len(output_dir) > 0:
+        os.makedirs(output_dir, exist_ok = True)
+
+    temp_output_path = output_path + ".tmp"
+    from_cache = False
+    try:
+        if not cache is None and output_format != "csv":
+            para_count, from_cache = extract_docx_properties_to_file_cached(
+                docx_path, temp_output_path, cache, read_only, engine, output_format)
+        elif output_format == "csv":
+            para_count = write_properties_csv(iter_docx_properties(docx_path, read_only, engine), temp_output_path)
+        else:
+            para_count = extract_docx_properties_to_file(
+                docx_path, temp_output_path, read_only, engine, output_format)
+        os.replace(temp_output_path, output_path)
+    finally:
+        if os.path.exists(temp_output_path):
+            os.remove(temp_output_path)
+
+    return para_count, from_cache
+
+
+# run extraction worker
+def run_extraction_worker(connection, docx_path, output_path, output_format, memory_limit_mb,
+                          read_only = False, engine = "python-docx", cache_dir = None,
+                          cache_size_mb = DEFAULT_CACHE_SIZE_MB):
+    """ Function run in the worker process for a single docx, the result is sent back to the
+        parent process through the connection
+    Args:
+        connection (multiprocessing Connection): The sending end of the pipe to the parent process
+        docx_path (str): String containing the path to the docx
+        output_path (str): String containing the path of the output file
+        output_format (str): The output format, xml, csv or parquet
+        memory_limit_mb (int): The address space limit of the worker in MB, None for no limit
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml, see iter_docx_properties()
+        cache_dir (str, optional): The directory of the extraction cache, None for no cache
+        cache_size_mb (int, optional): The size limit of the extraction cache in MB
+    """
+    result = {
+        "status" : "ok",
+        "paragraphs" : 0,
+        "cached" : False,
+        "error" : ""
+    }
+    try:
+        # Cap the address space so a runaway document fails with a MemoryError
+        if not memory_limit_mb is None and not resource is None:
+            memory_limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+        cache = None
+        if not cache_dir is None:
+            cache = ExtractionCache(cache_dir, cache_size_mb)
+
+        result["paragraphs"], result["cached"] = extract_file(
+            docx_path, output_path, output_format, read_only, engine, cache)
+    except Exception as error:
+        result["status"] = "failed"
+        result["error"] = f"{type(error).__name__}: {error}"
+
+    connection.send(result)
+    connection.close()
+
+
+# process folder
+def process_folder(folder_path, output_folder, workers = None, timeout = None,
+                   memory_limit_mb = None, output_format = "xml", read_only = False,
+                   engine = "python-docx", cache_dir = None, cache_size_mb = DEFAULT_CACHE_SIZE_MB):
+    """ Function to extract the properties of every docx in a folder over a pool of worker
+        processes, each docx runs in its own process so a failure, timeout or crash only
+        affects that file
+    Args:
+        folder_path (str): String containing the path to the folder of manuscripts
+        output_folder (str): String containing the path to the output folder
+        workers (int, optional): The number of docx processed at the same time, defaults to the
+            number of CPUs
+        timeout (float, optional): The number of seconds a single docx may take, None for no limit
+        memory_limit_mb (int, optional): The memory cap of each worker in MB, None for no limit
+        output_format (str, optional): The output format, xml, csv or parquet, defaults to xml
+        read_only (bool, optional): Extract without modifying the docx files, empty paragraphs are
+            skipped and paraIds are deterministic, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx (default) or lxml, see
+            iter_docx_properties()
+        cache_dir (str, optional): The directory of the extraction cache shared by the workers,
+            unchanged docx files are then copied from the cache (xml and parquet only)
+        cache_size_mb (int, optional): The size limit of the extraction cache in MB
+    Returns:
+        [list]: A list of result dictionaries, one per docx in sorted path order, see
+            create_summary()
+    """
+    if workers is None or workers < 1:
+        workers = os.cpu_count() or 1
+
+    docx_files = find_docx_files(folder_path)
+    logging.info(f"Found {len(docx_files)} docx files in {folder_path}, using {workers} workers")
+
+    results = [None] * len(docx_files)
+    # Pending jobs are popped from the end, so reverse to start with the first file
+    pending = list(enumerate(docx_files))[::-1]
+    running = {}
+
+    while pending or running:
+        # Start new workers until the pool is full
+        while pending and len(running) < workers:
+            index, docx_path = pending.pop()
+            output_path = get_output_path(docx_path, folder_path, output_folder, output_format)
+            receive_connection, send_connection = multiprocessing.Pipe(duplex = False)
+            process = multiprocessing.Process(
+                target = run_extraction_worker,
+                args = (send_connection, docx_path, output_path, output_format, memory_limit_mb,
+                        read_only, engine, cache_dir, cache_size_mb),
+                daemon = True)
+            process.start()
+            send_connection.close()
+            running[process.sentinel] = (index, docx_path, output_path, process,
+                                         receive_connection, time.monotonic())
+
+        # Wait for a worker to finish, or until the next worker reaches its timeout
+        wait_timeout = None
+        if not timeout is None:
+            next_deadline = min(job[5] for job in running.values()) + timeout
+            wait_timeout = max(next_deadline - time.monotonic(), 0)
+        finished = wait(list(running.keys()), wait_timeout)
+
+        for sentinel in list(running.keys()):
+            index, docx_path, output_path, process, receive_connection, start_time = running[sentinel]
+            elapsed = time.monotonic() - start_time
+            result = None
+
+            if sentinel in finished:
+                if receive_connection.poll():
+                    result = receive_connection.recv()
+                else:
+                    # The worker exited without a result, e.g. killed by the OS
+                    result = {
+                        "status" : "crashed",
+                        "paragraphs" : 0,
+                        "cached" : False,
+                        "error" : f"Worker exited with code {process.exitcode}"
+                    }
+                process.join()
+            elif not timeout is None and elapsed >= timeout:
+                process.kill()
+                process.join()
+                # Remove any partial output left by the killed worker
+                if os.path.exists(output_path + ".tmp"):
+                    os.remove(output_path + ".tmp")
+                result = {
+                    "status" : "timeout",
+                    "paragraphs" : 0,
+                    "cached" : False,
+                    "error" : f"Timed out after {timeout} seconds"
+                }
+
+            if not result is None:
+                receive_connection.close()
+                del running[sentinel]
+                result["docx_path"] = docx_path
+                result["output_path"] = output_path if result["status"] == "ok" else ""
+                result["seconds"] = round(elapsed, 3)
+                results[index] = result
+
+                if result["status"] == "ok":
+                    logging.info(f"Extracted {result['paragraphs']} paragraphs from {docx_path}")
+                else:
+                    logging.warning(f"Error processing file {docx_path}: {result['error']}")
+
+    return results
+
+
+# create summary
+def create_summary(results, elapsed_seconds):
+    """ Function to create the summary report of a batch extraction
+    Args:
+        results (list): A list of result dictionaries, see process_folder()
+        elapsed_seconds (float): The wall time of the batch in seconds
+    Returns:
+        [dict]: A dictionary with the status counts, total paragraphs, wall time and the
+            result of each file
+    """
+    status_counts = {"ok" : 0, "failed" : 0, "timeout" : 0, "crashed" : 0}
+    for result in results:
+        status_counts[result["status"]] = status_counts.get(result["status"], 0) + 1
+
+    summary = {
+        "total_files" : len(results),
+        "succeeded" : status_counts["ok"],
+        "failed" : status_counts["failed"],
+        "timed_out" : status_counts["timeout"],
+        "crashed" : status_counts["crashed"],
+        "total_paragraphs" : sum(result["paragraphs"] for result in results),
+        "from_cache" : sum(1 for result in results if result["cached"]),
+        "elapsed_seconds" : round(elapsed_seconds, 3),
+        "files" : results
+    }
+
+    return summary
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code, 0 if every file succeeded otherwise 1
+    """
+    parser = argparse.ArgumentParser(
+        description = "Extract the paragraph properties of a folder of docx manuscripts in parallel")
+    parser.add_argument("folder_path", help = "Folder containing the docx files")
+    parser.add_argument("output_folder", help = "Folder the extracted properties are written to")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "Number of worker processes, defaults to the number of CPUs")
+    parser.add_argument("--timeout", type = float, default = None,
+                        help = "Seconds allowed for a single docx before its worker is killed")
+    parser.add_argument("--memory-limit", type = int, default = None, dest = "memory_limit_mb",
+                        help = "Memory cap of each worker in MB (Unix only)")
+    parser.add_argument("--format", choices = ["xml", "csv", "parquet"], default = "xml", dest = "output_format",
+                        help = "Output format of each docx, defaults to xml")
+    parser.add_argument("--read-only", action = "store_true", dest = "read_only",
+                        help = "Skip empty paragraphs in memory and generate deterministic paraIds, "
+                               "the docx files are never modified")
+    parser.add_argument("--engine", choices = ["python-docx", "lxml"], default = "python-docx",
+                        help = "Extraction engine, lxml reads the docx parts directly and is faster, "
+                               "defaults to python-docx")
+    parser.add_argument("--cache-dir", default = None,
+                        help = "Directory of the extraction cache, unchanged docx files are served "
+                               "from it (xml and parquet formats), see extraction_cache.py")
+    parser.add_argument("--cache-size-mb", type = float, default = DEFAULT_CACHE_SIZE_MB,
+                        help = f"Size limit of the extraction cache in MB, defaults to {DEFAULT_CACHE_SIZE_MB}")
+    parser.add_argument("--summary", default = None,
+                        help = "Path of the JSON summary report, defaults to "
+                               "<output_folder>/extraction_summary.json")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    os.makedirs(args.output_folder, exist_ok = True)
+
+    start_time = time.monotonic()
+    results = process_folder(
+        args.folder_path,
+        args.output_folder,
+        workers = args.workers,
+        timeout = args.timeout,
+        memory_limit_mb = args.memory_limit_mb,
+        output_format = args.output_format,
+        read_only = args.read_only,
+        engine = args.engine,
+        cache_dir = args.cache_dir,
+        cache_size_mb = args.cache_size_mb)
+    summary = create_summary(results, time.monotonic() - start_time)
+
+    summary_path = args.summary
+    if summary_path is None:
+        summary_path = os.path.join(args.output_folder, "extraction_summary.json")
+    with open(summary_path, "w", encoding = "utf-8") as summary_file:
+        json.dump(summary, summary_file, indent = 2)
+
+    logging.info(
+        f"Processed {summary['total_files']} files in {summary['elapsed_seconds']} seconds: "
+        f"{summary['succeeded']} succeeded ({summary['from_cache']} from the cache), {summary['failed']} failed, "
+        f"{summary['timed_out']} timed out, {summary['crashed']} crashed. "
+        f"Summary written to {summary_path}")
+
+    return 0 if summary["succeeded"] == summary["total_files"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
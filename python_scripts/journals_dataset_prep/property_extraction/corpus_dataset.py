@@ -0,0 +1,268 @@
+""" Module for writing the paragraph properties of a corpus of manuscripts into a Parquet dataset
+partitioned by filename, one filename=<name> directory per docx (the path of the docx relative
+to the folder, without the extension):
+
+    python corpus_dataset.py <folder of docx> <dataset folder> --engine lxml --read-only
+
+The rows of each docx are written in batches of a bounded size, so neither a document nor the
+corpus is held in memory, and a document only appears in the dataset once all its batches are
+written. A run that is stopped or crashes can be started again and continues with the documents
+which are not in the dataset yet. The dataset is read back with the filename column by
+read_corpus_dataset() (or pyarrow.parquet.read_table(dataset_dir)). With --label the {{class}}
+markup of the paragraphs is moved into a classname column and the unlabelled paragraphs are
+left out, see property_labels"""
+import os
+import time
+import shutil
+import logging
+import argparse
+import urllib.parse
+import pyarrow as pa
+import pyarrow.parquet as pq
+import properties_table
+import property_labels
+from docx_extraction import configure_logging, iter_docx_properties
+from batch_extraction import find_docx_files
+
+# The folder the batches of the document being written are kept in, the leading underscore hides
+# it from the Parquet dataset readers
+STAGING_FOLDER = "_staging"
+
+# The partition column of the dataset
+PARTITION_COLUMN = "filename"
+
+
+# get document filename
+def get_document_filename(docx_path, folder_path = None):
+    """ Function to return the filename a docx is stored under, the file name without the
+        extension as in combine_csv.ipynb. The sub folders of the input folder are kept (e.g.
+        "a/x"), so files with the same name in different folders are different documents, see
+        batch_extraction.get_output_path()
+    Args:
+        docx_path (str): String containing the path to the docx
+        folder_path (str, optional): String containing the path to the folder of manuscripts,
+            None for the file name only
+    Returns:
+        [str]: The filename of the docx
+    """
+    if folder_path is None:
+        return os.path.splitext(os.path.basename(docx_path))[0]
+
+    relative_path = os.path.relpath(docx_path, folder_path)
+    return os.path.splitext(relative_path)[0].replace(os.sep, "/")
+
+
+# corpus dataset writer
+class CorpusDatasetWriter:
+    """ Class for appending the paragraph properties of documents to a Parquet dataset partitioned
+        by filename. The batches of a document are written to the staging folder and the
+        partition is renamed into the dataset once the document is complete, so a document is
+        either in the dataset with all its rows or not at all. A single writer is expected per
+        dataset folder
+
+    Args:
+        dataset_dir (str): The path of the dataset folder, created if it does not exist
+        batch_size (int, optional): The number of paragraphs held in memory and written to each
+            Parquet file
+        label (bool, optional): Move the {{class}} label of each paragraph into the classname
+            column and leave out the paragraphs without one, see
+            property_labels.label_properties_table()
+
+    Attributes:
+        dataset_dir (str): The path of the dataset folder
+        staging_dir (str): The path of the staging folder, the batches of an incomplete document
+            left by a stopped run are removed when the writer is created
+        batch_size (int): The number of paragraphs extracted for each Parquet file
+        label (bool): True if the paragraphs are labelled
+    """
+    def __init__(self, dataset_dir, batch_size = properties_table.PARQUET_BATCH_SIZE, label = False):
+        self.dataset_dir = dataset_dir
+        self.staging_dir = os.path.join(dataset_dir, STAGING_FOLDER)
+        self.batch_size = batch_size
+        self.label = label
+
+        if os.path.exists(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+        os.makedirs(self.staging_dir, exist_ok = True)
+
+    def get_partition_name(self, filename):
+        """ Function to return the folder name of the partition of a filename, the value is
+            escaped as the hive partitioning of pyarrow expects """
+        return f"{PARTITION_COLUMN}={urllib.parse.quote(filename, safe = '')}"
+
+    def is_written(self, filename):
+        """ Function to check if a document is already complete in the dataset """
+        return os.path.isdir(os.path.join(self.dataset_dir, self.get_partition_name(filename)))
+
+    def write_document(self, filename, para_properties_iter):
+        """ Function to write the paragraph properties of a document into its partition
+        Args:
+            filename (str): The filename of the document, the value of the filename column
+            para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+                docx_extraction.iter_docx_properties()
+        Returns:
+            [int]: The number of paragraphs written, without the unlabelled paragraphs when
+                label is set
+        """
+        partition_name = self.get_partition_name(filename)
+        staging_partition_dir = os.path.join(self.staging_dir, partition_name)
+        if os.path.exists(staging_partition_dir):
+            shutil.rmtree(staging_partition_dir)
+        os.makedirs(staging_partition_dir)
+
+        para_count = 0
+        part_count = 0
+        try:
+            for properties_batch in properties_table.iter_properties_batches(para_properties_iter, self.batch_size):
+                para_count += self.write_part(staging_partition_dir, part_count, properties_batch)
+                part_count += 1
+
+            # A document without paragraphs still gets a file, so it is not extracted again
+            if part_count == 0:
+                self.write_part(staging_partition_dir, part_count, properties_table.create_properties_batch([]))
+
+            os.replace(staging_partition_dir, os.path.join(self.dataset_dir, partition_name))
+        finally:
+            if os.path.exists(staging_partition_dir):
+                shutil.rmtree(staging_partition_dir)
+
+        return para_count
+
+    def write_part(self, partition_dir, part_index, properties_batch):
+        """ Function to write a batch of paragraphs into a Parquet file of a partition, under a
+            temporary name first so the folder never holds a partial file
+        Args:
+            partition_dir (str): The path of the partition folder
+            part_index (int): The number of the file within the partition
+            properties_batch (pyarrow.RecordBatch): The paragraphs, see
+                properties_table.create_properties_batch()
+        Returns:
+            [int]: The number of paragraphs written
+        """
+        # The labels are taken from a whole batch at a time, the unlabelled paragraphs are
+        # filtered out before the batch is written
+        if self.label:
+            properties_batch = property_labels.label_properties_table(properties_batch)
+
+        part_path = os.path.join(partition_dir, f"part-{part_index:05d}.parquet")
+        temp_part_path = part_path + ".tmp"
+        pq.write_table(
+            pa.Table.from_batches([properties_batch], schema = properties_batch.schema),
+            temp_part_path,
+            compression = "zstd")
+        os.replace(temp_part_path, part_path)
+
+        return properties_batch.num_rows
+
+
+# write corpus dataset
+def write_corpus_dataset(docx_paths, dataset_dir, read_only = False, engine = "python-docx",
+                         batch_size = properties_table.PARQUET_BATCH_SIZE, label = False, folder_path = None):
+    """ Function to extract a list of docx files into the partitioned dataset, the documents
+        already in the dataset are skipped so a stopped run can be resumed
+    Args:
+        docx_paths (iterable): The paths of the docx files
+        dataset_dir (str): The path of the dataset folder
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml
+        batch_size (int, optional): The number of paragraphs in each Parquet file
+        label (bool, optional): Label the paragraphs and leave out the unlabelled ones, see
+            CorpusDatasetWriter
+        folder_path (str, optional): The folder the docx paths were found in, the filename of
+            each document is its path relative to it, see get_document_filename()
+    Returns:
+        [dict]: The number of documents "written", "skipped" (already in the dataset) and
+            "failed", and the total "paragraphs" written. A document with the same filename as
+            one written earlier in the run is failed, its rows would be lost
+    """
+    writer = CorpusDatasetWriter(dataset_dir, batch_size, label)
+    summary = {"written" : 0, "skipped" : 0, "failed" : 0, "paragraphs" : 0}
+    run_filenames = {}
+
+    for docx_path in docx_paths:
+        filename = get_document_filename(docx_path, folder_path)
+        if filename in run_filenames:
+            summary["failed"] += 1
+            logging.warning(f"Error processing file {docx_path}: the filename '{filename}' is already "
+                            f"used by {run_filenames[filename]}")
+            continue
+        run_filenames[filename] = docx_path
+
+        if writer.is_written(filename):
+            summary["skipped"] += 1
+            continue
+
+        try:
+            para_count = writer.write_document(filename, iter_docx_properties(docx_path, read_only, engine))
+            summary["written"] += 1
+            summary["paragraphs"] += para_count
+            logging.info(f"Wrote {para_count} paragraphs of {docx_path} to the dataset")
+        except Exception as error:
+            summary["failed"] += 1
+            logging.warning(f"Error processing file {docx_path}: {type(error).__name__}: {error}")
+
+    return summary
+
+
+# read corpus dataset
+def read_corpus_dataset(dataset_dir, filenames = None, columns = None):
+    """ Function to read the dataset back as one table, with the filename column from the partitions
+    Args:
+        dataset_dir (str): The path of the dataset folder
+        filenames (list, optional): Only read these documents, all of them if None
+        columns (list, optional): Only read these columns, all of them if None
+    Returns:
+        [pyarrow.Table]: The paragraph properties of the documents and their filename
+    """
+    filters = None
+    if not filenames is None:
+        filters = [(PARTITION_COLUMN, "in", list(filenames))]
+
+    return pq.read_table(dataset_dir, columns = columns, filters = filters, partitioning = "hive")
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code, 0 if no document failed otherwise 1
+    """
+    parser = argparse.ArgumentParser(
+        description = "Extract a folder of docx manuscripts into a Parquet dataset partitioned by filename")
+    parser.add_argument("folder_path", help = "Folder containing the docx files")
+    parser.add_argument("dataset_dir", help = "Folder of the Parquet dataset, the documents already in it are skipped")
+    parser.add_argument("--read-only", action = "store_true", dest = "read_only",
+                        help = "Skip empty paragraphs in memory and generate deterministic paraIds, "
+                               "the docx files are never modified")
+    parser.add_argument("--engine", choices = ["python-docx", "lxml"], default = "python-docx",
+                        help = "Extraction engine, defaults to python-docx")
+    parser.add_argument("--batch-size", type = int, default = properties_table.PARQUET_BATCH_SIZE,
+                        help = f"Paragraphs in each Parquet file, defaults to {properties_table.PARQUET_BATCH_SIZE}")
+    parser.add_argument("--label", action = "store_true",
+                        help = "Move the {{class}} label of each paragraph into a classname column "
+                               "and leave out the paragraphs without one")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    start_time = time.monotonic()
+    summary = write_corpus_dataset(
+        find_docx_files(args.folder_path),
+        args.dataset_dir,
+        read_only = args.read_only,
+        engine = args.engine,
+        batch_size = args.batch_size,
+        label = args.label,
+        folder_path = args.folder_path)
+
+    logging.info(
+        f"Wrote {summary['written']} documents ({summary['paragraphs']} paragraphs) in "
+        f"{time.monotonic() - start_time:.3f} seconds, {summary['skipped']} already in the dataset, "
+        f"{summary['failed']} failed")
+
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,29 +1,75 @@
 """ Module for converting docx to xml for element prediction"""
+import io
+import hashlib
 import os
 import re
 import uuid
+import time
 import logging
 from collections import Counter
-import docx
-import docx.package
-import docx.parts.document
-from docx.document import Document
-import docx.parts.numbering
-from docx.oxml.table import CT_Tbl
-from docx.oxml.text.paragraph import CT_P
-from docx.oxml.numbering import CT_Num
-from docx.table import _Cell, Table
-from docx.text.paragraph import Paragraph
-from docx.oxml import parse_xml
-from docx.oxml.ns import nsmap
-from lxml import etree
-import pandas as pd
+from extraction_stats import call_getter, call_block, report_getter_error
+from formatting_memo import FormattingMemo, get_formatting_signature
+
+# python-docx and lxml are imported in the functions that use them, so importing this module (e.g.
+# for health_check()) stays fast and they are only loaded by the first extraction
+
+# The namespaces of the block classification, the same as docx.oxml.ns.nsmap
+BLOCK_NSMAP = {
+    "w" : "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "mc" : "http://schemas.openxmlformats.org/markup-compatibility/2006",
+    "a" : "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "wp" : "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing",
+    "pic" : "http://schemas.openxmlformats.org/drawingml/2006/picture",
+    "dgm" : "http://schemas.openxmlformats.org/drawingml/2006/diagram",
+    "c" : "http://schemas.openxmlformats.org/drawingml/2006/chart",
+    "m" : "http://schemas.openxmlformats.org/officeDocument/2006/math"
+}
+
+# The paragraphs of the text boxes anchored in a paragraph, see get_text_box_paragraphs(). VML
+# (v:textbox) and DrawingML (wps:txbx) text boxes both hold a w:txbxContent, Word writes a
+# DrawingML text box in an mc:Choice with a VML copy in the mc:Fallback, so the mc:Choice copy is
+# skipped when there is one and each text box is extracted once
+TEXT_BOX_PARA_XPATH = ".//w:txbxContent[not(ancestor::mc:Choice[../mc:Fallback//w:txbxContent])]/w:p"
+
+# The etree.XPath of TEXT_BOX_PARA_XPATH, compiled on the first call of get_text_box_paragraphs()
+# so lxml is only imported when a document is extracted
+text_box_para_xpath = None
+
+# The block type of a paragraph from the elements it contains, in order of precedence, see
+# classify_block(). Pictures and SmartArt are only taken from inline drawings
+BLOCK_CONTENT_TYPES = [
+    (f"{{{BLOCK_NSMAP['w']}}}txbxContent", "text_box_paragraph"),
+    (f"{{{BLOCK_NSMAP['pic']}}}pic", "linked_image_paragraph"),
+    (f"{{{BLOCK_NSMAP['dgm']}}}relIds", "shape_paragraph"),
+    (f"{{{BLOCK_NSMAP['c']}}}chart", "chart_paragraph"),
+    (f"{{{BLOCK_NSMAP['m']}}}oMath", "equation_paragraph"),
+    (f"{{{BLOCK_NSMAP['w']}}}footnoteReference", "footnote_reference_paragraph"),
+    (f"{{{BLOCK_NSMAP['w']}}}sdt", "content_control_paragraph")
+]
+BLOCK_CONTENT_PRECEDENCE = {tag : precedence for precedence, (tag, _) in enumerate(BLOCK_CONTENT_TYPES)}
+INLINE_CONTENT_TAGS = [BLOCK_CONTENT_TYPES[1][0], BLOCK_CONTENT_TYPES[2][0]]
+INLINE_GRAPHIC_TAGS = [
+    f"{{{BLOCK_NSMAP['a']}}}graphicData",
+    f"{{{BLOCK_NSMAP['a']}}}graphic",
+    f"{{{BLOCK_NSMAP['wp']}}}inline",
+    f"{{{BLOCK_NSMAP['w']}}}drawing"
+]
+
+# The version of the extracted properties, change it whenever the extracted values change so
+# cached results (see extraction_cache) are not reused
+EXTRACTOR_VERSION = "1.3"
+
 
 # define info log
-logging.basicConfig(
-    format='%(asctime)s %(levelname)-8s %(message)s',
-    level=logging.INFO,
-    datefmt='%Y-%m-%d %H:%M:%S')
+def configure_logging():
+    """ Function to configure the info log on the first extraction rather than at import, nothing
+        changes when the logging is already configured (e.g. by the caller)
+    """
+    logging.basicConfig(
+        format='%(asctime)s %(levelname)-8s %(message)s',
+        level=logging.INFO,
+        datefmt='%Y-%m-%d %H:%M:%S')
+
 
 # health check 
 def health_check():
@@ -33,165 +79,483 @@ def health_check():
 
 
 # extract docx properties
-def extract_docx_properties(docx_path):
+def extract_docx_properties(docx_path, read_only = False, engine = "python-docx", output_format = "xml",
+                            stats = None):
     """ Function to create an XML document that can be passed to Element Prediction
     Args:
-        docx_path (str): String containing the path to the docx that should be used for extraction
+        docx_path (str, bytes or file-like): String containing the path to the docx that should be
+            used for extraction, or the docx as bytes or a binary file-like object
+        read_only (bool, optional): When True the docx is extracted without modifying it, empty
+            paragraphs are skipped in memory and paraIds are generated deterministically,
+            see iter_properties()
+        engine (str, optional): The extraction engine, "python-docx" (default) or "lxml" which
+            reads the docx parts with lxml directly, see iter_docx_properties()
+        output_format (str, optional): "xml" (default) for the XML string, "arrow" for a typed
+            pyarrow Table with one row per paragraph, see properties_table, or "records" for a
+            column oriented batch of ParagraphProperties records, see paragraph_properties
+        stats (ExtractionStats, optional): Records the time, calls and errors of each property
+            getter and block type and logs a summary line at the end, None (default) to disable
+            the instrumentation, see extraction_stats
     Returns:
-        [str]: An xml formatted string that contains extracted properties from the docx
+        [str]: An xml formatted string that contains extracted properties from the docx, a
+            pyarrow Table when output_format is "arrow" or a ParagraphPropertiesBatch when it is
+            "records"
     """
-    # invoke create_document_object() to create document obj
-    logging.info('Started creating the docx object')
-    document, numbering_pd, theme_dict = create_document_object(docx_path)
+    if output_format == "records":
+        # Only imported when used, the dictionaries are the default paragraph properties
+        import paragraph_properties
+        para_properties_batch = paragraph_properties.ParagraphPropertiesBatch(
+            iter_docx_properties(docx_path, read_only, engine, stats,
+                                 record_type = paragraph_properties.ParagraphProperties))
+        log_extraction_stats(stats)
+        return para_properties_batch
+    if output_format == "arrow":
+        # Only imported when used, pyarrow is not needed for the XML output
+        import properties_table
+        properties_table_result = properties_table.create_properties_table(
+            iter_docx_properties(docx_path, read_only, engine, stats))
+        log_extraction_stats(stats)
+        return properties_table_result
+    if output_format != "xml":
+        raise ValueError(f"Unknown output format '{output_format}', expected 'xml', 'arrow' or 'records'")
 
     # Default value, empty string
     para_properties_xml = ""
     # Create list that will hold all the properties which should be treated as CDATA
     c_data_tags = ["ParaContent"]
-    # Create a list of dictionaries with the properties of each paragraph
-    logging.info('Extracting the properties of the document')
-    para_properties_list = extract_properties_to_list(
-        document,
-        numbering_pd,
-        theme_dict)
 
-    logging.info('Writing the extracted properties into XML')
-    # Convert list of dictionaries to an XML string
-    para_properties_xml = create_structured_xml(
-        para_properties_list,
-        c_data_tags)
+    # Write each paragraph into the XML as it is extracted, rather than building a list
+    # and a tree of the whole document first
+    para_properties_buffer = io.BytesIO()
+    write_structured_xml(
+        iter_docx_properties(docx_path, read_only, engine, stats),
+        c_data_tags,
+        para_properties_buffer)
+    para_properties_xml = para_properties_buffer.getvalue().decode("UTF-8")
+    log_extraction_stats(stats)
 
     return para_properties_xml
 
 
+# extract docx properties to file
+def extract_docx_properties_to_file(docx_path, output_path, read_only = False, engine = "python-docx",
+                                    output_format = "xml", stats = None):
+    """ Function to extract the properties of a docx and write the XML straight to a file,
+        one paragraph at a time, see extract_docx_properties()
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx that should be
+            used for extraction, or the docx as bytes or a binary file-like object
+        output_path (str): String containing the path of the XML file to be written
+        read_only (bool, optional): When True the docx is extracted without modifying it, empty
+            paragraphs are skipped in memory and paraIds are generated deterministically,
+            see iter_properties()
+        engine (str, optional): The extraction engine, "python-docx" (default) or "lxml" which
+            reads the docx parts with lxml directly, see iter_docx_properties()
+        output_format (str, optional): "xml" (default), or "parquet" to write a typed Parquet file,
+            see properties_table.write_properties_parquet()
+        stats (ExtractionStats, optional): Records the time, calls and errors of each property
+            getter and block type and logs a summary line at the end, None (default) to disable
+            the instrumentation, see extraction_stats
+    Returns:
+        [int]: The number of paragraphs written to the file
+    """
+    if output_format == "parquet":
+        # Only imported when used, pyarrow is not needed for the XML output
+        import properties_table
+        para_count = properties_table.write_properties_parquet(
+            iter_docx_properties(docx_path, read_only, engine, stats),
+            output_path)
+        log_extraction_stats(stats)
+        return para_count
+    if output_format != "xml":
+        raise ValueError(f"Unknown output format '{output_format}', expected 'xml' or 'parquet'")
+
+    # Create list that will hold all the properties which should be treated as CDATA
+    c_data_tags = ["ParaContent"]
+
+    para_count = write_structured_xml(
+        iter_docx_properties(docx_path, read_only, engine, stats),
+        c_data_tags,
+        output_path)
+    log_extraction_stats(stats)
+
+    return para_count
+
+
+# extract docx run properties
+def extract_docx_run_properties(docx_path, read_only = False, engine = "python-docx", stats = None):
+    """ Function to extract the paragraph properties and the properties of each run of a docx in
+        a single pass over the document
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx that should be
+            used for extraction, or the docx as bytes or a binary file-like object
+        read_only (bool, optional): When True the docx is extracted without modifying it, see
+            iter_properties()
+        engine (str, optional): The extraction engine, "python-docx" (default) or "lxml", see
+            iter_docx_properties()
+        stats (ExtractionStats, optional): Records the time, calls and errors of each property
+            getter and block type, None (default) to disable the instrumentation
+    Returns:
+        [list]: A dictionary for each paragraph, see create_paragraph_properties()
+        [list]: A dictionary for each run of the paragraphs, see create_run_properties(), the
+            run table can be loaded with pandas.DataFrame(run_properties_list)
+    """
+    run_properties_list = []
+    para_properties_list = list(iter_docx_properties(
+        docx_path, read_only, engine, stats, run_properties_list = run_properties_list))
+    log_extraction_stats(stats)
+
+    return para_properties_list, run_properties_list
+
+
+# log extraction stats
+def log_extraction_stats(stats):
+    """ Function to log the summary line of the extraction stats, nothing is logged when the
+        stats are disabled
+    Args:
+        stats (ExtractionStats): The stats of the extraction, see extraction_stats
+    """
+    if not stats is None:
+        logging.info(stats.format_summary())
+
+
+# iterate over docx properties
+def iter_docx_properties(docx_path, read_only = False, engine = "python-docx", stats = None, record_type = dict,
+                         run_properties_list = None):
+    """ Function to extract the properties of a docx as a generator, each paragraph properties
+        dictionary is yielded as soon as it is extracted
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx that should be
+            used for extraction, or the docx as bytes or a binary file-like object
+        read_only (bool, optional): When True the docx is extracted without modifying it, empty
+            paragraphs are skipped in memory and paraIds are generated deterministically,
+            see iter_properties()
+        engine (str, optional): The extraction engine, "python-docx" (default) uses the python-docx
+            Document, "lxml" reads the docx parts with lxml directly and gives the same
+            properties faster, see docx_lxml_extraction
+        stats (ExtractionStats, optional): Records the time, calls and errors of each property
+            getter and block type, None (default) to disable the instrumentation. The wall time
+            of the document is recorded once the generator is exhausted
+        record_type (type, optional): The type each paragraph is created as, dict (default) or
+            paragraph_properties.ParagraphProperties for a slotted record with the same keys
+        run_properties_list (list, optional): When a list, the properties of each run are appended
+            to it in the same pass, see create_run_properties()
+    Returns:
+        [generator]: A generator of dictionaries (or record_type), one for each paragraph, see
+            create_paragraph_properties()
+    """
+    if engine != "python-docx" and engine != "lxml":
+        raise ValueError(f"Unknown extraction engine '{engine}', expected 'python-docx' or 'lxml'")
+
+    configure_logging()
+    start_time = time.perf_counter()
+    if engine == "lxml":
+        # Only imported when used, the lxml engine builds on the functions of this module
+        import docx_lxml_extraction
+        yield from docx_lxml_extraction.iter_docx_properties(
+            docx_path, read_only, stats, record_type, run_properties_list)
+    else:
+        yield from iter_python_docx_properties(docx_path, read_only, stats, record_type, run_properties_list)
+
+    if not stats is None:
+        stats.record_document(time.perf_counter() - start_time)
+
+
+# iterate over python-docx properties
+def iter_python_docx_properties(docx_path, read_only = False, stats = None, record_type = dict,
+                                run_properties_list = None):
+    """ Function to extract the properties of a docx with the python-docx engine as a generator,
+        see iter_docx_properties()
+    """
+
+    # invoke create_document_object() to create document obj
+    logging.info('Started creating the docx object')
+    document, numbering_dict, theme_dict, style_dict = create_document_object(docx_path)
+
+    logging.info('Extracting the properties of the document')
+    yield from iter_properties(
+        document,
+        numbering_dict,
+        theme_dict,
+        style_dict,
+        read_only,
+        stats,
+        record_type,
+        run_properties_list)
+
+
 # create document object
 def create_document_object(docx_path):
     """ Function to create a python-docx Document object
     Args:
-        docx_path (str): String containing the path to the docx file
+        docx_path (str, bytes or file-like): String containing the path to the docx file, or the
+            docx as bytes or a binary file-like object, see DocumentContext
     Returns:
         python-docx Document: A python-docx Document object of the docx file
+        [dict]: A dictionary representing the numbering.xml, see create_numbering_dict()
+        [dict]: A dictionary for the major and minor fonts, see get_theme_data()
+        [dict]: A dictionary of the resolved style values, see create_style_dict()
+    Raises:
+        ValueError: If no path (None or an empty string) is given
+        FileNotFoundError: If the path does not exist
     """
-    document = None
-    numbering_pd = None
-    theme_dict = None
-
-    # First check that a string with characters has been passed
-    if len(docx_path) > 0:
-        # Check to see if the file exists
-        if os.path.exists(docx_path):
-            docx_package = docx.package.Package.open(docx_path)
-            # Create the Numbering DataFrame
-            try:
-                numbering = docx_package.main_document_part.numbering_part
-
-            except (RuntimeError, TypeError, NameError, AttributeError, NotImplementedError):
-                numbering = None
+    check_docx_source(docx_path)
+    document_context = DocumentContext(docx_path)
 
-            if not numbering is None:
-                numbering_pd = create_numbering_pd(numbering_part=numbering)
+    return (document_context.document, document_context.numbering_dict,
+            document_context.theme_dict, document_context.style_dict)
 
-            # Create the Theme Dictionary
-            theme_dict = get_theme_data(docx_package)
 
-            document = docx.Document(docx_path)
+# check docx source
+def check_docx_source(docx_path):
+    """ Function to check that a docx can be opened from the source before the extraction, so a
+        missing file is an error rather than a document without paragraphs
+    Args:
+        docx_path (str, bytes or file-like): The path to the docx file, the docx as bytes or a
+            binary file-like object
+    Raises:
+        ValueError: If no path (None or an empty string) is given
+        FileNotFoundError: If the path does not exist
+    """
+    if docx_path is None or (isinstance(docx_path, str) and len(docx_path) == 0):
+        raise ValueError("No docx path given")
+    if isinstance(docx_path, str) and not os.path.exists(docx_path):
+        raise FileNotFoundError(f"docx not found: '{docx_path}'")
 
-    return document, numbering_pd, theme_dict
 
+# document context
+class DocumentContext:
+    """ Class to open a docx package once and hold everything the extraction needs from it, the
+        Document, numbering, theme fonts and styles are all taken from the same parsed parts
 
-# create numbering pd
-def create_numbering_pd(numbering_part):
-    """ Function to create a Pandas Dataframe representing the numbering.xml file in a docx
+    Args:
+        docx_source (str, bytes or file-like): The path to the docx file, the docx as bytes or a
+            binary file-like object, so a docx read from a blob never has to be written to disk
+
+    Attributes:
+        docx_package (python-docx Package): The opened docx package
+        document (python-docx Document): The Document of the main document part
+        numbering_dict (dict): A dictionary representing the numbering.xml, see create_numbering_dict()
+        theme_dict (dict): A dictionary for the major and minor fonts, see get_theme_data()
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+    """
+    def __init__(self, docx_source):
+        import docx.package
+        from docx.opc.constants import CONTENT_TYPE as CT
+
+        if isinstance(docx_source, (bytes, bytearray)):
+            docx_source = io.BytesIO(docx_source)
+
+        self.docx_package = docx.package.Package.open(docx_source)
+        document_part = self.docx_package.main_document_part
+        if document_part.content_type != CT.WML_DOCUMENT_MAIN:
+            raise ValueError(f"docx is not a Word file, content type is "
+                             f"'{document_part.content_type}'")
+        self.document = document_part.document
+
+        # Create the Numbering Dictionary
+        self.numbering_dict = None
+        try:
+            numbering = document_part.numbering_part
+
+        except (RuntimeError, TypeError, NameError, AttributeError, NotImplementedError):
+            numbering = None
+
+        if not numbering is None:
+            self.numbering_dict = create_numbering_dict(
+                numbering_part=numbering,
+                styles_element=document_part.styles.element)
+
+        # Create the Theme Dictionary
+        self.theme_dict = get_theme_data(self.docx_package)
+
+        # Create the resolved Style Dictionary
+        self.style_dict = create_style_dict(self.document)
+
+
+# create numbering dict
+def create_numbering_dict(numbering_part, styles_element = None):
+    """ Function to create a dictionary representing the numbering.xml file in a docx, keyed on
+        the numId and level of each list so a lookup is a single dictionary access. The
+        w:lvlOverride / w:startOverride of each w:num and any w:numStyleLink of the abstractNum
+        are resolved while the dictionary is built
     Args:
         numbering_part (python-docx parts object): A python-docx parts object representing
             the numbering.xml file
+        styles_element (python-docx CT_Styles, optional): The styles.xml element, used to follow
+            a w:numStyleLink to the numbering style defining the list levels
     Returns:
-        [pandas Dataframe]: A converted pandas DataFrame of the numbering.xml file for easy access
+        [dict]: A dictionary with a (num_id, level) tuple of strings as the key and a dictionary
+            of the level values as the value, see get_numbering_level_values()
     """
-    namespace = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
-    num_list = []
-    abstract_num_list = []
-
-    # Loop through each part of numbering.xml
-    if numbering_part._element.getchildren():
-        for num in numbering_part._element:
-            # The abstractNum part
-            if not isinstance(num, CT_Num):
-                # Loop through each child, adding value to a dict
-                for abstract_element in num.iterchildren():
-                    abstract_num_dict = {
-                        "abstract_num_id" : num.get(namespace + "abstractNumId")
-                    }
-                    # Get MultilevelType
-                    if abstract_element.tag == (namespace + "multiLevelType"):
-                        abstract_num_dict["multi_level_type"] = abstract_element.get(namespace + "val")
-                    if abstract_element.tag == (namespace + "lvl"):
-                        # Add Dictionary for level based info
-                        abstract_num_level_dict = abstract_num_dict
-                        abstract_num_level_dict["level"] = abstract_element.get(namespace + "ilvl")
-
-                        for level_element in abstract_element.iterchildren():
-                            if level_element.tag == (namespace + "start"):
-                                abstract_num_level_dict["level_start"] = level_element.get(namespace + "val")
-                            if level_element.tag == (namespace + "numFmt"):
-                                abstract_num_level_dict["level_num_format"] = level_element.get(namespace + "val")
-                            if level_element.tag == (namespace + "lvlText"):
-                                abstract_num_level_dict["level_text"] = level_element.get(namespace + "val")
-                            if level_element.tag == (namespace + "pPr"):
-                                for level_para_prop_element in level_element.iterchildren():
-                                    if level_para_prop_element.tag == (namespace + "ind"):
-                                        abstract_num_level_dict["level_para_prop_left"] = level_para_prop_element.get(namespace + "left")
-                                        abstract_num_level_dict["level_para_prop_hanging"] = level_para_prop_element.get(namespace + "hanging")
-                        abstract_num_list.append(abstract_num_level_dict)
-            else:
-                # The numID part that is in document.xml
-                num_dict = {
-                    "num_id" : num.get(namespace + "numId"),
-                    "abstract_num_id" : str(num.abstractNumId.val)}
-                # append into num_list
-                num_list.append(num_dict)
-
-    # Convert Lists to DataFrame
-    if num_list:
-        num_id_pd = pd.DataFrame(num_list)
-        abstract_num_pd = pd.DataFrame(abstract_num_list)
-
-    # Merge into a single Data Frame
-        numbering_pd = pd.merge(
-            num_id_pd,
-            abstract_num_pd,
-            how = "left",
-            on = "abstract_num_id")
-
-        return numbering_pd
-
-
-# get data from numbering pd
-def get_data_from_numbering_pd(numbering_pd, num_id, level, column):
-    """ Function return spacific data from the numbering_pd DataFrame
+    return create_numbering_dict_from_element(numbering_part._element, styles_element)
+
+
+# create numbering dict from element
+def create_numbering_dict_from_element(numbering_element, styles_element = None):
+    """ Function to create the numbering dictionary from the w:numbering element, only plain lxml
+        access is used so the element can come from python-docx or be parsed directly, see
+        create_numbering_dict()
     Args:
-        numbering_pd (pandas DataFrame): The pandas Dataframe corresponding to numbering.xml, see
-            create_numbering_pd()
+        numbering_element (lxml element): The w:numbering root element of numbering.xml
+        styles_element (lxml element, optional): The w:styles root element of styles.xml
+    Returns:
+        [dict]: A dictionary with a (num_id, level) tuple of strings as the key and a dictionary
+            of the level values as the value, see get_numbering_level_values()
+    """
+    from docx.oxml.ns import qn
+    abstract_num_dict = {}
+    num_dict = {}
+    numbering_dict = {}
+
+    # Collect the level values of each abstractNum and the abstractNum / overrides of each num
+    for num in numbering_element.iterchildren():
+        if num.tag == qn("w:abstractNum"):
+            abstract_levels = {}
+            num_style_link = None
+            for abstract_element in num.iterchildren():
+                if abstract_element.tag == qn("w:lvl"):
+                    abstract_levels[abstract_element.get(qn("w:ilvl"))] = get_numbering_level_values(abstract_element)
+                elif abstract_element.tag == qn("w:numStyleLink"):
+                    num_style_link = abstract_element.get(qn("w:val"))
+            abstract_num_dict[num.get(qn("w:abstractNumId"))] = {
+                "levels" : abstract_levels,
+                "num_style_link" : num_style_link
+            }
+        elif num.tag == qn("w:num"):
+            abstract_num_id = num.find(qn("w:abstractNumId"))
+            if not abstract_num_id is None:
+                num_dict[num.get(qn("w:numId"))] = (
+                    abstract_num_id.get(qn("w:val")),
+                    num.findall(qn("w:lvlOverride")))
+
+    for num_id, (abstract_num_id, level_overrides) in num_dict.items():
+        abstract_levels = get_abstract_num_levels(abstract_num_dict, num_dict, abstract_num_id, styles_element)
+        num_levels = {level : dict(level_values) for level, level_values in abstract_levels.items()}
+
+        # Apply the overrides of the num on top of the abstractNum levels
+        for level_override in level_overrides:
+            level = level_override.get(qn("w:ilvl"))
+            override_level = level_override.find(qn("w:lvl"))
+            if not override_level is None:
+                num_levels[level] = get_numbering_level_values(override_level)
+            start_override = level_override.find(qn("w:startOverride"))
+            if not start_override is None:
+                num_levels.setdefault(level, get_numbering_level_values(None))
+                num_levels[level]["level_start"] = start_override.get(qn("w:val"))
+
+        for level, level_values in num_levels.items():
+            numbering_dict[(num_id, level)] = level_values
+
+    return numbering_dict
+
+
+# get numbering level values
+def get_numbering_level_values(lvl):
+    """ Function to read the values of a w:lvl element from numbering.xml
+    Args:
+        lvl (lxml element): The w:lvl element, or None for an empty set of values
+    Returns:
+        [dict]: A dictionary with the level_start, level_num_format, level_text,
+            level_para_prop_left and level_para_prop_hanging values, None if not set
+    """
+    from docx.oxml.ns import qn
+    level_values = {
+        "level_start" : None,
+        "level_num_format" : None,
+        "level_text" : None,
+        "level_para_prop_left" : None,
+        "level_para_prop_hanging" : None
+    }
+    if not lvl is None:
+        for level_element in lvl.iterchildren():
+            if level_element.tag == qn("w:start"):
+                level_values["level_start"] = level_element.get(qn("w:val"))
+            elif level_element.tag == qn("w:numFmt"):
+                level_values["level_num_format"] = level_element.get(qn("w:val"))
+            elif level_element.tag == qn("w:lvlText"):
+                level_values["level_text"] = level_element.get(qn("w:val"))
+            elif level_element.tag == qn("w:pPr"):
+                level_ind = level_element.find(qn("w:ind"))
+                if not level_ind is None:
+                    level_values["level_para_prop_left"] = level_ind.get(qn("w:left"))
+                    level_values["level_para_prop_hanging"] = level_ind.get(qn("w:hanging"))
+
+    return level_values
+
+
+# get abstract num levels
+def get_abstract_num_levels(abstract_num_dict, num_dict, abstract_num_id, styles_element):
+    """ Function to return the levels of an abstractNum, following any w:numStyleLink through the
+        numbering style to the abstractNum which holds the level definitions
+    Args:
+        abstract_num_dict (dict): The abstractNum levels and numStyleLink keyed on abstractNumId
+        num_dict (dict): The abstractNumId and level overrides keyed on numId
+        abstract_num_id (str): The abstractNumId to return the levels of
+        styles_element (lxml element): The styles.xml element, or None
+    Returns:
+        [dict]: The level values of the abstractNum keyed on the level, empty if not found
+    """
+    from docx.oxml.ns import qn
+    num_id_path = "/".join([qn("w:pPr"), qn("w:numPr"), qn("w:numId")])
+    visited_abstract_num_ids = set()
+    while abstract_num_id in abstract_num_dict and not abstract_num_id in visited_abstract_num_ids:
+        visited_abstract_num_ids.add(abstract_num_id)
+        abstract_num = abstract_num_dict[abstract_num_id]
+        num_style_link = abstract_num["num_style_link"]
+        if num_style_link is None or styles_element is None:
+            return abstract_num["levels"]
+
+        # The numbering style points to the num whose abstractNum defines the levels
+        num_style = get_style_element_by_id(styles_element, num_style_link)
+        if num_style is None or num_style.find(num_id_path) is None:
+            return abstract_num["levels"]
+        linked_num = num_dict.get(str(int(num_style.find(num_id_path).get(qn("w:val")))))
+        if linked_num is None:
+            return abstract_num["levels"]
+        abstract_num_id = linked_num[0]
+
+    return {}
+
+
+# get style element by id
+def get_style_element_by_id(styles_element, style_id):
+    """ Function to return the first w:style element with the given styleId
+    Args:
+        styles_element (lxml element): The w:styles root element of styles.xml
+        style_id (str): The styleId of the style
+    Returns:
+        [lxml element]: The w:style element, or None if not found
+    """
+    from docx.oxml.ns import qn
+    for style_element in styles_element.iterchildren(qn("w:style")):
+        if style_element.get(qn("w:styleId")) == style_id:
+            return style_element
+
+    return None
+
+
+# get data from numbering dict
+def get_data_from_numbering_dict(numbering_dict, num_id, level, column):
+    """ Function return spacific data from the numbering_dict
+    Args:
+        numbering_dict (dict): The dictionary corresponding to numbering.xml, see
+            create_numbering_dict()
         num_id (int): An integer corresponding to the List Para Style to be retrieved
         level (int): An integer corresponding to the level that the list is at
-        column (str): String corresponding to the column name to be returned from the numbering_pd
-            dataframe
+        column (str): String corresponding to the level value to be returned, see
+            get_numbering_level_values()
     Returns:
         [str]: The found data value corresponding to the inputs
     """
 
     output = ""
-    # check if numbering_pd is not defined
-    if not numbering_pd is None:
-        # check if it is not empty if its defined
-        if len(numbering_pd.index) > 0 and \
-            column in numbering_pd.columns and \
-            int(num_id) >= 0:
-
-            numbering_filtered = numbering_pd[numbering_pd.num_id == num_id]
-            if int(level) > 0:
-                numbering_filtered = numbering_filtered[numbering_filtered.level == level]
-                output = numbering_filtered[column].to_list()[0]
+    # check if numbering_dict is not defined
+    if not numbering_dict is None:
+        if int(num_id) >= 0 and int(level) > 0:
+            level_values = numbering_dict.get((str(num_id), str(level)))
+            if not level_values is None and not level_values.get(column) is None:
+                output = level_values[column]
 
     return output
 
@@ -204,6 +568,8 @@ def get_theme_data(docx_package):
     Returns:
         [dict]: A dictionary containing two keys containing string values, major and minor fonts
     """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsmap
     output = {
         "major_font" : "",
         "minor_font" : ""
@@ -224,6 +590,227 @@ def get_theme_data(docx_package):
     return output
 
 
+# create style dict
+def create_style_dict(document):
+    """ Function to create a dictionary of the resolved values for each style in styles.xml.
+        The basedOn chain of every style is flattened into the style, and paragraph styles
+        also fall back to the docDefaults, so that each entry holds plain effective values
+    Args:
+        document (python-docx docx.Document): A python-docx Document object representing the .docx file
+    Returns:
+        [dict]: A dictionary containing the "paragraph" and "character" style entries keyed by
+            style id, the "default_paragraph" and "default_character" entries and the "doc_defaults"
+    """
+    from docx.enum.style import WD_STYLE_TYPE
+    styles_element = document.styles.element
+
+    # Retrieve the values from the docDefaults, used as the base for every paragraph style
+    doc_defaults_pPr = styles_element.xpath("w:docDefaults/w:pPrDefault/w:pPr")
+    doc_defaults_rPr = styles_element.xpath("w:docDefaults/w:rPrDefault/w:rPr")
+    doc_defaults = get_ppr_values(doc_defaults_pPr[0] if doc_defaults_pPr else None)
+    doc_defaults.update(get_rpr_values(doc_defaults_rPr[0] if doc_defaults_rPr else None))
+
+    # Collect the values set directly on each style
+    style_entries = []
+    for style_element in styles_element.style_lst:
+        style_type = None
+        if style_element.type == WD_STYLE_TYPE.PARAGRAPH:
+            style_type = "paragraph"
+        elif style_element.type == WD_STYLE_TYPE.CHARACTER:
+            style_type = "character"
+
+        style_values = get_ppr_values(style_element.pPr)
+        style_values.update(get_rpr_values(style_element.rPr))
+        style_entries.append({
+            "style_id" : style_element.styleId,
+            "style_type" : style_type,
+            "default" : bool(style_element.default),
+            "based_on" : style_element.basedOn_val,
+            "name" : style_element.name_val,
+            "values" : style_values
+        })
+
+    return resolve_style_dict(doc_defaults, style_entries)
+
+
+# resolve style dict
+def resolve_style_dict(doc_defaults, style_entries):
+    """ Function to flatten the basedOn chain of each style and build the style dictionary, see
+        create_style_dict()
+    Args:
+        doc_defaults (dict): The paragraph and character values of the docDefaults, see
+            get_ppr_values() and get_rpr_values()
+        style_entries (list): A dictionary for each w:style in document order, with the style_id,
+            style_type ("paragraph", "character" or None), default, based_on and name of the
+            style and the values set directly on it
+    Returns:
+        [dict]: A dictionary containing the "paragraph" and "character" style entries keyed by
+            style id, the "default_paragraph" and "default_character" entries and the "doc_defaults".
+            The "paragraph_style_only" and "default_paragraph_style_only" entries hold the paragraph
+            styles without the docDefaults, for the getters which check the runs before them
+    """
+    from docx.styles import BabelFish
+    style_dict = {
+        "paragraph" : {},
+        "character" : {},
+        "paragraph_style_only" : {},
+        "default_paragraph" : None,
+        "default_character" : None,
+        "default_paragraph_style_only" : None,
+        "doc_defaults" : doc_defaults
+    }
+
+    # The first style wins for a repeated id
+    style_entry_dict = {}
+    for style_entry in style_entries:
+        if not style_entry["style_id"] in style_entry_dict:
+            style_entry_dict[style_entry["style_id"]] = style_entry
+
+    for style_id, style_entry in style_entry_dict.items():
+        style_type = style_entry["style_type"]
+        if not style_type in ("paragraph", "character"):
+            continue
+
+        # Flatten the basedOn chain, values closer to the style take priority
+        resolved_values = dict(style_entry["values"])
+        visited_ids = {style_id}
+        based_on_id = style_entry["based_on"]
+        while based_on_id in style_entry_dict and based_on_id not in visited_ids:
+            visited_ids.add(based_on_id)
+            for key, value in style_entry_dict[based_on_id]["values"].items():
+                if resolved_values[key] is None:
+                    resolved_values[key] = value
+            based_on_id = style_entry_dict[based_on_id]["based_on"]
+
+        # The name is never inherited from the basedOn style
+        resolved_values["name"] = None
+        if not style_entry["name"] is None:
+            resolved_values["name"] = BabelFish.internal2ui(style_entry["name"])
+
+        # Paragraph styles sit on top of the docDefaults
+        if style_type == "paragraph":
+            style_only_values = dict(resolved_values)
+            style_dict["paragraph_style_only"][style_id] = style_only_values
+            if style_entry["default"]:
+                style_dict["default_paragraph_style_only"] = style_only_values
+            for key, value in doc_defaults.items():
+                if resolved_values[key] is None:
+                    resolved_values[key] = value
+
+        style_dict[style_type][style_id] = resolved_values
+
+        # The spec calls for the last default style in document order
+        if style_entry["default"]:
+            style_dict["default_" + style_type] = resolved_values
+
+    # A document without a default paragraph style behaves as Normal with the docDefaults
+    if style_dict["default_paragraph"] is None:
+        style_dict["default_paragraph"] = dict(doc_defaults, name = "Normal")
+        style_dict["default_paragraph_style_only"] = dict.fromkeys(doc_defaults, None)
+        style_dict["default_paragraph_style_only"]["name"] = "Normal"
+
+    return style_dict
+
+
+# get ppr values
+def get_ppr_values(pPr):
+    """ Function to retrieve the paragraph formatting values set directly on a pPr element
+    Args:
+        pPr (python-docx CT_PPr): A python-docx paragraph properties element, can be None
+    Returns:
+        [dict]: A dictionary of the paragraph formatting values, None where a value is not set
+    """
+    import docx
+    from docx.oxml.ns import qn
+    ppr_values = {
+        "left_indent" : None,
+        "right_indent" : None,
+        "first_line_indent" : None,
+        "alignment" : None,
+        "line_spacing" : None,
+        "space_before" : None,
+        "space_after" : None,
+        "num_id" : None,
+        "ilvl" : None
+    }
+
+    if not pPr is None:
+        # Indents in points
+        if not pPr.ind_left is None:
+            ppr_values["left_indent"] = pPr.ind_left.pt
+        if not pPr.ind_right is None:
+            ppr_values["right_indent"] = pPr.ind_right.pt
+        if not pPr.first_line_indent is None:
+            ppr_values["first_line_indent"] = pPr.first_line_indent.pt
+
+        # Alignment as the original XML value
+        if not pPr.jc is None:
+            ppr_values["alignment"] = pPr.jc.get(qn("w:val"))
+
+        # Line spacing is a multiple of lines, or a Length for exact/at least spacing
+        if not pPr.spacing_line is None:
+            if pPr.spacing_lineRule == docx.enum.text.WD_LINE_SPACING.MULTIPLE:
+                ppr_values["line_spacing"] = pPr.spacing_line / docx.shared.Pt(12)
+            else:
+                ppr_values["line_spacing"] = pPr.spacing_line
+
+        # Spacing above and below in points
+        if not pPr.spacing_before is None:
+            ppr_values["space_before"] = pPr.spacing_before.pt
+        if not pPr.spacing_after is None:
+            ppr_values["space_after"] = pPr.spacing_after.pt
+
+        # List numbering
+        if not pPr.numPr is None:
+            if not pPr.numPr.numId is None:
+                ppr_values["num_id"] = str(pPr.numPr.numId.val)
+            if not pPr.numPr.ilvl is None:
+                ppr_values["ilvl"] = str(pPr.numPr.ilvl.val)
+
+    return ppr_values
+
+
+# get rpr values
+def get_rpr_values(rPr):
+    """ Function to retrieve the character formatting values set directly on a rPr element
+    Args:
+        rPr (python-docx CT_RPr): A python-docx run properties element, can be None
+    Returns:
+        [dict]: A dictionary of the character formatting values, None where a value is not set
+    """
+    rpr_values = {
+        "font_name" : None,
+        "font_size" : None,
+        "bold" : None,
+        "italic" : None,
+        "underline" : None,
+        "strike" : None,
+        "double_strike" : None,
+        "small_caps" : None,
+        "vert_align" : None
+    }
+
+    if not rPr is None:
+        rpr_values["font_name"] = rPr.rFonts_ascii
+        if not rPr.sz_val is None:
+            rpr_values["font_size"] = rPr.sz_val.pt
+        rpr_values["bold"] = rPr._get_bool_val("b")
+        rpr_values["italic"] = rPr._get_bool_val("i")
+        # Underline as the original XML value
+        if not rPr.u is None:
+            from docx.oxml.ns import qn
+            rpr_values["underline"] = rPr.u.get(qn("w:val"))
+        rpr_values["strike"] = rPr._get_bool_val("strike")
+        rpr_values["double_strike"] = rPr._get_bool_val("dstrike")
+        rpr_values["small_caps"] = rPr._get_bool_val("smallCaps")
+        # Superscript / subscript as the original XML value
+        if not rPr.vertAlign is None:
+            from docx.oxml.ns import qn
+            rpr_values["vert_align"] = rPr.vertAlign.get(qn("w:val"))
+
+    return rpr_values
+
+
 """ 
 Function to iterate through paragraphs of a document and return each paragraph in a list
 Input:
@@ -234,37 +821,93 @@ Output:
 
 
 # extract docx properties into list
-def extract_properties_to_list(document, numbering_pd, theme_dict):
+def extract_properties_to_list(document, numbering_dict, theme_dict, style_dict, stats = None):
     """ Function to iterate through paragraphs of a document, extract relevant information
         about the paragraph, store as a dictionary, and append to a list
     Args:
         document (python-docx docx.Document): A python-docx Document object representing the .docx file
-        numbering_pd (pandas DataFrame): A pandas DataFrame representing the numbering.xml
+        numbering_dict (dict): A dictionary representing the numbering.xml
         theme_dict (dict): A dictionary for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter and
+            block type, None (default) to disable the instrumentation, see extraction_stats
     Returns:
         [list]: A list containing dictionaries which store the information on each paragraph
     """
+    return list(iter_properties(document, numbering_dict, theme_dict, style_dict, stats = stats))
+
 
+# iterate over docx properties of a document
+def iter_properties(document, numbering_dict, theme_dict, style_dict, read_only = False, stats = None,
+                    record_type = dict, run_properties_list = None):
+    """ Function to iterate through paragraphs of a document, extract relevant information
+        about the paragraph and yield it as a dictionary
+    Args:
+        document (python-docx docx.Document): A python-docx Document object representing the .docx file
+        numbering_dict (dict): A dictionary representing the numbering.xml
+        theme_dict (dict): A dictionary for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+        read_only (bool, optional): When True the document is not modified, the body paragraphs
+            with no text are skipped (as if removed from the document before extraction) and the
+            paraIds are generated deterministically rather than stamped on the paragraphs
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter and
+            block type and the hits of the formatting memo, None (default) to disable the
+            instrumentation, see extraction_stats
+        record_type (type, optional): The type each paragraph is created as, dict (default) or
+            paragraph_properties.ParagraphProperties for a slotted record with the same keys
+        run_properties_list (list, optional): When a list, the properties of each run are appended
+            to it in the same pass, see create_run_properties()
+    Returns:
+        [generator]: A generator of dictionaries which store the information on each paragraph
+    """
+
+    # The formatting resolved for each signature is kept for the document only
+    formatting_memo = FormattingMemo()
     block_id = 1
-    document_properties_list = []
     logging.info('Started processing the components to extract the properties')
+    for para, block_type in iter_paragraphs(document, read_only):
+        yield call_block(
+            stats,
+            block_type,
+            create_paragraph_properties,
+            document,
+            para,
+            block_id,
+            block_type = block_type,
+            numbering_dict = numbering_dict,
+            theme_dict = theme_dict,
+            style_dict = style_dict,
+            read_only = read_only,
+            stats = stats,
+            record_type = record_type,
+            run_properties_list = run_properties_list,
+            formatting_memo = formatting_memo)
+
+        block_id += 1
+
+    if not stats is None:
+        stats.record_formatting_memo(formatting_memo)
+
+
+# iterate over the paragraphs of a document
+def iter_paragraphs(document, read_only = False):
+    """ Function to iterate through the paragraphs of a document which are extracted, in the
+        order of their ParaID, with the block type of each paragraph
+    Args:
+        document (python-docx docx.Document): A python-docx Document object representing the .docx file
+        read_only (bool, optional): When True the body paragraphs with no text are skipped, see
+            iter_properties()
+    Returns:
+        [generator]: A generator of (python-docx Paragraph, block type) tuples
+    """
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
     for document_block in iter_block_items(document):
-        # Check to see if the paragraph has a text box
-        para_contains_text_box = para_contains_xpath(
-            document_block,
-            xpath_string = ".//v:textbox/w:txbxContent")
-
-        # Check to see if paragraph contains an inline image
-        para_contains_linked_image = para_contains_xpath(
-            document_block,
-            xpath_string = ".//w:drawing/wp:inline/a:graphic/a:graphicData/pic:pic"
-        )
-
-        # Check to see if paragraph contains an word shape
-        para_contains_shape = para_contains_xpath(
-            document_block,
-            xpath_string = ".//w:drawing/wp:inline/a:graphic/a:graphicData/dgm:relIds"
-        )
+        # Skip the empty body paragraphs in memory, the same paragraphs that used to be removed
+        # from the document and saved before the extraction
+        if read_only and isinstance(document_block, Paragraph) and \
+            not get_para_content(document_block).strip():
+            continue
 
         ##########################
         ######## Table ###########
@@ -276,68 +919,31 @@ def extract_properties_to_list(document, numbering_pd, theme_dict):
             #     for cell in table_row.cells:
             #         for para in cell.paragraphs:
             #             # Uncommented this line to exclude any paragraphs with blank or only new lines
-            #             document_properties_list.append(create_paragraph_properties(
-            #                 document,
-            #                 para,
-            #                 block_id,
-            #                 block_type = "table_cell_paragraph",
-            #                 numbering_pd = numbering_pd,
-            #                 theme_dict = theme_dict))
-
-            #             block_id += 1
-
-        # Check to see if the current block is a paragraph and contains textbox
-        elif isinstance(document_block, Paragraph) and para_contains_text_box:
-            ################################
-            ### Paragraphs with TextBox ####
-            ################################
-            text_box_para = etree.ElementBase.xpath(
-                document_block._element,
-                '//v:textbox/w:txbxContent/w:p',
-                namespaces = document_block._element.nsmap)
-
-            # Iterate through all the paragraphs in the textboxes
-            for txt_box_para in text_box_para:
-                # Convert the paragraph (w:p) to a Paragraph Class
-                txt_box_para_class = Paragraph(
-                    txt_box_para,
-                    document_block
-                )
-
-                # Identify the properties
-                document_properties_list.append(create_paragraph_properties(
-                    document,
-                    txt_box_para_class,
-                    block_id,
-                    block_type = "text_box_paragraph",
-                    numbering_pd = numbering_pd,
-                    theme_dict = theme_dict))
-
-                block_id += 1
+            #             yield para, "table_cell_paragraph"
 
+        # Check to see if the current block is a paragraph, and what it contains
         elif isinstance(document_block, Paragraph):
-            block_type = ""
-            if para_contains_linked_image:
-                block_type = "linked_image_paragraph"
-            elif para_contains_shape:
-                block_type = "shape_paragraph"
+            block_type = classify_block(document_block._element)
+
+            if block_type == "text_box_paragraph":
+                ################################
+                ### Paragraphs with TextBox ####
+                ################################
+                # Iterate through all the paragraphs in the textboxes of this paragraph
+                for txt_box_para in get_text_box_paragraphs(document_block._element):
+                    # Convert the paragraph (w:p) to a Paragraph Class
+                    txt_box_para_class = Paragraph(
+                        txt_box_para,
+                        document_block
+                    )
+
+                    yield txt_box_para_class, "text_box_paragraph"
             else:
-                block_type = "paragraph"
-
-            ####################################
-            ### Paragraph with Linked Image ####
-            ####################################
-            document_properties_list.append(create_paragraph_properties(
-                document,
-                document_block,
-                block_id,
-                block_type = block_type,
-                numbering_pd = numbering_pd,
-                theme_dict = theme_dict))
-
-            block_id += 1
-
-    return document_properties_list
+                ##############################################
+                ### Paragraph, Linked Image, Shape, Chart, ###
+                ### Equation, Footnote, Content Control    ###
+                ##############################################
+                yield document_block, block_type
 
 
 # iterate over document
@@ -349,6 +955,11 @@ def iter_block_items(parent):
     Document object, but also works for a _Cell object, which itself can
     contain paragraphs and tables.
     """
+    from docx.document import Document
+    from docx.oxml.table import CT_Tbl
+    from docx.oxml.text.paragraph import CT_P
+    from docx.table import _Cell, Table
+    from docx.text.paragraph import Paragraph
     if isinstance(parent, Document):
         parent_elm = parent.element.body
     elif isinstance(parent, _Cell):
@@ -363,6 +974,71 @@ def iter_block_items(parent):
             yield Table(child, parent)
 
 
+# classify block
+def classify_block(element):
+    """ Function to return the block type of a paragraph from the elements it contains, with a
+        single walk of the paragraph, see BLOCK_CONTENT_TYPES
+    Args:
+        element (lxml element): The w:p element of the paragraph
+    Returns:
+        [str]: The block type, "text_box_paragraph" when the paragraph anchors a text box (its
+            text box paragraphs are extracted instead, see get_text_box_paragraphs()), or
+            "paragraph" when it contains none of the elements
+    """
+    block_precedence = len(BLOCK_CONTENT_TYPES)
+    for content_element in element.iter(*BLOCK_CONTENT_PRECEDENCE):
+        content_precedence = BLOCK_CONTENT_PRECEDENCE[content_element.tag]
+        if content_precedence >= block_precedence:
+            continue
+        # Pictures and SmartArt only count in an inline drawing
+        if content_element.tag in INLINE_CONTENT_TAGS and not is_inline_graphic(content_element):
+            continue
+
+        block_precedence = content_precedence
+        if block_precedence == 0:
+            break
+
+    if block_precedence == len(BLOCK_CONTENT_TYPES):
+        return "paragraph"
+    return BLOCK_CONTENT_TYPES[block_precedence][1]
+
+
+# check if an element is an inline graphic
+def is_inline_graphic(element):
+    """ Function to check if an element is the graphic data of an inline drawing,
+        w:drawing/wp:inline/a:graphic/a:graphicData/*
+    Args:
+        element (lxml element): The pic:pic or dgm:relIds element
+    Returns:
+        boolean: True/False indicating if the element is in an inline drawing
+    """
+    parent = element.getparent()
+    for ancestor_tag in INLINE_GRAPHIC_TAGS:
+        if parent is None or parent.tag != ancestor_tag:
+            return False
+        parent = parent.getparent()
+
+    return True
+
+
+# get text box paragraphs
+def get_text_box_paragraphs(element):
+    """ Function to return the paragraphs of the VML and DrawingML text boxes anchored in an
+        element, the search is scoped to the element so each text box is read once
+    Args:
+        element (lxml element): The w:p (or w:tbl) element of the document block
+    Returns:
+        [list]: The w:p elements of the text boxes in document order, see TEXT_BOX_PARA_XPATH
+    """
+    global text_box_para_xpath
+    if text_box_para_xpath is None:
+        # Only imported when used, the expression is compiled once rather than for every paragraph
+        from lxml import etree
+        text_box_para_xpath = etree.XPath(TEXT_BOX_PARA_XPATH, namespaces = BLOCK_NSMAP)
+
+    return text_box_para_xpath(element)
+
+
 # check if pata contains specified xpath
 def para_contains_xpath(para, xpath_string):
     """ Function to check if an XML block contains a certain xpath query
@@ -372,6 +1048,8 @@ def para_contains_xpath(para, xpath_string):
     Returns:
         boolean: True/False indicating if the para XML contains the xpath
     """
+    from docx.oxml.ns import nsmap
+    from lxml import etree
     # Combine Namespaces from the package and the paragraph
     custom_nsmap = dict(list(nsmap.items()) + list(para._element.nsmap.items()))
     xml_value = etree.ElementBase.xpath(
@@ -383,7 +1061,9 @@ def para_contains_xpath(para, xpath_string):
 
 
 # create paragraph properties
-def create_paragraph_properties(document, para, para_id, block_type, numbering_pd, theme_dict):
+def create_paragraph_properties(document, para, para_id, block_type, numbering_dict, theme_dict, style_dict,
+                                read_only = False, stats = None, record_type = dict, run_properties_list = None,
+                                formatting_memo = None):
     """ Function to create a paragraph properties dictionary
     Args:
         document (python_docx Document): Python-docx Document object
@@ -392,95 +1072,131 @@ def create_paragraph_properties(document, para, para_id, block_type, numbering_p
             occurs in the document
         block_type (str): Type of document block, example, paragraph, text_box_paragraph,
             table_cell_paragraph
-        numbering_pd (pandas DataFrame): A pandas DataFrame corresponding to numbering.xml
+        numbering_dict (dict): A dictionary corresponding to numbering.xml
         theme_dict (dict): A dictionary containing keys for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+        read_only (bool, optional): When True the paraId is generated without modifying the
+            paragraph, see retreive_para_hex_id()
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter,
+            None (default) to disable the instrumentation, see extraction_stats
+        record_type (type, optional): The type each paragraph is created as, dict (default) or
+            paragraph_properties.ParagraphProperties for a slotted record with the same keys
+        run_properties_list (list, optional): When a list, the properties of each run are appended
+            to it in the same pass, see create_run_properties()
+        formatting_memo (FormattingMemo, optional): The formatting resolved for the earlier
+            paragraphs of the document, None to resolve it for every paragraph, see formatting_memo
     Returns:
-        dict: Dictionary containing the paragraph properties for the document block
+        dict: Dictionary (or record_type) containing the paragraph properties for the document block
     """
 
-    para_prop_dict = {}
+    # The formatting is looked up on the signature of the paragraph, the run values are only
+    # collected when it has to be resolved, see formatting_memo
+    run_items = None
+    formatting_signature = None
+    formatting_values = None
+    if not formatting_memo is None and run_properties_list is None:
+        run_items = get_para_run_items(para)
+        formatting_signature = get_formatting_signature(para._p.pPr, run_items)
+        formatting_values = formatting_memo.get(formatting_signature)
+    if formatting_values is None:
+        # Walk the runs of the paragraph once, all the run based properties are taken from this
+        run_values = call_getter(
+            stats, get_para_run_values, style_dict, para, not run_properties_list is None, run_items)
+    else:
+        run_values = {"text" : "".join([run_text for rPr, run_text in run_items])}
+
+    para_prop_dict = record_type()
     para_prop_dict["ParaID"] = para_id
     para_prop_dict["ParaObjectType"] = block_type
-    para_prop_dict["ParaHexId"]=retreive_para_hex_id(para)
-    para_prop_dict["ParaCleanedContent"] = transform_para_content(get_para_content(para))
-    para_prop_dict["ParaContent"] = get_para_content(para)
-    para_prop_dict["ParaContentTabStart"] = get_para_content_tab_start_count(para)
-    para_prop_dict["ParaFontFamily"] = get_para_font_family(document, para, theme_dict)
-    para_prop_dict["ParaBold"] = get_para_bold(document, para)
-    para_prop_dict["ParaItalic"] = get_para_italic(document, para)
-    para_prop_dict["ParaFontSize"] = get_para_font_size(document, para)
-    para_prop_dict["ParaStyle"] = get_para_style(para)
-    para_prop_dict["ParaListStyle"] = get_para_list_style(document, para, numbering_pd)
-    para_prop_dict["ParaLeftIndent"] = get_para_left_indent(document, para, numbering_pd)
-    para_prop_dict["ParaRightIndent"] = get_para_right_indent(document, para)
-    para_prop_dict["ParaFirstLineIndent"] = get_para_first_line_indent(document, para)
-    para_prop_dict["ParaAlignment"] = get_para_alignment(document, para)
-    para_prop_dict["ParaLineSpace"] = get_para_line_space(document, para)
-    para_prop_dict["ParaAboveSpace"] = get_para_space_above(document, para)
-    para_prop_dict["ParaBelowSpace"] = get_para_space_below(document, para)
-
-    para_prop_dict = get_para_border(para_prop_dict, para)
-
-    para_prop_dict = get_para_shading(para_prop_dict, para)
-
-    para_prop_dict["ParaSingleStrike"] = get_para_single_strike(para)
-    para_prop_dict["ParaDoubleStrike"] = get_para_double_strike(para)
-    para_prop_dict["ParaUnderline"] = get_para_underline(document, para)
-    para_prop_dict["ParaSmallCaps"] = get_para_small_caps(para)
+    if read_only:
+        para_prop_dict["ParaHexId"] = call_getter(stats, retreive_para_hex_id, para, para_id, run_values["text"])
+    else:
+        para_prop_dict["ParaHexId"] = call_getter(stats, retreive_para_hex_id, para)
+
+    para_prop_dict["ParaCleanedContent"] = transform_para_content(get_para_content(para, run_values))
+    para_prop_dict["ParaContent"] = call_getter(stats, get_para_content, para, run_values)
+    para_prop_dict["ParaContentTabStart"] = call_getter(stats, get_para_content_tab_start_count, para, run_values)
+
+    if formatting_values is None:
+        para_prop_dict = set_formatting_properties(
+            para_prop_dict, para, run_values, numbering_dict, theme_dict, style_dict, stats)
+        if not formatting_signature is None:
+            formatting_memo.put(formatting_signature, para_prop_dict)
+    else:
+        for key, value in formatting_values:
+            para_prop_dict[key] = value
+
+    # The runs of the paragraph, from the same walk of the runs
+    if not run_properties_list is None:
+        run_properties_list.extend(call_getter(
+            stats, create_run_properties,
+            para_prop_dict, run_values, get_para_style_properties(style_dict, para), theme_dict))
 
     return para_prop_dict
 
 
-# get xml attribute
-def get_xml_attribute(
-    para,
-    tag_to_find,
-    tag_parent,
-    tag_attribute,
-    default_value = 0):
-    """ Function to retrieve an xml attribute for a given tag and parent tag
+# set formatting properties
+def set_formatting_properties(para_prop_dict, para, run_values, numbering_dict, theme_dict, style_dict,
+                              stats = None):
+    """ Function to resolve the formatting properties of a paragraph, every property after
+        ParaContentTabStart, see create_paragraph_properties()
     Args:
-        para (python-docx paragraph object): Python-docx paragraph object
-            found through iterating the document
-        tag_to_find (str): The tag to retreive attribute values for
-        tag_parent (str): The parent tag_to_find should have. Found using .getparent().tag
-        tag_attribute (str): The attribute value to be retrieved from the element
-        default_value (int, optional): A default value to be returned in the
-            event no value is found. Defaults to 0.
+        para_prop_dict (dict): The paragraph properties the values are added to
+        para (python-docx Paragraph): Python-docx Paragraph object
+        run_values (dict): The run values for the paragraph, see get_para_run_values()
+        numbering_dict (dict): A dictionary corresponding to numbering.xml
+        theme_dict (dict): A dictionary containing keys for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter
     Returns:
-        str: The attribute value found in the XML
+        dict: The para_prop_dict with the formatting properties added
     """
-    # Set-up the return value to be the default value
-    attribute_value = default_value
-    # Convert para element xml to an etree data structure
-    para_xml = etree.XML(para._element.xml)
-
-    # Iterate directly to the tag that should be found
-    for element in para_xml.iter(tag_to_find):
-        # Check if the tag is the same and the parent is as expected
-        if element.tag == tag_to_find and element.getparent().tag == tag_parent:
-            # Check if the attribute to be retrieved is actually there
-            if tag_attribute in element.keys():
-                # Retrieve the attribute values from the dict
-                attribute_value = element.get(tag_attribute)
-                # Exit the loop as we have got what we needed
-                break
+    para_prop_dict["ParaFontFamily"] = call_getter(stats, get_para_font_family, style_dict, para, theme_dict, run_values)
+    para_prop_dict["ParaBold"] = call_getter(stats, get_para_bold, style_dict, para, run_values)
+    para_prop_dict["ParaItalic"] = call_getter(stats, get_para_italic, style_dict, para, run_values)
+    para_prop_dict["ParaFontSize"] = call_getter(stats, get_para_font_size, style_dict, para, run_values)
+    para_prop_dict["ParaStyle"] = call_getter(stats, get_para_style, para, style_dict)
+    para_prop_dict["ParaListStyle"] = call_getter(stats, get_para_list_style, style_dict, para, numbering_dict)
+    para_prop_dict["ParaLeftIndent"] = call_getter(stats, get_para_left_indent, style_dict, para, numbering_dict)
+    para_prop_dict["ParaRightIndent"] = call_getter(stats, get_para_right_indent, style_dict, para)
+    para_prop_dict["ParaFirstLineIndent"] = call_getter(stats, get_para_first_line_indent, style_dict, para)
+    para_prop_dict["ParaAlignment"] = call_getter(stats, get_para_alignment, style_dict, para)
+    para_prop_dict["ParaLineSpace"] = call_getter(stats, get_para_line_space, style_dict, para)
+    para_prop_dict["ParaAboveSpace"] = call_getter(stats, get_para_space_above, style_dict, para)
+    para_prop_dict["ParaBelowSpace"] = call_getter(stats, get_para_space_below, style_dict, para)
+
+    para_prop_dict = call_getter(stats, get_para_border_shading, para_prop_dict, para)
+
+    para_prop_dict["ParaSingleStrike"] = call_getter(stats, get_para_single_strike, para, run_values)
+    para_prop_dict["ParaDoubleStrike"] = call_getter(stats, get_para_double_strike, para, run_values)
+    para_prop_dict["ParaUnderline"] = call_getter(stats, get_para_underline, style_dict, para, run_values)
+    para_prop_dict["ParaSmallCaps"] = call_getter(stats, get_para_small_caps, para, run_values)
 
-    return attribute_value
+    return para_prop_dict
 
 
 # retrieve para hex id
-def retreive_para_hex_id(para):
+def retreive_para_hex_id(para, para_id = None, para_content = None):
     """Function to generate random hex id for each paras.
 
     Args:
         para (docx obj): docx.Document obj.
+        para_id (int, optional): The sequential id of the paragraph, when given the paragraph is
+            not modified and a missing paraId is generated from the para_id and para_content
+            instead, so the same document always gives the same ids.
+        para_content (str, optional): The text of the paragraph, used with para_id.
 
     Returns:
         Generated para ID.
     """
     # define wordml xpath
     word14_namespace_ml = "{http://schemas.microsoft.com/office/word/2010/wordml}"
+    # generate a deterministic para ID without touching the paragraph
+    if not para_id is None:
+        para_hex_id = para._p.get(word14_namespace_ml + "paraId")
+        if para_hex_id is None:
+            para_hex_id = gen_deterministic_id(para_id, para_content)
+        return para_hex_id
     # generate para ID into input_doc
     if (len(para._p.xpath("@w14:paraId")) < 1):
         para._p.set(
@@ -490,11 +1206,163 @@ def retreive_para_hex_id(para):
         return para._p.xpath("@w14:paraId")[0]
 
 
+# get para run items
+def get_para_run_items(para, run_elements = None):
+    """ Function to return the w:rPr (None if not set) and the text of each w:r of a paragraph,
+        the same runs as para.runs """
+    if run_elements is None:
+        run_elements = para._p.r_lst
+    return [(run_element.rPr, run_element.text) for run_element in run_elements]
+
+
+# get para run values
+def get_para_run_values(style_dict, para, collect_runs = False, run_items = None):
+    """ Function to walk the runs of a paragraph once and collect the values used by all the
+        run based paragraph properties, the w:rPr of each run is read directly
+    Args:
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict(),
+            when None the run style values are not collected
+        para (python-docx Paragraph): Python-docx Paragraph object
+        collect_runs (bool, optional): When True the text, the direct values and the character
+            style values of each run are also kept under "runs", see create_run_properties()
+        run_items (list, optional): The (w:rPr, text) of each run when they are already read, see
+            get_para_run_items()
+    Returns:
+        [dict]: A dictionary containing the paragraph text and a list of values for each run property
+    """
+    run_values = {
+        "text" : "",
+        "font_name" : [],
+        "style_font_name" : [],
+        "font_size" : [],
+        "style_font_size" : [],
+        "bold" : [],
+        "italic" : [],
+        "strike" : [],
+        "double_strike" : [],
+        "underline" : [],
+        "small_caps" : [],
+        "runs" : []
+    }
+    run_texts = []
+
+    # Iterate through the w:r children of the paragraph, the same runs as para.runs
+    run_elements = para._p.r_lst
+    if run_items is None:
+        run_items = get_para_run_items(para, run_elements)
+
+    for run_element, (rPr, run_text) in zip(run_elements, run_items):
+        run_texts.append(run_text)
+        rpr_values = get_rpr_values(rPr)
+        if collect_runs:
+            run_values["runs"].append((run_text, rpr_values, get_run_style_properties(style_dict, run_element)))
+
+        # Bold is collected from the runs which set it, italic from every run
+        if not rpr_values["bold"] is None:
+            run_values["bold"].append(rpr_values["bold"])
+        run_values["italic"].append(rpr_values["italic"])
+
+        # Font name and size only from the runs which contain text
+        if not run_text == "" and not run_text == "\n":
+            run_values["font_name"].append(rpr_values["font_name"])
+            run_values["font_size"].append(rpr_values["font_size"])
+            if not style_dict is None:
+                run_style_properties = get_run_style_properties(style_dict, run_element)
+                if run_style_properties is not None:
+                    run_values["style_font_name"].append(run_style_properties["font_name"])
+                    run_values["style_font_size"].append(run_style_properties["font_size"])
+
+        # Strike, underline and small caps from the runs which are not empty
+        if not run_text == "":
+            run_values["strike"].append(rpr_values["strike"])
+            run_values["double_strike"].append(rpr_values["double_strike"])
+            run_values["underline"].append(rpr_values["underline"])
+            run_values["small_caps"].append(rpr_values["small_caps"])
+
+    run_values["text"] = "".join(run_texts)
+
+    return run_values
+
+
+# create run properties
+def create_run_properties(para_prop_dict, run_values, style_properties, theme_dict):
+    """ Function to create a dictionary of the effective properties of each run of a paragraph,
+        a value set directly on the run is used first, then the character style of the run and
+        then the paragraph style (which includes the docDefaults)
+    Args:
+        para_prop_dict (dict): The paragraph properties, for the ParaID and ParaHexId
+        run_values (dict): The run values of the paragraph collected with collect_runs, see
+            get_para_run_values()
+        style_properties (dict): The resolved values of the paragraph style
+        theme_dict (dict): A dictionary containing keys for the major and minor fonts
+    Returns:
+        [list]: A dictionary for each run, RunStart and RunEnd are the character offsets of the
+            run text in ParaContent
+    """
+    # The theme font for the runs without a font, as for the paragraph font family
+    theme_font = None
+    if not style_properties["name"] is None:
+        if style_properties["name"].lower().find("heading") >= 0:
+            theme_font = theme_dict.get("major_font")
+        else:
+            theme_font = theme_dict.get("minor_font")
+    if theme_font is None:
+        theme_font = "Default"
+
+    run_properties_list = []
+    run_start = 0
+    for run_index, (run_text, rpr_values, run_style_properties) in enumerate(run_values["runs"]):
+        # ParaContent joins the run texts, so each run starts where the previous one ended
+        run_end = run_start + len(run_text)
+        font_name = get_run_value("font_name", rpr_values, run_style_properties, style_properties)
+        font_size = get_run_value("font_size", rpr_values, run_style_properties, style_properties)
+        vert_align = get_run_value("vert_align", rpr_values, run_style_properties, style_properties)
+
+        run_properties_list.append({
+            "ParaID" : para_prop_dict["ParaID"],
+            "ParaHexId" : para_prop_dict["ParaHexId"],
+            "RunID" : run_index + 1,
+            "RunContent" : run_text,
+            "RunStart" : run_start,
+            "RunEnd" : run_end,
+            "RunFontFamily" : theme_font if font_name is None else font_name,
+            "RunFontSize" : 11 if font_size is None else font_size,
+            "RunBold" : get_run_value("bold", rpr_values, run_style_properties, style_properties) is True,
+            "RunItalic" : get_run_value("italic", rpr_values, run_style_properties, style_properties) is True,
+            "RunSuperscript" : vert_align == "superscript",
+            "RunSubscript" : vert_align == "subscript"
+        })
+        run_start = run_end
+
+    return run_properties_list
+
+
+# get run value
+def get_run_value(value_name, rpr_values, run_style_properties, style_properties):
+    """ Function to return the effective value of a run, see create_run_properties()
+    Args:
+        value_name (str): The name of the value, see get_rpr_values()
+        rpr_values (dict): The values set directly on the run
+        run_style_properties (dict): The resolved values of the character style, can be None
+        style_properties (dict): The resolved values of the paragraph style
+    Returns:
+        [object]: The value, None if it is not set at any level
+    """
+    value = rpr_values[value_name]
+    if value is None and not run_style_properties is None:
+        value = run_style_properties[value_name]
+    if value is None:
+        value = style_properties[value_name]
+
+    return value
+
+
 # get para content
-def get_para_content(para):
+def get_para_content(para, run_values = None):
     """ Function to retrieve the paragraph content across all runs
     Input:
     - para: paragraph object from document
+    - run_values: Optional dictionary of the run values, see get_para_run_values
     Output:
     - para_content: String containing the text for the paragraph
     """
@@ -502,7 +1370,9 @@ def get_para_content(para):
     # Check to ensure that the para is not None
     if not para is None:
         # Retrieve the text from all the runs in the paragraph
-        para_content = para.text
+        if run_values is None:
+            run_values = get_para_run_values(None, para)
+        para_content = run_values["text"]
 
     return para_content
 
@@ -525,36 +1395,39 @@ def transform_para_content(para_content):
 
 
 # get number of tab characters ar start of a str of paragraphs
-def get_para_content_tab_start_count(para):
+def get_para_content_tab_start_count(para, run_values = None):
     """ Function to count the number of tab characters at the start of a string of paragraph of text
     Args:
         para (python-docx Paragraph object): A python-docx Paragraph corresponding to a paragraph in a word document
+        run_values (dict, optional): The run values for the paragraph, see get_para_run_values()
     Returns:
         [int]: The number of tab characters at the start of a paragraph of text, default to 0
     """
     output = 0
     try:
-        if len(para.text) > 0:
+        para_text = get_para_content(para, run_values)
+        if len(para_text) > 0:
             i = 0
             while True:
-                if para.text[i] == "\t" and i < len(para.text):
+                if para_text[i] == "\t" and i < len(para_text):
                     i += 1
                 else:
                     break
             output = i
         return output
     except Exception as error:
-        print(f"Error occured while taking the tab start count: {error}")
+        report_getter_error(f"Error occured while taking the tab start count: {error}")
 
 
 # get para font family
-def get_para_font_family(document, para, theme_dict):
+def get_para_font_family(style_dict, para, theme_dict, run_values = None):
     """ Function to retrieve the font family for a specific paragraph, the run is
         also included to check for any run specific fonts
     Args:
-        document (python-docx document object): Python-docx document object
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
         para (python-docx Paragraph object): A python-docx object of the paragraph
         theme_dict (dict): A dictionary containing keys for the major and minor fonts
+        run_values (dict, optional): The run values for the paragraph, see get_para_run_values()
     Returns:
         [str]: The font family identified for the paragraph
     """
@@ -564,26 +1437,22 @@ def get_para_font_family(document, para, theme_dict):
         # Check to esnure the paragraph object is not None
         if not para is None:
             # Direct font family name for the run and style values for the run
-            run_font_values = []
-            run_style_font_values = []
-            # Iterate through each run to populate the two above lists
-            for run in para.runs:
-                if not run.text == "" and not run.text == "\n":
-                    run_font_values.append(run.font.name)
-                    if run.style is not None:
-                        run_style_font_values.append(run.style.font.name)
-
-            # Check the paragraph style font family name
-            para_style_font_name = para.style.font.name
+            if run_values is None:
+                run_values = get_para_run_values(style_dict, para)
+            run_font_values = run_values["font_name"]
+            run_style_font_values = run_values["style_font_name"]
+
+            # Check the paragraph style font family name, the docDefaults are only checked
+            # after the runs
+            para_style_font_name = get_para_style_properties(style_dict, para, False)["font_name"]
+            doc_defaults_font_name = style_dict["doc_defaults"]["font_name"]
 
             # Identify the paragraph style
-            para_style = get_para_style(para)
-            # Check the style from the document styles
-            if para_style is not None:
-                document_para_style = document.styles[para_style].font.name
+            para_style = get_para_style(para, style_dict)
 
-                # Check the theme_dict for a font at theme level
-                theme_font = None
+            # Check the theme_dict for a font at theme level
+            theme_font = None
+            if para_style is not None:
                 if para_style.lower().find("heading") >= 0 and "major_font" in theme_dict.keys():
                     theme_font = theme_dict.get("major_font")
                 elif para_style.lower().find("heading") < 0 and "minor_font" in theme_dict.keys():
@@ -591,40 +1460,40 @@ def get_para_font_family(document, para, theme_dict):
 
 
             # Check which of the above variables should be used, based on the following logic
-            # - The font directly applied to the paragraph
-            # - The font for any style applied to the paragraph
+            # - The font for the style applied to the paragraph, including its basedOn styles
             # - The majority font for any style applied to the runs within the paragraph
             # - The majority font directly applied to any run within the paragraph
+            # - The font of the docDefaults
             # - The Major/Minor Font used in theme.xml, depending on the heading
             if para_style_font_name is None:
-                if document_para_style is None:
-                    # Condition to check if all values are None in the list
-                    if all(run_font_value is None for run_font_value in run_style_font_values):
-                        if all(run_font_value is None for run_font_value in run_font_values):
-                            if not theme_font is None:
-                                font_family = theme_font
-                        else:
-                            run_values_counter = Counter(run_font_values)
-                            font_family = run_values_counter.most_common(1)[0][0]
+                # Condition to check if all values are None in the list
+                if all(run_font_value is None for run_font_value in run_style_font_values):
+                    if all(run_font_value is None for run_font_value in run_font_values):
+                        if not doc_defaults_font_name is None:
+                            font_family = doc_defaults_font_name
+                        elif not theme_font is None:
+                            font_family = theme_font
                     else:
-                        run_values_counter = Counter(run_style_font_values)
+                        run_values_counter = Counter(run_font_values)
                         font_family = run_values_counter.most_common(1)[0][0]
                 else:
-                    font_family = document_para_style
+                    run_values_counter = Counter(run_style_font_values)
+                    font_family = run_values_counter.most_common(1)[0][0]
             else:
                 font_family = para_style_font_name
 
         return font_family
     except Exception as error:
-        print(f"Error while fetching the para font family information: {error}")
+        report_getter_error(f"Error while fetching the para font family information: {error}")
 
 
 # check if para is bold
-def get_para_bold(document, para):
+def get_para_bold(style_dict, para, run_values = None):
     """ Function to identify if a paragraph contains bold content
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object
+    - run_values: Optional dictionary of the run values, see get_para_run_values
     Output
     - is_bold: Boolean indicating if the paragraph is bold
     """
@@ -633,191 +1502,200 @@ def get_para_bold(document, para):
         is_bold = False
         # Check to see if the para object is None
         if not para is None:
-            # Create a list to store the bold values for each of the runs
-            run_values = []
-            for run in para.runs:
-                if not run.bold is None:
-                    run_values.append(run.bold)
-
+            # The bold values for each of the runs which set it
+            if run_values is None:
+                run_values = get_para_run_values(style_dict, para)
+            run_bold_values = run_values["bold"]
 
-            # Check paragraph style
-            para_bold = para.style.font.bold
-
-            # Check document style
-            document_style_bold = None
-            para_style = get_para_style(para)
-            # Check the style from the document styles
-            if para_style is not None:
-                document_style_bold = document.styles[para_style].font.bold
+            # Check paragraph style, without the docDefaults
+            para_bold = get_para_style_properties(style_dict, para, False)["bold"]
+            doc_defaults_bold = style_dict["doc_defaults"]["bold"]
 
             # Update is_bold variable based on the following logic:
             # - check if the paragraph style is bold
-            # - Check the default value for the paragraph style at document level
             # - check if all runs are bold, if they are assign is_bold to True
+            # - check the docDefaults when no run sets bold
             if para_bold is None:
-                if document_style_bold is None:
-                    if len(run_values) > 0:
-                        if all(run_bold is True for run_bold in run_values):
-                            is_bold = True
-                else:
-                    is_bold = document_style_bold
+                if len(run_bold_values) > 0:
+                    if all(run_bold is True for run_bold in run_bold_values):
+                        is_bold = True
+                elif not doc_defaults_bold is None:
+                    is_bold = doc_defaults_bold
             else:
                 is_bold = para_bold
 
         return is_bold
     except Exception as error:
-        print(f"Error while fetching the bold information from para: {error}")
+        report_getter_error(f"Error while fetching the bold information from para: {error}")
 
 # check if para is italic
-def get_para_italic(document, para):
+def get_para_italic(style_dict, para, run_values = None):
     """ Function to identify if a paragraph contains italic content
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object
+    - run_values: Optional dictionary of the run values, see get_para_run_values
     Output
     - is_italic: Boolean indicating if the paragraph is italic
     """
     try:
         # Default is False (not italic)
         is_italic = False
-        full_run_complete = True
         # Check to see if the para object is None
         if not para is None:
-            # Create a list to store the italic values for each of the runs
-            run_values = []
-            for run in para.runs:
-                if not run.italic is None:
-                    run_values.append(run.italic)
-                else:
-                    full_run_complete = False
-                    break
+            # The italic values for each of the runs, None where a run does not set it
+            if run_values is None:
+                run_values = get_para_run_values(style_dict, para)
+            run_italic_values = run_values["italic"]
 
-
-            # Check paragraph style
-            para_italic = para.style.font.italic
-
-            # Check document style
-            document_style_italic = None
-            para_style = get_para_style(para)
-            # Check the style from the document styles
-            if para_style is not None:
-                document_style_italic = document.styles[para_style].font.italic
+            # Check paragraph style, without the docDefaults
+            para_italic = get_para_style_properties(style_dict, para, False)["italic"]
+            doc_defaults_italic = style_dict["doc_defaults"]["italic"]
 
             # Update is_italic variable based on the following logic:
             # - check if the paragraph style is italic
-            # - Check the default value for the paragraph style at document level
             # - check if all runs are italic, if they are assign is_italic to True
+            #   (a run which does not set italic means the paragraph is not italic)
+            # - check the docDefaults when no run sets italic
             if para_italic is None:
-                if document_style_italic is None:
-                    if len(run_values) > 0 and full_run_complete:
-                        if all(run is True for run in run_values):
-                            is_italic = True
-                else:
-                    is_italic = document_style_italic
+                if all(run is None for run in run_italic_values) and not doc_defaults_italic is None:
+                    is_italic = doc_defaults_italic
+                elif len(run_italic_values) > 0:
+                    if all(run is True for run in run_italic_values):
+                        is_italic = True
             else:
                 is_italic = para_italic
 
         return is_italic
     except Exception as error:
-        print(f"Error while fetching the italic information from para: {error}")
+        report_getter_error(f"Error while fetching the italic information from para: {error}")
 
 
 
 # get para font size 
-def get_para_font_size(document, para):
+def get_para_font_size(style_dict, para, run_values = None):
     """ Function to retrieve the font size for a paragraph based on the style hierarchy
     Input:
-    - document: document object for the entire docx file
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: paragraph object for the current paragraph
+    - run_values: Optional dictionary of the run values, see get_para_run_values
     Output:
     - font_size: Number indicating the font size, default to 11 - Word default font size
     """
     try:
         # Default font size to be 11
         font_size = 11
-        if not document is None and not para is None:
+        if not style_dict is None and not para is None:
             ## Gather all the raw data, follow style hierarchy as defined by
             #https://stackoverflow.com/questions/64031644/how-to-get-a-style-value-by-traversing
             #-from-bottom-run-to-top-docdefaults
 
-            # Direct font values for the run and style values for the run
-            run_font_values = []
-            run_style_font_values = []
-            # Iterate through each run to populate the two above lists
-            for run in para.runs:
-                if not run.text == "" and not run.text == "\n":
-                    run_font_values.append(run.font.size)
-                    if run.style is not None:
-                        run_style_font_values.append(run.style.font.size)
-            # Check the font size from the paragraph style
-            paragraph_style_size = para.style.font.size
-
-            # Identify the paragraph style
-            document_para_style = None
-            para_style = get_para_style(para)
-            # Check the style from the document styles
-            if para_style is not None:
-                document_para_style = document.styles[para_style].font.size
+            # Direct font values for the run and style values for the run, in points
+            if run_values is None:
+                run_values = get_para_run_values(style_dict, para)
+            run_font_values = run_values["font_size"]
+            run_style_font_values = run_values["style_font_size"]
+            # Check the font size from the paragraph style, which includes the docDefaults
+            paragraph_style_size = get_para_style_properties(style_dict, para)["font_size"]
 
             # Check if all the run font values are None
             if all(run is None for run in run_font_values):
                 # Check if all the run style font values are None
                 if all(run is None for run in run_style_font_values):
-                    # Check if the paragraph style is none
-                    if paragraph_style_size is None:
-                        # Check if the style as defined in styles.xml has a size
-                        if not document_para_style is None:
-                            font_size = document_para_style.pt
-                    else:
-                        font_size = paragraph_style_size.pt
+                    # Check if the paragraph style has a size
+                    if not paragraph_style_size is None:
+                        font_size = paragraph_style_size
                 else:
                     # Get unique set of font sizes identified in the run
                     font_sizes = [font_size for font_size in run_style_font_values
                                     if not font_size is None]
                     if font_sizes:
-                        font_size = font_sizes[0].pt
+                        font_size = font_sizes[0]
             else:
                 # Get unique set of font sizes identified in the run
                 font_sizes = [font_size for font_size in run_font_values if not font_size is None]
                 if font_sizes:
-                    font_size = font_sizes[0].pt
+                    font_size = font_sizes[0]
 
         return font_size
     except Exception as error:
-        print(f"Error while fetching the font size information from para: {error}")
+        report_getter_error(f"Error while fetching the font size information from para: {error}")
 
 # get para style
-def get_para_style(para):
+def get_para_style(para, style_dict = None):
     """ Function to retrieve the font paragraph style for a paragraph based on the style hierarchy
     Input:
     - para: paragraph object for the current paragraph
+    - style_dict: Dictionary of the resolved style values, see create_style_dict. When not given
+    the style is looked up through python-docx
     Output:
     - para_style: The style that is applied to the paragraph, defaults to 'Normal'
     """
     # Set the default to be Normal style
     para_style = "Normal"
 
+    # Check the resolved style values
+    if not style_dict is None:
+        para_style = get_para_style_properties(style_dict, para)["name"]
+
     # Check the para style object
-    if not para.style is None:
+    elif not para.style is None:
         para_style = para.style.name
 
     return para_style
 
 
+# get para style properties
+def get_para_style_properties(style_dict, para, doc_defaults = True):
+    """ Function to retrieve the resolved style values for the style applied to a paragraph,
+        the default paragraph style is used when no (or an unknown) style is applied
+    Args:
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+        para (python-docx Paragraph): Python-docx Paragraph object
+        doc_defaults (bool, optional): Include the docDefaults in the values, False for the
+            values set by the style and its basedOn styles only
+    Returns:
+        [dict]: A dictionary of the resolved style values for the paragraph style
+    """
+    if doc_defaults:
+        style_properties = style_dict["paragraph"].get(para._p.style)
+        if style_properties is None:
+            style_properties = style_dict["default_paragraph"]
+    else:
+        style_properties = style_dict["paragraph_style_only"].get(para._p.style)
+        if style_properties is None:
+            style_properties = style_dict["default_paragraph_style_only"]
+
+    return style_properties
+
+
+# get run style properties
+def get_run_style_properties(style_dict, run_element):
+    """ Function to retrieve the resolved style values for the character style applied to a run,
+        the default character style is used when no (or an unknown) style is applied
+    Args:
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
+        run_element (python-docx CT_R): The w:r element of the run
+    Returns:
+        [dict]: A dictionary of the resolved style values for the character style, or None if
+            the document has no default character style
+    """
+    style_properties = style_dict["character"].get(run_element.style)
+    if style_properties is None:
+        style_properties = style_dict["default_character"]
+
+    return style_properties
+
+
 # get para list style 
-def get_para_list_style(document, para, numbering_pd):
+def get_para_list_style(style_dict, para, numbering_dict):
     """ Function to return the paragraph list style, default to '' for now """
     try:
         para_list_style = ""
-        document_pPr = None
-
-        # Retrieve the paragraph style
-        para_style = get_para_style(para)
 
         # Get any paragraph properties associated with the paragraph, either at the style
         # or paragraph level
-        if para_style is not None:
-            document_pPr = document.styles[para_style]._element.pPr
+        style_properties = get_para_style_properties(style_dict, para)
         para_pPr = para._p.pPr
 
         num_id = -1
@@ -831,56 +1709,48 @@ def get_para_list_style(document, para, numbering_pd):
                 if not para_pPr.numPr.ilvl is None:
                     level = str(para_pPr.numPr.ilvl.val)
 
-            elif not document_pPr is None:
-                if not document_pPr.numPr is None:
-                    num_id = str(document_pPr.numPr.numId.val)
-                    # Identify the Level, if any
-                    if not document_pPr.numPr.ilvl is None:
-                        level = str(document_pPr.numPr.ilvl.val)
+            elif not style_properties["num_id"] is None:
+                num_id = style_properties["num_id"]
+                # Identify the Level, if any
+                if not style_properties["ilvl"] is None:
+                    level = style_properties["ilvl"]
 
 
-        # Identify the paragraph list style from the numbering_pd DataFrame
-        numbering_para_list_style = get_data_from_numbering_pd(
-            numbering_pd,
+        # Identify the paragraph list style from the numbering_dict
+        numbering_para_list_style = get_data_from_numbering_dict(
+            numbering_dict,
             num_id, level,
             column = "level_num_format"
         )
 
         # if len(numbering_para_list_style) > 0:
         #     para_list_style = numbering_para_list_style
-        
+
         #######  this is for testing the project 500200 #####
         # if len(str(numbering_para_list_style)) > 0:
         para_list_style = numbering_para_list_style
 
         return para_list_style
     except Exception as error:
-        print(f"Error while fetching the list style information from para: {error}")
+        report_getter_error(f"Error while fetching the list style information from para: {error}")
 
 # get para left indentation
-def get_para_left_indent(document, para, numbering_pd):
+def get_para_left_indent(style_dict, para, numbering_dict):
     """ Function to find the left indent for a paragraph, default to 0
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object for the current paragraph
     Output:
     - para_left_indent: Number indicating the left indent
     """
     try:
         para_left_indent = 0
-        document_para_style = None
-        document_pPr = None
-        # Get the paragraph style
-        para_style = get_para_style(para)
-        # Check the style from the document styles
-        if para_style is not None:
-            document_para_style = document.styles[para_style].paragraph_format.left_indent
-        # Check for numbering.xml when lists are used in Document
-            document_pPr = document.styles[para_style]._element.pPr
+        # Get the resolved paragraph style, this also holds the numbering used by lists
+        style_properties = get_para_style_properties(style_dict, para)
         para_pPr = para._p.pPr
 
-        numbering_left_indent = get_left_indent_from_numbering_pd(
-            numbering_pd, document_pPr, para_pPr
+        numbering_left_indent = get_left_indent_from_numbering_dict(
+            numbering_dict, style_properties, para_pPr
         )
 
         if not para is None:
@@ -888,24 +1758,23 @@ def get_para_left_indent(document, para, numbering_pd):
                 para_left_indent = para.paragraph_format.left_indent.pt
                 if not numbering_left_indent is None:
                     para_left_indent -= numbering_left_indent
-            elif not para.style.paragraph_format.left_indent is None:
-                para_left_indent = para.style.paragraph_format.left_indent.pt
-            elif not document_para_style is None:
-                para_left_indent = document.styles[para_style].paragraph_format.left_indent.pt
+            elif not style_properties["left_indent"] is None:
+                para_left_indent = style_properties["left_indent"]
             elif not numbering_left_indent is None:
                 para_left_indent = numbering_left_indent
 
         return para_left_indent
     except Exception as error:
-        print(f"Error while fetching the left indent information from para: {error}")
+        report_getter_error(f"Error while fetching the left indent information from para: {error}")
 
 
-# get para left indentation from numbering_pd
-def get_left_indent_from_numbering_pd(numbering_pd, document_pPr, para_pPr):
-    """ Function to retrieve the left_indent from the numbering_pd
+# get para left indentation from numbering_dict
+def get_left_indent_from_numbering_dict(numbering_dict, style_properties, para_pPr):
+    """ Function to retrieve the left_indent from the numbering_dict
     Args:
-        numbering_pd (pandas DataFrame): Pandas DataFrame representing the numbering.xml file
-        document_pPr (python-docx document object): Python-docx document object
+        numbering_dict (dict): Dictionary representing the numbering.xml file, see create_numbering_dict()
+        style_properties (dict): The resolved style values for the paragraph style, see
+            get_para_style_properties()
         para_pPr (python-docx Paragraph properties object): python-docx Paragraph properties object
     Returns:
         [int]: Integer representing the left_indent for a paragraph, or None if none found
@@ -922,17 +1791,17 @@ def get_left_indent_from_numbering_pd(numbering_pd, document_pPr, para_pPr):
                 # Identify the Level, if any
                 if not para_pPr.numPr.ilvl is None:
                     level = str(para_pPr.numPr.ilvl.val)
-            elif not document_pPr is None:
+            elif not style_properties is None:
                 # Extract out the number id for the list
-                if not document_pPr.numPr is None:
-                    num_id = str(document_pPr.numPr.numId.val)
+                if not style_properties["num_id"] is None:
+                    num_id = style_properties["num_id"]
                     # Identify the Level, if any
-                    if not document_pPr.numPr.ilvl is None:
-                        level = str(document_pPr.numPr.ilvl.val)
+                    if not style_properties["ilvl"] is None:
+                        level = style_properties["ilvl"]
 
-            # Identify the left_indent from the numbering_pd DataFrame
-            numbering_left_indent = get_data_from_numbering_pd(
-                numbering_pd,
+            # Identify the left_indent from the numbering_dict
+            numbering_left_indent = get_data_from_numbering_dict(
+                numbering_dict,
                 num_id, level,
                 column = "level_para_prop_left")
 
@@ -941,119 +1810,99 @@ def get_left_indent_from_numbering_pd(numbering_pd, document_pPr, para_pPr):
                 # para_left_indent = int(numbering_left_indent) / 20
                 #######  this is for testing the project 500200 #####
                 para_left_indent = float(numbering_left_indent) / 20
-            
+
 
         return para_left_indent
     except Exception as error:
-        print(f"Error while fetching the left indent information from list para: {error}")
+        report_getter_error(f"Error while fetching the left indent information from list para: {error}")
 
 
 # get para right indentation
-def get_para_right_indent(document, para):
+def get_para_right_indent(style_dict, para):
     """ Function to find the right indent for a paragraph, default to 0
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object for the current paragraph
     Output:
     - para_right_indent: Number indicating the right indent
     """
     try:
         para_right_indent = 0
-        document_para_style = None
-        # Get the paragraph style
-        para_style = get_para_style(para)
-        # Check the style from the document styles
-        if para_style is not None:
-            document_para_style = document.styles[para_style].paragraph_format.right_indent
 
         if not para is None:
+            # Get the resolved paragraph style
+            style_right_indent = get_para_style_properties(style_dict, para)["right_indent"]
+
             if not para.paragraph_format.right_indent is None:
                 para_right_indent = para.paragraph_format.right_indent.pt
-            elif not para.style.paragraph_format.right_indent is None:
-                para_right_indent = para.style.paragraph_format.right_indent.pt
-            elif not document_para_style is None:
-                para_right_indent = document.styles[para_style].paragraph_format.right_indent.pt
+            elif not style_right_indent is None:
+                para_right_indent = style_right_indent
 
         return para_right_indent
     except Exception as error:
-        print(f"Error while fetching the right indent information from para: {error}")
+        report_getter_error(f"Error while fetching the right indent information from para: {error}")
 
 
 # get para first line indentation
-def get_para_first_line_indent(document, para):
+def get_para_first_line_indent(style_dict, para):
     """ Function to retrieve the first line indent for a paragraph
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: paragraph object for the current paragraph
     Output:
     - first_line_indent: The length of the first line indent, default to 0, expressed in points
     """
     try:
         first_line_indent = 0
-        document_para_style = None
-
-        # Get the paragraph style
-        para_style = get_para_style(para)
-        # Check the style from the document styles
-        if para_style is not None:
-            document_para_style = document.styles[para_style].paragraph_format.first_line_indent
 
         if not para is None:
+            # Get the resolved paragraph style
+            style_first_line_indent = get_para_style_properties(style_dict, para)["first_line_indent"]
+
             if not para.paragraph_format.first_line_indent is None:
                 first_line_indent = para.paragraph_format.first_line_indent.pt
-            elif not para.style.paragraph_format.first_line_indent is None:
-                first_line_indent = para.style.paragraph_format.first_line_indent.pt
-            elif not document_para_style is None:
-                first_line_indent = document.styles[para_style].paragraph_format.first_line_indent.pt
+            elif not style_first_line_indent is None:
+                first_line_indent = style_first_line_indent
 
         return first_line_indent
     except Exception as error:
-            print(f"Error while fetching the right indent information from para: {error}")
+            report_getter_error(f"Error while fetching the right indent information from para: {error}")
 
 
 # get para alignment
-def get_para_alignment(document, para):
+def get_para_alignment(style_dict, para):
     """ Function to identify the alignment of the para
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object in which the alignment is to be identified
     Output:
     - para_alignment: String containing the alignment of the paragraph para, default to "LEFT"
     """
+    import docx
     para_alignment = "left"
 
     if not para is None:
         # Paragraph alignment direct to the paragraph format
         para_format_alignment = para.paragraph_format.alignment
-        # Paragraph alignment direct
-        para_alignment_xml = para.alignment
-        # Paragraph alignment from style
-        para_style_alignment = para.style.paragraph_format.alignment
-        # Document level style default
-        document_para_style = document.styles[get_para_style(para)].paragraph_format.alignment
+        # Paragraph alignment from style, already the XML value
+        para_style_alignment = get_para_style_properties(style_dict, para)["alignment"]
 
         if not para_format_alignment is None:
-            para_alignment = para_format_alignment
-        elif not para_alignment_xml is None:
-            para_alignment = para_alignment_xml
+            # Iterate through the inbuilt python docx values to get the original XML value
+            for class_object in docx.enum.text.WD_PARAGRAPH_ALIGNMENT.__members__:
+                if class_object.value == para_format_alignment:
+                    para_alignment = class_object.xml_value
         elif not para_style_alignment is None:
             para_alignment = para_style_alignment
-        elif not document_para_style is None:
-            para_alignment = document_para_style
-
-        # Iterate through the inbuilt python docx values to get the original XML value
-        for class_object in docx.enum.text.WD_PARAGRAPH_ALIGNMENT.__members__:
-            if class_object.value == para_alignment:
-                para_alignment = class_object.xml_value
 
     return para_alignment
 
 
 # get para line space
-def get_para_line_space(document, para):
+def get_para_line_space(style_dict, para):
     """ Function to identify the line spacing of a paragraph
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object in which the alignment is to be identified
     Output:
     - para_line_space: Numeric indicating the line spacing
@@ -1064,25 +1913,21 @@ def get_para_line_space(document, para):
         # Paragraph alignment direct to the paragraph format
         para_format = para.paragraph_format.line_spacing
         # Paragraph alignment from style
-        para_style = para.style.paragraph_format.line_spacing
-        # Document level style default
-        document_para_style = document.styles[get_para_style(para)].paragraph_format.line_spacing
+        para_style = get_para_style_properties(style_dict, para)["line_spacing"]
 
         if not para_format is None:
             para_line_space = para_format
         elif not para_style is None:
             para_line_space = para_style
-        elif not document_para_style is None:
-            para_line_space = document_para_style
 
     return para_line_space
 
 
 # get space above para
-def get_para_space_above(document, para):
+def get_para_space_above(style_dict, para):
     """ Function to identify the spacing above of a paragraph
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object in which the alignment is to be identified
     Output:
     - para_space_above: Numeric indicating the space above
@@ -1092,26 +1937,22 @@ def get_para_space_above(document, para):
     if not para is None:
         # Paragraph alignment direct to the paragraph format
         para_format = para.paragraph_format.space_before
-        # Paragraph alignment from style
-        para_style = para.style.paragraph_format.space_before
-        # Document level style default
-        document_para_style = document.styles[get_para_style(para)].paragraph_format.space_before
+        # Paragraph alignment from style, already in points
+        para_style = get_para_style_properties(style_dict, para)["space_before"]
 
         if not para_format is None:
             para_space_above = para_format.pt
         elif not para_style is None:
-            para_space_above = para_style.pt
-        elif not document_para_style is None:
-            para_space_above = document_para_style.pt
+            para_space_above = para_style
 
     return para_space_above
 
 
 # get space below para
-def get_para_space_below(document, para):
+def get_para_space_below(style_dict, para):
     """ Function to identify the spacing below of a paragraph
     Input:
-    - document: Python-docx document object
+    - style_dict: Dictionary of the resolved style values, see create_style_dict
     - para: Paragraph object in which the alignment is to be identified
     Output:
     - para_space_below: Numeric indicating the space below
@@ -1121,310 +1962,179 @@ def get_para_space_below(document, para):
     if not para is None:
         # Paragraph alignment direct to the paragraph format
         para_format = para.paragraph_format.space_after
-        # Paragraph alignment from style
-        para_style = para.style.paragraph_format.space_after
-        # Document level style default
-        document_para_style = document.styles[get_para_style(para)].paragraph_format.space_after
+        # Paragraph alignment from style, already in points
+        para_style = get_para_style_properties(style_dict, para)["space_after"]
 
         if not para_format is None:
             para_space_below = para_format.pt
         elif not para_style is None:
-            para_space_below = para_style.pt
-        elif not document_para_style is None:
-            para_space_below = document_para_style.pt
+            para_space_below = para_style
 
     return para_space_below
 
 
-# get para border
-def get_para_border(para_prop_dict, para):
-    """Function to retrieve the Paragraph Border Properties from XML
+# get para border shading
+def get_para_border_shading(para_prop_dict, para):
+    """Function to retrieve the Paragraph Border and Shading Properties from XML. The
+    w:pPr of the paragraph element is read once, the w:pBdr sides and the w:shd are
+    taken from it directly
     Args:
         para_prop_dict (dict): Dictionary results should be appended to
         para (object): Paragraph object from the document object
+    Returns:
+        dict: The para_prop_dict with the ParaBorder* and ParaShading* values added
     """
-    ## Border Values - Top
-    para_prop_dict["ParaBorderTopVal"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}top",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderTopSz"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}top",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sz",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderTopSpace"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}top",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}space",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderTopColor"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}top",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}color",
-        default_value = -1)
-
-    ## Border Values - Left
-    para_prop_dict["ParaBorderLeftVal"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}left",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderLeftSz"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}left",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sz",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderLeftSpace"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}left",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}space",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderLeftColor"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}left",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}color",
-        default_value = -1)
-
-    ## Border Values - Bottom
-    para_prop_dict["ParaBorderBottomVal"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}bottom",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderBottomSz"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}bottom",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sz",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderBottomSpace"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}bottom",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}space",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderBottomColor"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}bottom",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}color",
-        default_value = -1)
-
-    ## Border Values - Right
-    para_prop_dict["ParaBorderRightVal"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}right",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderRightSz"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}right",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sz",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderRightSpace"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}right",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}space",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderRightColor"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}right",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}color",
-        default_value = -1)
-
-    ## Border Values - Between
-    para_prop_dict["ParaBorderBetweenVal"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}between",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderBetweenSz"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}between",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}sz",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderBetweenSpace"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}between",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}space",
-        default_value = 0)
-
-    para_prop_dict["ParaBorderBetweenColor"] = get_xml_attribute(para,
-        tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}between",
-        tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pBdr",
-        tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}color",
-        default_value = -1)
+    # Retrieve the border and shading elements from the paragraph properties
+    para_border = None
+    para_shading = None
+    if not para is None:
+        para_pPr = para._p.pPr
+        if not para_pPr is None:
+            from docx.oxml.ns import qn
+            para_border = para_pPr.find(qn("w:pBdr"))
+            para_shading = para_pPr.find(qn("w:shd"))
 
-    return para_prop_dict
+    return get_border_shading_values(para_prop_dict, para_border, para_shading, not para is None)
 
 
-# get para shading
-def get_para_shading(para_prop_dict, para):
-    """Function to retrieve the Paragraph Shading Properties from XML
+# get border shading values
+def get_border_shading_values(para_prop_dict, para_border, para_shading, include_shading = True):
+    """Function to add the ParaBorder* and ParaShading* values to the para_prop_dict from the
+    w:pBdr and w:shd elements of a paragraph, see get_para_border_shading()
     Args:
         para_prop_dict (dict): Dictionary results should be appended to
-        para (object): Paragraph object from the document object
+        para_border (lxml element): The w:pBdr element of the paragraph, or None
+        para_shading (lxml element): The w:shd element of the paragraph, or None
+        include_shading (bool, optional): When False the ParaShading* values are not added
+    Returns:
+        dict: The para_prop_dict with the ParaBorder* and ParaShading* values added
     """
-    if not para is None:
-        # Get the value of the amount of percent
-        para_prop_dict["ParaShadingVal"] = get_xml_attribute(para,
-            tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}shd",
-            tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pPr",
-            tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}val"
-        )
-
-        # Get the colour of the shading
-        para_prop_dict["ParaShadingColor"] = get_xml_attribute(para,
-            tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}shd",
-            tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pPr",
-            tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}color"
-        )
-
-        # Get the fill of the shading
-        para_prop_dict["ParaShadingFill"] = get_xml_attribute(para,
-            tag_to_find = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}shd",
-            tag_parent = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}pPr",
-            tag_attribute = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}fill"
-        )
+    if not para_border is None or not para_shading is None:
+        from docx.oxml.ns import qn
+    # The border sides and attributes, with the default value if the attribute is not found
+    border_sides = ["top", "left", "bottom", "right", "between"]
+    border_attributes = [("Val", "val", 0), ("Sz", "sz", 0), ("Space", "space", 0), ("Color", "color", -1)]
+    # The shading attributes, with the default value if the attribute is not found
+    shading_attributes = [("Val", "val", 0), ("Color", "color", 0), ("Fill", "fill", 0)]
+
+    ## Border Values - Top, Left, Bottom, Right and Between
+    for border_side in border_sides:
+        border_element = None
+        if not para_border is None:
+            border_element = para_border.find(qn("w:" + border_side))
+
+        for key_name, attribute_name, default_value in border_attributes:
+            key = "ParaBorder" + border_side.capitalize() + key_name
+            para_prop_dict[key] = default_value
+            if not border_element is None:
+                para_prop_dict[key] = border_element.get(qn("w:" + attribute_name), default_value)
+
+    ## Shading Values - the amount of percent, the colour and the fill of the shading
+    if include_shading:
+        for key_name, attribute_name, default_value in shading_attributes:
+            key = "ParaShading" + key_name
+            para_prop_dict[key] = default_value
+            if not para_shading is None:
+                para_prop_dict[key] = para_shading.get(qn("w:" + attribute_name), default_value)
 
     return para_prop_dict
 
 
 # get para single strike
-def get_para_single_strike(para):
+def get_para_single_strike(para, run_values = None):
     """ Function to return if a paragraph is all single striked through
     All runs within the paragraph should the single striked through in order to
     return True. Only runs which have text are considered.
     Args:
         para (python-docx Paragraph): Python-docx paragraph object
+        run_values (dict, optional): The run values for the paragraph, see get_para_run_values()
     Returns:
         boolean: True/False wheather all runs which contain text in the paragraph are
         single striked throug
     """
-    # empty list to store the run strike
-    run_strike = []
-    # iterate over each para runs 
-    for run in para.runs:
-        # check if its not empty
-        if not run.text == "":
-            # append into run strike list
-            run_strike.append(run.font.strike)
+    # the run strike values of the runs which are not empty
+    if run_values is None:
+        run_values = get_para_run_values(None, para)
+    run_strike = run_values["strike"]
 
     return all(run_strike)
 
 
 # get para double strike
-def get_para_double_strike(para):
+def get_para_double_strike(para, run_values = None):
     """ Function to return if a paragraph is all double striked through
     All runs within the paragraph should the double striked through in order to
     return True. Only runs which have text are considered.
     Args:
         para (python-docx Paragraph): Python-docx paragraph object
+        run_values (dict, optional): The run values for the paragraph, see get_para_run_values()
     Returns:
         boolean: True/False wheather all runs which contain text in the paragraph are
         double striked throug
     """
-    # empty list to store the run strike
-    run_strike = []
-    # iterate over each para runs 
-    for run in para.runs:
-        # check if its not empty
-        if not run.text == "":
-            # append into run strike list
-            run_strike.append(run.font.double_strike)
+    # the run strike values of the runs which are not empty
+    if run_values is None:
+        run_values = get_para_run_values(None, para)
+    run_strike = run_values["double_strike"]
 
     return all(run_strike)
 
 
 # get underline para
-def get_para_underline(document, para):
+def get_para_underline(style_dict, para, run_values = None):
     """[summary]
     Args:
-        document (python_docx Document): Python-docx Document object
+        style_dict (dict): A dictionary of the resolved style values, see create_style_dict()
         para (python-docx Paragraph): Python-docx Paragraph object
+        run_values (dict, optional): The run values for the paragraph, see get_para_run_values()
     Returns:
         [str]: String containing the underline value for the paragraph
     """
     # underline empty string as an placeholder
     underline = ""
 
-    # Get the Underline values for each run in the paragraph
-    # empty list to store run values
-    run_values = []
-    # iterate over each para runs
-    for run in para.runs:
-        # check if its not empty 
-        if not run.text == "":
-            # append into run_values list
-            run_values.append(run.font.underline)
-
-    # Check if there is only one run_value
-    if len(run_values) == 1:
-        # If this single value is True, set underline to be Single
-        if run_values[0] is True:
-            underline = "single"
-        else:
-            para_prop_underline = run_values[0]
-            for underline_class in docx.enum.text.WD_UNDERLINE.__members__:
-                if underline_class.value == para_prop_underline:
-                    underline = underline_class.xml_value
+    # Get the Underline values for each run in the paragraph which is not empty,
+    # these are already the XML values
+    if run_values is None:
+        run_values = get_para_run_values(style_dict, para)
+    run_underline_values = run_values["underline"]
+
+    # Check if there is only one run_value, a run which does not set the underline
+    # maps to the INHERITED (None) underline value
+    if len(run_underline_values) == 1:
+        underline = run_underline_values[0]
 
     # If underline is still blank after checking the runs, check the style
     if underline == "":
-        # Get the paragraph style
-        style_underline = None
-        para_style = get_para_style(para)
-
-        # Check the font underline in the document style
-        if para_style is not None:
-            style_underline = document.styles[para_style].font.underline
+        # Check the font underline in the resolved paragraph style, already the XML value
+        style_underline = get_para_style_properties(style_dict, para)["underline"]
 
         # If its not None, then update the return value
         if not style_underline is None:
-            # Iterate throught the UNDERLINE class
-            for underline_class in docx.enum.text.WD_UNDERLINE.__members__:
-                # Check if the display value is equal to the value we have gotten
-                if underline_class.value == style_underline:
-                    # Update the output with the xml value
-                    underline = underline_class.xml_value
+            underline = style_underline
 
     return underline
 
 
 # get para small caption
-def get_para_small_caps(para):
+def get_para_small_caps(para, run_values = None):
     """ Function to identify if the para has small caps enabled
     Args:
         para (python-docx Paragraph): Python-docx Paragraph object
+        run_values (dict, optional): The run values for the paragraph, see get_para_run_values()
     Returns:
         boolean: True/False if the paragraph has small caps enabled
     """
     # define output as placeholder
     output = "No Text"
-    # empty list to store run values
-    run_values = []
-
-    # iterate over para.runs
-    for run in para.runs:
-        if not run.text == "":
-            run_values.append(run.font.small_caps)
+    # the small caps values of the runs which are not empty
+    if run_values is None:
+        run_values = get_para_run_values(None, para)
+    run_small_caps = run_values["small_caps"]
 
     # check if list is not empty
-    if len(run_values) > 0:
-        output = any(run_values)
+    if len(run_small_caps) > 0:
+        output = any(run_small_caps)
 
     return output
 
@@ -1439,33 +2149,17 @@ def create_structured_xml(para_properties_list, c_data_tags):
     Output:
     - para_properties_xml: xml string of the para_properties_list
     """
-    # para properties xml placeholder
+    from lxml import etree
+    # para properties xml placeholder
     para_properties_xml = ""
     try:
         if len(para_properties_list) > 0:
             # Create root element
             root = etree.Element("ArrayOfParagraphProperties")
 
-            # Loop through each dictionary in the list
+            # Loop through each dictionary in the list, appending it to the root
             for para_dict in para_properties_list:
-                # Create a parent node for the sub-child of root
-                parent = etree.SubElement(root, "ParagraphProperties")
-
-                # Loop through each key, value pair in the dictionary
-                for key, value in para_dict.items():
-                    # Check if the value is None, if it is then no text to be added
-                    if value is None:
-                        etree.SubElement(parent, key)
-                    else:
-                        # Condition when there is text to be added for a sub-child of parent
-                        # Check if the current key is of CDATA type
-                        if key in c_data_tags:
-                            etree.SubElement(parent, key).text = etree.CDATA(str(value))
-                        else:
-                            etree.SubElement(parent, key).text = str(value)
-
-                # Append the parent to the root
-                root.append(parent)
+                root.append(create_para_properties_element(para_dict, c_data_tags))
 
         # Convert to a UTF-8 encoded string, and add in the initial xml declaration
         para_properties_xml = etree.tostring(root, xml_declaration = True,
@@ -1475,6 +2169,68 @@ def create_structured_xml(para_properties_list, c_data_tags):
     except Exception as error:
         print(f"Error occured while writing the property extraction into XML: {error}")
 
+
+# write structured xml from an iterable of dict properties
+def write_structured_xml(para_properties_iter, c_data_tags, output):
+    """ Function to write an iterable of dictionary properties into XML incrementally, each
+        ParagraphProperties element is serialised as soon as it is produced so only one
+        paragraph is held in memory at a time
+    Args:
+        para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+            iter_docx_properties()
+        c_data_tags (list): List of strings containing the tags which should be treated as XML CDATA
+        output (str or file-like): Path of the XML file, or a binary file-like object, to write to
+    Returns:
+        [int]: The number of paragraphs written
+    """
+    from lxml import etree
+    para_count = 0
+    with etree.xmlfile(output, encoding = "UTF-8") as xml_file:
+        xml_file.write_declaration()
+        with xml_file.element("ArrayOfParagraphProperties"):
+            for para_dict in para_properties_iter:
+                xml_file.write(create_para_properties_element(para_dict, c_data_tags))
+                para_count += 1
+
+    return para_count
+
+
+# create para properties element
+def create_para_properties_element(para_dict, c_data_tags):
+    """ Function to transform the dictionary properties of a paragraph into a ParagraphProperties element
+    Args:
+        para_dict (dict): Dictionary of the paragraph properties, see create_paragraph_properties()
+        c_data_tags (list): List of strings containing the tags which should be treated as XML CDATA
+    Returns:
+        [lxml Element]: The ParagraphProperties element
+    """
+    from lxml import etree
+    # Create a parent node for the paragraph
+    parent = etree.Element("ParagraphProperties")
+
+    # Loop through each key, value pair in the dictionary
+    for key, value in para_dict.items():
+        # Check if the value is None, if it is then no text to be added
+        if value is None:
+            etree.SubElement(parent, key)
+        else:
+            # Condition when there is text to be added for a sub-child of parent
+            # Check if the current key is of CDATA type
+            if key in c_data_tags:
+                etree.SubElement(parent, key).text = etree.CDATA(str(value))
+            else:
+                etree.SubElement(parent, key).text = str(value)
+
+    return parent
+
 # generate random id
 def gen_id():
-    return str(uuid.uuid4().hex)[0:7].upper()
\ No newline at end of file
+    return str(uuid.uuid4().hex)[0:7].upper()
+
+
+# generate deterministic id
+def gen_deterministic_id(para_id, para_content):
+    """Function to generate a hex id, in the same format as gen_id(), from the position and
+    text of a paragraph so repeated extractions of a document give the same id"""
+    id_source = f"{para_id}\n{para_content or ''}"
+    return hashlib.md5(id_source.encode("UTF-8")).hexdigest()[0:7].upper()
\ No newline at end of file
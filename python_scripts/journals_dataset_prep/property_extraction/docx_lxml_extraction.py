@@ -0,0 +1,929 @@
+""" Module for the lxml engine of the docx property extraction. The docx parts are read from the
+zip and parsed with lxml directly, without the python-docx proxy objects (Paragraph, Run,
+ParagraphFormat, ...), and give the same paragraph properties as docx_extraction"""
+import io
+import os
+import zipfile
+import posixpath
+import logging
+from collections import Counter
+import docx
+from docx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import nsmap, qn
+from docx.oxml.simpletypes import ST_HpsMeasure, ST_SignedTwipsMeasure, ST_TwipsMeasure
+from docx.shared import Length, Pt
+from lxml import etree
+import docx_extraction
+from extraction_stats import call_getter, call_block, report_getter_error
+from formatting_memo import FormattingMemo, get_formatting_signature
+
+# The same parser settings as python-docx, so the parsed trees are the same
+XML_PARSER = etree.XMLParser(remove_blank_text = True, resolve_entities = False)
+
+# The tags used for every paragraph, resolved once
+W_BODY = qn("w:body")
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_R = qn("w:r")
+W_T = qn("w:t")
+W_TAB = qn("w:tab")
+W_BR = qn("w:br")
+W_CR = qn("w:cr")
+W_PPR = qn("w:pPr")
+W_RPR = qn("w:rPr")
+W_PSTYLE = qn("w:pStyle")
+W_RSTYLE = qn("w:rStyle")
+W_VAL = qn("w:val")
+W14_PARA_ID = "{http://schemas.microsoft.com/office/word/2010/wordml}paraId"
+
+
+# open docx parts
+def open_docx_parts(docx_source):
+    """ Function to read and parse the parts of a docx used by the extraction, following the
+        package relationships the same way python-docx does
+    Args:
+        docx_source (str, bytes or file-like): The path to the docx file, the docx as bytes or a
+            binary file-like object
+    Returns:
+        [dict]: A dictionary with the parsed "document", "styles", "numbering" root elements (None
+            if the part is not in the docx) and the list of parsed "themes"
+    """
+    if isinstance(docx_source, (bytes, bytearray)):
+        docx_source = io.BytesIO(docx_source)
+
+    docx_parts = {
+        "document" : None,
+        "styles" : None,
+        "numbering" : None,
+        "themes" : []
+    }
+    with zipfile.ZipFile(docx_source) as docx_zip:
+        # The main document part is the officeDocument relationship of the package
+        package_rels = read_part_relationships(docx_zip, "/")
+        if not RT.OFFICE_DOCUMENT in package_rels:
+            raise KeyError(f"no relationship of type '{RT.OFFICE_DOCUMENT}'")
+        document_partname = package_rels[RT.OFFICE_DOCUMENT]
+
+        content_type = get_part_content_type(docx_zip, document_partname)
+        if content_type != CT.WML_DOCUMENT_MAIN:
+            raise ValueError(f"docx is not a Word file, content type is '{content_type}'")
+        docx_parts["document"] = read_part_xml(docx_zip, document_partname)
+
+        # The styles and numbering are related to the main document part
+        document_rels = read_part_relationships(docx_zip, document_partname)
+        if RT.STYLES in document_rels:
+            docx_parts["styles"] = read_part_xml(docx_zip, document_rels[RT.STYLES])
+        if RT.NUMBERING in document_rels:
+            docx_parts["numbering"] = read_part_xml(docx_zip, document_rels[RT.NUMBERING])
+
+        # Every theme part, as get_theme_data() reads all the parts in word/theme/
+        for zip_name in docx_zip.namelist():
+            if zip_name.startswith("word/theme/") and not "/_rels/" in zip_name:
+                docx_parts["themes"].append(read_part_xml(docx_zip, "/" + zip_name))
+
+    # python-docx falls back to its default styles when the docx has none
+    if docx_parts["styles"] is None:
+        default_styles_path = os.path.join(
+            os.path.dirname(docx.__file__), "templates", "default-styles.xml")
+        with open(default_styles_path, "rb") as default_styles_file:
+            docx_parts["styles"] = etree.fromstring(default_styles_file.read(), XML_PARSER)
+
+    return docx_parts
+
+
+# read part xml
+def read_part_xml(docx_zip, partname):
+    """ Function to parse a part of the docx
+    Args:
+        docx_zip (zipfile.ZipFile): The opened docx zip
+        partname (str): The part name, starting with /
+    Returns:
+        [lxml element]: The root element of the part
+    """
+    return etree.fromstring(docx_zip.read(partname[1:]), XML_PARSER)
+
+
+# read part relationships
+def read_part_relationships(docx_zip, partname):
+    """ Function to read the internal relationships of a part (or of the package for "/")
+    Args:
+        docx_zip (zipfile.ZipFile): The opened docx zip
+        partname (str): The part name, starting with /
+    Returns:
+        [dict]: A dictionary of the target part name keyed on the relationship type, the first
+            relationship wins for a repeated type
+    """
+    part_dir, part_file = posixpath.split(partname)
+    rels_name = posixpath.join(part_dir, "_rels", part_file + ".rels")[1:]
+    relationships = {}
+    if not rels_name in docx_zip.namelist():
+        return relationships
+
+    rels_xml = etree.fromstring(docx_zip.read(rels_name), XML_PARSER)
+    for relationship in rels_xml:
+        if relationship.get("TargetMode") == "External":
+            continue
+        rel_type = relationship.get("Type")
+        if not rel_type in relationships:
+            relationships[rel_type] = posixpath.normpath(
+                posixpath.join(part_dir, relationship.get("Target")))
+
+    return relationships
+
+
+# get part content type
+def get_part_content_type(docx_zip, partname):
+    """ Function to find the content type of a part from [Content_Types].xml
+    Args:
+        docx_zip (zipfile.ZipFile): The opened docx zip
+        partname (str): The part name, starting with /
+    Returns:
+        [str]: The content type of the part, or None if not found
+    """
+    content_types = etree.fromstring(docx_zip.read("[Content_Types].xml"), XML_PARSER)
+    extension = posixpath.splitext(partname)[1][1:].lower()
+    default_content_type = None
+    for content_type in content_types:
+        if content_type.get("PartName", "").lower() == partname.lower():
+            return content_type.get("ContentType")
+        if content_type.get("Extension", "").lower() == extension:
+            default_content_type = content_type.get("ContentType")
+
+    return default_content_type
+
+
+# get theme data
+def get_theme_data(theme_elements):
+    """ Function to create a dictionary containing the major and minor fonts found in theme.xml,
+        see docx_extraction.get_theme_data()
+    Args:
+        theme_elements (list): The parsed theme parts
+    Returns:
+        [dict]: A dictionary containing two keys containing string values, major and minor fonts
+    """
+    output = {
+        "major_font" : "",
+        "minor_font" : ""
+    }
+    for theme_xml in theme_elements:
+        for major_font in theme_xml.xpath("//a:majorFont/a:latin/@typeface", namespaces = nsmap):
+            output["major_font"] = major_font
+
+        for minor_font in theme_xml.xpath("//a:minorFont/a:latin/@typeface", namespaces = nsmap):
+            output["minor_font"] = minor_font
+
+    return output
+
+
+# create style dict
+def create_style_dict(styles_element):
+    """ Function to create the dictionary of the resolved values for each style in styles.xml,
+        see docx_extraction.create_style_dict()
+    Args:
+        styles_element (lxml element): The w:styles root element of styles.xml
+    Returns:
+        [dict]: The resolved style dictionary, see docx_extraction.resolve_style_dict()
+    """
+    # Retrieve the values from the docDefaults, used as the base for every paragraph style
+    doc_defaults_pPr = styles_element.find("/".join([qn("w:docDefaults"), qn("w:pPrDefault"), W_PPR]))
+    doc_defaults_rPr = styles_element.find("/".join([qn("w:docDefaults"), qn("w:rPrDefault"), W_RPR]))
+    doc_defaults = get_ppr_values(doc_defaults_pPr)
+    doc_defaults.update(get_rpr_values(doc_defaults_rPr))
+
+    # Collect the values set directly on each style
+    style_entries = []
+    for style_element in styles_element.iterchildren(qn("w:style")):
+        style_type = style_element.get(qn("w:type"))
+        if not style_type in ("paragraph", "character"):
+            style_type = None
+
+        style_values = get_ppr_values(style_element.find(W_PPR))
+        style_values.update(get_rpr_values(style_element.find(W_RPR)))
+        style_entries.append({
+            "style_id" : style_element.get(qn("w:styleId")),
+            "style_type" : style_type,
+            "default" : get_on_off_value(style_element.get(qn("w:default"))) is True,
+            "based_on" : get_child_val(style_element, qn("w:basedOn")),
+            "name" : get_child_val(style_element, qn("w:name")),
+            "values" : style_values
+        })
+
+    return docx_extraction.resolve_style_dict(doc_defaults, style_entries)
+
+
+# get child val
+def get_child_val(element, tag):
+    """ Function to return the w:val of the first child with the given tag, None if not found """
+    child = element.find(tag)
+    if child is None:
+        return None
+    return child.get(W_VAL)
+
+
+# get on off value
+def get_on_off_value(str_value):
+    """ Function to convert a ST_OnOff attribute to a boolean, None if the attribute is not set """
+    if str_value is None:
+        return None
+    return str_value in ("1", "true", "on")
+
+
+# get ppr values
+def get_ppr_values(pPr):
+    """ Function to retrieve the paragraph formatting values set directly on a w:pPr element,
+        see docx_extraction.get_ppr_values()
+    Args:
+        pPr (lxml element): A w:pPr element, can be None
+    Returns:
+        [dict]: A dictionary of the paragraph formatting values, None where a value is not set
+    """
+    ppr_values = {
+        "left_indent" : None,
+        "right_indent" : None,
+        "first_line_indent" : None,
+        "alignment" : None,
+        "line_spacing" : None,
+        "space_before" : None,
+        "space_after" : None,
+        "num_id" : None,
+        "ilvl" : None
+    }
+
+    if not pPr is None:
+        # Indents in points, a hanging indent is a negative first line indent
+        ind = pPr.find(qn("w:ind"))
+        if not ind is None:
+            if not ind.get(qn("w:left")) is None:
+                ppr_values["left_indent"] = ST_SignedTwipsMeasure.convert_from_xml(ind.get(qn("w:left"))).pt
+            if not ind.get(qn("w:right")) is None:
+                ppr_values["right_indent"] = ST_SignedTwipsMeasure.convert_from_xml(ind.get(qn("w:right"))).pt
+            if not ind.get(qn("w:hanging")) is None:
+                hanging = ST_TwipsMeasure.convert_from_xml(ind.get(qn("w:hanging")))
+                ppr_values["first_line_indent"] = Length(-hanging).pt
+            elif not ind.get(qn("w:firstLine")) is None:
+                ppr_values["first_line_indent"] = ST_TwipsMeasure.convert_from_xml(ind.get(qn("w:firstLine"))).pt
+
+        # Alignment as the original XML value
+        jc = pPr.find(qn("w:jc"))
+        if not jc is None:
+            ppr_values["alignment"] = jc.get(W_VAL)
+
+        # Line spacing is a multiple of lines (auto, the default rule), or a Length for
+        # exact/at least spacing. Spacing above and below in points
+        spacing = pPr.find(qn("w:spacing"))
+        if not spacing is None:
+            if not spacing.get(qn("w:line")) is None:
+                spacing_line = ST_SignedTwipsMeasure.convert_from_xml(spacing.get(qn("w:line")))
+                if spacing.get(qn("w:lineRule")) in (None, "auto"):
+                    ppr_values["line_spacing"] = spacing_line / Pt(12)
+                else:
+                    ppr_values["line_spacing"] = spacing_line
+            if not spacing.get(qn("w:before")) is None:
+                ppr_values["space_before"] = ST_TwipsMeasure.convert_from_xml(spacing.get(qn("w:before"))).pt
+            if not spacing.get(qn("w:after")) is None:
+                ppr_values["space_after"] = ST_TwipsMeasure.convert_from_xml(spacing.get(qn("w:after"))).pt
+
+        # List numbering
+        numPr = pPr.find(qn("w:numPr"))
+        if not numPr is None:
+            if not numPr.find(qn("w:numId")) is None:
+                ppr_values["num_id"] = str(int(get_child_val(numPr, qn("w:numId"))))
+            if not numPr.find(qn("w:ilvl")) is None:
+                ppr_values["ilvl"] = str(int(get_child_val(numPr, qn("w:ilvl"))))
+
+    return ppr_values
+
+
+# get rpr values
+def get_rpr_values(rPr):
+    """ Function to retrieve the character formatting values set directly on a w:rPr element,
+        see docx_extraction.get_rpr_values()
+    Args:
+        rPr (lxml element): A w:rPr element, can be None
+    Returns:
+        [dict]: A dictionary of the character formatting values, None where a value is not set
+    """
+    rpr_values = {
+        "font_name" : None,
+        "font_size" : None,
+        "bold" : None,
+        "italic" : None,
+        "underline" : None,
+        "strike" : None,
+        "double_strike" : None,
+        "small_caps" : None,
+        "vert_align" : None
+    }
+
+    if not rPr is None:
+        rFonts = rPr.find(qn("w:rFonts"))
+        if not rFonts is None:
+            rpr_values["font_name"] = rFonts.get(qn("w:ascii"))
+        sz = rPr.find(qn("w:sz"))
+        if not sz is None:
+            rpr_values["font_size"] = ST_HpsMeasure.convert_from_xml(sz.get(W_VAL)).pt
+        rpr_values["bold"] = get_toggle_value(rPr, qn("w:b"))
+        rpr_values["italic"] = get_toggle_value(rPr, qn("w:i"))
+        # Underline as the original XML value
+        u = rPr.find(qn("w:u"))
+        if not u is None:
+            rpr_values["underline"] = u.get(W_VAL)
+        rpr_values["strike"] = get_toggle_value(rPr, qn("w:strike"))
+        rpr_values["double_strike"] = get_toggle_value(rPr, qn("w:dstrike"))
+        rpr_values["small_caps"] = get_toggle_value(rPr, qn("w:smallCaps"))
+        # Superscript / subscript as the original XML value
+        rpr_values["vert_align"] = get_child_val(rPr, qn("w:vertAlign"))
+
+    return rpr_values
+
+
+# get toggle value
+def get_toggle_value(rPr, tag):
+    """ Function to return the value of a toggle property (w:b, w:i, ...) of a w:rPr, a toggle
+        without w:val is on, None if the toggle is not set """
+    toggle = rPr.find(tag)
+    if toggle is None:
+        return None
+    if toggle.get(W_VAL) is None:
+        return True
+    return get_on_off_value(toggle.get(W_VAL))
+
+
+# iterate over docx properties
+def iter_docx_properties(docx_path, read_only = False, stats = None, record_type = dict, run_properties_list = None):
+    """ Function to extract the properties of a docx as a generator with the lxml engine, see
+        docx_extraction.iter_docx_properties()
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx that should be
+            used for extraction, or the docx as bytes or a binary file-like object
+        read_only (bool, optional): When True empty paragraphs are skipped and paraIds are
+            generated deterministically, see docx_extraction.iter_properties()
+        stats (ExtractionStats, optional): Records the time and exceptions of each block type,
+            see iter_properties()
+        record_type (type, optional): The type each paragraph is created as, see
+            docx_extraction.create_paragraph_properties()
+        run_properties_list (list, optional): When a list, the properties of each run are appended
+            to it, see docx_extraction.create_run_properties()
+    Returns:
+        [generator]: A generator of dictionaries, one for each paragraph
+    """
+    document_element, numbering_dict, theme_dict, style_dict = create_document_object(docx_path)
+
+    logging.info('Extracting the properties of the document')
+    yield from iter_properties(
+        document_element, numbering_dict, theme_dict, style_dict, read_only, stats, record_type,
+        run_properties_list)
+
+
+# create document object
+def create_document_object(docx_path):
+    """ Function to read the parts of a docx for the lxml engine, see
+        docx_extraction.create_document_object()
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx file, or the
+            docx as bytes or a binary file-like object
+    Returns:
+        [lxml element]: The w:document root element of document.xml
+        [dict]: A dictionary representing the numbering.xml, see
+            docx_extraction.create_numbering_dict_from_element()
+        [dict]: A dictionary for the major and minor fonts, see get_theme_data()
+        [dict]: A dictionary of the resolved style values, see create_style_dict()
+    Raises:
+        ValueError: If no path (None or an empty string) is given
+        FileNotFoundError: If the path does not exist
+    """
+    # A missing path is an error, the same as the python-docx engine
+    docx_extraction.check_docx_source(docx_path)
+
+    logging.info('Started reading the docx parts')
+    docx_parts = open_docx_parts(docx_path)
+
+    numbering_dict = None
+    if not docx_parts["numbering"] is None:
+        numbering_dict = docx_extraction.create_numbering_dict_from_element(
+            docx_parts["numbering"], docx_parts["styles"])
+    theme_dict = get_theme_data(docx_parts["themes"])
+    style_dict = create_style_dict(docx_parts["styles"])
+
+    return docx_parts["document"], numbering_dict, theme_dict, style_dict
+
+
+# iterate over docx properties of a document
+def iter_properties(document_element, numbering_dict, theme_dict, style_dict, read_only = False, stats = None,
+                    record_type = dict, run_properties_list = None):
+    """ Function to iterate through the body of document.xml and yield the properties of each
+        paragraph, see docx_extraction.iter_properties()
+    Args:
+        document_element (lxml element): The w:document root element of document.xml
+        numbering_dict (dict): A dictionary representing the numbering.xml
+        theme_dict (dict): A dictionary for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values
+        read_only (bool, optional): When True the document is not modified, see
+            docx_extraction.iter_properties()
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter and
+            block type and the hits of the formatting memo, None (default) to disable the
+            instrumentation, see create_paragraph_properties()
+        record_type (type, optional): The type each paragraph is created as, see
+            docx_extraction.create_paragraph_properties()
+        run_properties_list (list, optional): When a list, the properties of each run are appended
+            to it, see docx_extraction.create_run_properties()
+    Returns:
+        [generator]: A generator of dictionaries which store the information on each paragraph
+    """
+    # The formatting resolved for each signature is kept for the document only
+    formatting_memo = FormattingMemo()
+    block_id = 1
+    for p, block_type in iter_paragraphs(document_element, read_only):
+        yield call_block(
+            stats, block_type, create_paragraph_properties,
+            p, block_id, block_type, numbering_dict, theme_dict, style_dict, read_only, record_type,
+            run_properties_list, formatting_memo, stats)
+        block_id += 1
+
+    if not stats is None:
+        stats.record_formatting_memo(formatting_memo)
+
+
+# iterate over the paragraphs of a document
+def iter_paragraphs(document_element, read_only = False):
+    """ Function to iterate through the w:p elements which are extracted, in the order of their
+        ParaID, with the block type of each paragraph, see docx_extraction.iter_paragraphs()
+    Args:
+        document_element (lxml element): The w:document root element of document.xml
+        read_only (bool, optional): When True the body paragraphs with no text are skipped
+    Returns:
+        [generator]: A generator of (w:p element, block type) tuples
+    """
+    body = document_element.find(W_BODY)
+    if body is None:
+        return
+
+    for block in body.iterchildren(W_P, W_TBL):
+        # Tables are not extracted
+        if block.tag == W_TBL:
+            continue
+
+        if read_only and not get_para_text(block).strip():
+            continue
+
+        # The block type from a single walk of the paragraph, as the python-docx engine
+        block_type = docx_extraction.classify_block(block)
+        if block_type == "text_box_paragraph":
+            for txt_box_para in docx_extraction.get_text_box_paragraphs(block):
+                yield txt_box_para, "text_box_paragraph"
+        else:
+            yield block, block_type
+
+
+# get run text
+def get_run_text(run_element):
+    """ Function to return the text of a w:r, with w:tab as a tab and w:br / w:cr as a new line """
+    run_text = []
+    for child in run_element:
+        tag = child.tag
+        if tag == W_T:
+            if not child.text is None:
+                run_text.append(child.text)
+        elif tag == W_TAB:
+            run_text.append("\t")
+        elif tag == W_BR or tag == W_CR:
+            run_text.append("\n")
+
+    return "".join(run_text)
+
+
+# get para text
+def get_para_text(p):
+    """ Function to return the text of the direct w:r children of a w:p """
+    return "".join(get_run_text(run_element) for run_element in p.iterchildren(W_R))
+
+
+# get para run items
+def get_para_run_items(p):
+    """ Function to return the w:rPr (None if not set) and the text of each direct w:r of a w:p """
+    return [(run_element.find(W_RPR), get_run_text(run_element)) for run_element in p.iterchildren(W_R)]
+
+
+# get para run values
+def get_para_run_values(style_dict, p, collect_runs = False, run_items = None):
+    """ Function to walk the runs of a w:p once and collect the values used by all the run based
+        paragraph properties, see docx_extraction.get_para_run_values()
+    Args:
+        style_dict (dict): A dictionary of the resolved style values
+        p (lxml element): The w:p element
+        collect_runs (bool, optional): When True the values of each run are also kept under "runs",
+            see docx_extraction.create_run_properties()
+        run_items (list, optional): The (w:rPr, text) of each run when they are already read, see
+            create_paragraph_properties()
+    Returns:
+        [dict]: A dictionary containing the paragraph text and a list of values for each run property
+    """
+    run_values = {
+        "text" : "",
+        "font_name" : [],
+        "style_font_name" : [],
+        "font_size" : [],
+        "style_font_size" : [],
+        "bold" : [],
+        "italic" : [],
+        "strike" : [],
+        "double_strike" : [],
+        "underline" : [],
+        "small_caps" : [],
+        "runs" : []
+    }
+    run_texts = []
+
+    if run_items is None:
+        run_items = get_para_run_items(p)
+
+    for rPr, run_text in run_items:
+        run_texts.append(run_text)
+        rpr_values = get_rpr_values(rPr)
+        if collect_runs:
+            run_values["runs"].append((run_text, rpr_values, get_run_style_properties(style_dict, rPr)))
+
+        # Bold is collected from the runs which set it, italic from every run
+        if not rpr_values["bold"] is None:
+            run_values["bold"].append(rpr_values["bold"])
+        run_values["italic"].append(rpr_values["italic"])
+
+        # Font name and size only from the runs which contain text
+        if not run_text == "" and not run_text == "\n":
+            run_values["font_name"].append(rpr_values["font_name"])
+            run_values["font_size"].append(rpr_values["font_size"])
+            run_style_properties = get_run_style_properties(style_dict, rPr)
+            if run_style_properties is not None:
+                run_values["style_font_name"].append(run_style_properties["font_name"])
+                run_values["style_font_size"].append(run_style_properties["font_size"])
+
+        # Strike, underline and small caps from the runs which are not empty
+        if not run_text == "":
+            run_values["strike"].append(rpr_values["strike"])
+            run_values["double_strike"].append(rpr_values["double_strike"])
+            run_values["underline"].append(rpr_values["underline"])
+            run_values["small_caps"].append(rpr_values["small_caps"])
+
+    run_values["text"] = "".join(run_texts)
+
+    return run_values
+
+
+# get run style properties
+def get_run_style_properties(style_dict, rPr):
+    """ Function to retrieve the resolved values of the character style of a run, see
+        docx_extraction.get_run_style_properties()
+    Args:
+        style_dict (dict): A dictionary of the resolved style values
+        rPr (lxml element): The w:rPr of the run, can be None
+    Returns:
+        [dict]: The resolved values of the character style, or None if the document has no
+            default character style
+    """
+    run_style = None
+    if not rPr is None:
+        run_style = get_child_val(rPr, W_RSTYLE)
+    run_style_properties = style_dict["character"].get(run_style)
+    if run_style_properties is None:
+        run_style_properties = style_dict["default_character"]
+
+    return run_style_properties
+
+
+# get para num id level
+def get_para_num_id_level(pPr, para_ppr_values, style_properties):
+    """ Function to return the numId and level of a list paragraph, from the paragraph numPr or
+        else the paragraph style, see docx_extraction.get_para_list_style()
+    Args:
+        pPr (lxml element): The w:pPr of the paragraph, can be None
+        para_ppr_values (dict): The values set directly on the w:pPr, see get_ppr_values()
+        style_properties (dict): The resolved values of the paragraph style
+    Returns:
+        [tuple]: The num_id (-1 when not a list) and the level (0 by default)
+    """
+    num_id = -1
+    level = 0
+    if not pPr is None:
+        if not pPr.find(qn("w:numPr")) is None:
+            # A numPr without a numId is an error in the python-docx engine
+            if para_ppr_values["num_id"] is None:
+                raise ValueError("numPr without numId")
+            num_id = para_ppr_values["num_id"]
+            if not para_ppr_values["ilvl"] is None:
+                level = para_ppr_values["ilvl"]
+        elif not style_properties["num_id"] is None:
+            num_id = style_properties["num_id"]
+            if not style_properties["ilvl"] is None:
+                level = style_properties["ilvl"]
+
+    return num_id, level
+
+
+# create paragraph properties
+def create_paragraph_properties(p, para_id, block_type, numbering_dict, theme_dict, style_dict,
+                                read_only = False, record_type = dict, run_properties_list = None,
+                                formatting_memo = None, stats = None):
+    """ Function to create a paragraph properties dictionary from a w:p element, with the same
+        keys and values as docx_extraction.create_paragraph_properties()
+    Args:
+        p (lxml element): The w:p element
+        para_id (int): Sequential integer indicating the order in which the document block
+            occurs in the document
+        block_type (str): Type of document block, example, paragraph, text_box_paragraph
+        numbering_dict (dict): A dictionary corresponding to numbering.xml
+        theme_dict (dict): A dictionary containing keys for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values
+        read_only (bool, optional): When True the paraId is generated without modifying the
+            paragraph
+        record_type (type, optional): The type the paragraph properties are created as, dict
+            (default) or paragraph_properties.ParagraphProperties
+        run_properties_list (list, optional): When a list, the properties of each run are appended
+            to it, see docx_extraction.create_run_properties()
+        formatting_memo (FormattingMemo, optional): The formatting resolved for the earlier
+            paragraphs of the document, None to resolve it for every paragraph, see formatting_memo
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter, the
+            getters of this engine resolve several properties at once (e.g. get_ppr_values())
+    Returns:
+        dict: Dictionary (or record_type) containing the paragraph properties for the document block
+    """
+    pPr = p.find(W_PPR)
+
+    # The formatting is looked up on the signature of the paragraph, the run values are only
+    # collected when it has to be resolved
+    run_items = None
+    formatting_signature = None
+    formatting_values = None
+    if not formatting_memo is None and run_properties_list is None:
+        run_items = get_para_run_items(p)
+        formatting_signature = get_formatting_signature(pPr, run_items)
+        formatting_values = formatting_memo.get(formatting_signature)
+        para_text = "".join([run_text for rPr, run_text in run_items])
+    if formatting_values is None:
+        run_values = call_getter(
+            stats, get_para_run_values, style_dict, p, not run_properties_list is None, run_items)
+        para_text = run_values["text"]
+
+    para_prop_dict = record_type()
+    para_prop_dict["ParaID"] = para_id
+    para_prop_dict["ParaObjectType"] = block_type
+
+    # Existing paraId, otherwise a deterministic one (read only) or a random one stamped on the w:p
+    para_hex_id = p.get(W14_PARA_ID)
+    if para_hex_id is None:
+        if read_only:
+            para_hex_id = docx_extraction.gen_deterministic_id(para_id, para_text)
+        else:
+            p.set(W14_PARA_ID, docx_extraction.gen_id())
+            para_hex_id = p.get(W14_PARA_ID)
+    para_prop_dict["ParaHexId"] = para_hex_id
+
+    para_prop_dict["ParaCleanedContent"] = docx_extraction.transform_para_content(para_text)
+    para_prop_dict["ParaContent"] = para_text
+
+    # Leading tabs, a paragraph of only tabs is an error (None) in the python-docx engine
+    tab_start = 0
+    if len(para_text) > 0:
+        tab_start = len(para_text) - len(para_text.lstrip("\t"))
+        if tab_start == len(para_text):
+            tab_start = None
+    para_prop_dict["ParaContentTabStart"] = tab_start
+
+    if formatting_values is None:
+        para_prop_dict = set_formatting_properties(
+            para_prop_dict, pPr, run_values, numbering_dict, theme_dict, style_dict, stats)
+        if not formatting_signature is None:
+            formatting_memo.put(formatting_signature, para_prop_dict)
+    else:
+        for key, value in formatting_values:
+            para_prop_dict[key] = value
+
+    # The runs of the paragraph, from the same walk of the runs
+    if not run_properties_list is None:
+        run_properties_list.extend(call_getter(
+            stats, docx_extraction.create_run_properties,
+            para_prop_dict, run_values, get_para_style_properties(style_dict, pPr), theme_dict))
+
+    return para_prop_dict
+
+
+# get para style properties
+def get_para_style_properties(style_dict, pPr, doc_defaults = True):
+    """ Function to retrieve the resolved values of the paragraph style, see
+        docx_extraction.get_para_style_properties()
+    Args:
+        style_dict (dict): A dictionary of the resolved style values
+        pPr (lxml element): The w:pPr of the paragraph, can be None
+        doc_defaults (bool, optional): Include the docDefaults in the values, False for the
+            values set by the style and its basedOn styles only
+    Returns:
+        [dict]: The resolved values of the paragraph style, the default paragraph style if none
+            (or an unknown style) is applied
+    """
+    style_id = None if pPr is None else get_child_val(pPr, W_PSTYLE)
+    if doc_defaults:
+        style_properties = style_dict["paragraph"].get(style_id)
+        if style_properties is None:
+            style_properties = style_dict["default_paragraph"]
+    else:
+        style_properties = style_dict["paragraph_style_only"].get(style_id)
+        if style_properties is None:
+            style_properties = style_dict["default_paragraph_style_only"]
+
+    return style_properties
+
+
+# set formatting properties
+def set_formatting_properties(para_prop_dict, pPr, run_values, numbering_dict, theme_dict, style_dict,
+                              stats = None):
+    """ Function to resolve the formatting properties of a paragraph, every property after
+        ParaContentTabStart, see create_paragraph_properties()
+    Args:
+        para_prop_dict (dict): The paragraph properties the values are added to
+        pPr (lxml element): The w:pPr of the paragraph, can be None
+        run_values (dict): The run values for the paragraph, see get_para_run_values()
+        numbering_dict (dict): A dictionary corresponding to numbering.xml
+        theme_dict (dict): A dictionary containing keys for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values
+        stats (ExtractionStats, optional): Records the time, calls and errors of each getter
+    Returns:
+        dict: The para_prop_dict with the formatting properties added
+    """
+    para_ppr_values = call_getter(stats, get_ppr_values, pPr)
+    style_properties = get_para_style_properties(style_dict, pPr)
+    # The font and toggles check the runs before the docDefaults
+    style_only_properties = get_para_style_properties(style_dict, pPr, False)
+    doc_defaults = style_dict["doc_defaults"]
+
+    para_prop_dict["ParaFontFamily"] = call_getter(
+        stats, get_para_font_family, style_only_properties, theme_dict, run_values, doc_defaults["font_name"])
+    para_prop_dict["ParaBold"] = call_getter(
+        stats, get_para_toggle, style_only_properties["bold"], run_values["bold"], doc_defaults["bold"])
+    para_prop_dict["ParaItalic"] = call_getter(
+        stats, get_para_toggle, style_only_properties["italic"], run_values["italic"], doc_defaults["italic"])
+    para_prop_dict["ParaFontSize"] = call_getter(stats, get_para_font_size, style_properties, run_values)
+    para_prop_dict["ParaStyle"] = style_properties["name"]
+
+    # List style and the list left indent, an error gives None as in the python-docx engine
+    try:
+        num_id, level = call_getter(stats, get_para_num_id_level, pPr, para_ppr_values, style_properties)
+        para_prop_dict["ParaListStyle"] = call_getter(
+            stats, docx_extraction.get_data_from_numbering_dict,
+            numbering_dict, num_id, level, "level_num_format")
+    except Exception as error:
+        report_getter_error(f"Error while fetching the list style information from para: {error}")
+        para_prop_dict["ParaListStyle"] = None
+
+    numbering_left_indent = None
+    try:
+        if not pPr is None:
+            num_id, level = call_getter(stats, get_para_num_id_level, pPr, para_ppr_values, style_properties)
+            numbering_left = call_getter(
+                stats, docx_extraction.get_data_from_numbering_dict,
+                numbering_dict, num_id, level, "level_para_prop_left")
+            if len(str(numbering_left)) > 0:
+                numbering_left_indent = float(numbering_left) / 20
+    except Exception as error:
+        report_getter_error(f"Error while fetching the left indent information from list para: {error}")
+
+    para_left_indent = 0
+    if not para_ppr_values["left_indent"] is None:
+        para_left_indent = para_ppr_values["left_indent"]
+        if not numbering_left_indent is None:
+            para_left_indent -= numbering_left_indent
+    elif not style_properties["left_indent"] is None:
+        para_left_indent = style_properties["left_indent"]
+    elif not numbering_left_indent is None:
+        para_left_indent = numbering_left_indent
+    para_prop_dict["ParaLeftIndent"] = para_left_indent
+
+    # Paragraph formatting, direct values first then the paragraph style
+    for key, value_name, default_value in PARA_FORMAT_KEYS:
+        para_value = default_value
+        if not para_ppr_values[value_name] is None:
+            para_value = para_ppr_values[value_name]
+        elif not style_properties[value_name] is None:
+            para_value = style_properties[value_name]
+        para_prop_dict[key] = para_value
+
+    para_border = None
+    para_shading = None
+    if not pPr is None:
+        para_border = pPr.find(qn("w:pBdr"))
+        para_shading = pPr.find(qn("w:shd"))
+    para_prop_dict = call_getter(
+        stats, docx_extraction.get_border_shading_values, para_prop_dict, para_border, para_shading)
+
+    para_prop_dict["ParaSingleStrike"] = all(run_values["strike"])
+    para_prop_dict["ParaDoubleStrike"] = all(run_values["double_strike"])
+
+    # A single run which does not set the underline is None, otherwise the style underline
+    underline = ""
+    if len(run_values["underline"]) == 1:
+        underline = run_values["underline"][0]
+    if underline == "" and not style_properties["underline"] is None:
+        underline = style_properties["underline"]
+    para_prop_dict["ParaUnderline"] = underline
+
+    para_prop_dict["ParaSmallCaps"] = "No Text"
+    if len(run_values["small_caps"]) > 0:
+        para_prop_dict["ParaSmallCaps"] = any(run_values["small_caps"])
+
+    return para_prop_dict
+
+
+# The paragraph format keys after ParaLeftIndent, the value name and the default value
+PARA_FORMAT_KEYS = [
+    ("ParaRightIndent", "right_indent", 0),
+    ("ParaFirstLineIndent", "first_line_indent", 0),
+    ("ParaAlignment", "alignment", "left"),
+    ("ParaLineSpace", "line_spacing", 1.15),
+    ("ParaAboveSpace", "space_before", 0),
+    ("ParaBelowSpace", "space_after", 0)
+]
+
+
+# get para font family
+def get_para_font_family(style_properties, theme_dict, run_values, doc_defaults_font_name = None):
+    """ Function to retrieve the font family of a paragraph, see
+        docx_extraction.get_para_font_family()
+    Args:
+        style_properties (dict): The resolved values of the paragraph style, without the docDefaults
+        theme_dict (dict): A dictionary containing keys for the major and minor fonts
+        run_values (dict): The run values for the paragraph, see get_para_run_values()
+        doc_defaults_font_name (str, optional): The font of the docDefaults, used after the runs
+    Returns:
+        [str]: The font family identified for the paragraph
+    """
+    font_family = "Default"
+    run_font_values = run_values["font_name"]
+    run_style_font_values = run_values["style_font_name"]
+    para_style_font_name = style_properties["font_name"]
+    para_style = style_properties["name"]
+
+    # Check the theme_dict for a font at theme level
+    theme_font = None
+    if para_style is not None:
+        if para_style.lower().find("heading") >= 0 and "major_font" in theme_dict.keys():
+            theme_font = theme_dict.get("major_font")
+        elif para_style.lower().find("heading") < 0 and "minor_font" in theme_dict.keys():
+            theme_font = theme_dict.get("minor_font")
+
+    if para_style_font_name is None:
+        if all(run_font_value is None for run_font_value in run_style_font_values):
+            if all(run_font_value is None for run_font_value in run_font_values):
+                if not doc_defaults_font_name is None:
+                    font_family = doc_defaults_font_name
+                elif not theme_font is None:
+                    font_family = theme_font
+            else:
+                font_family = Counter(run_font_values).most_common(1)[0][0]
+        else:
+            font_family = Counter(run_style_font_values).most_common(1)[0][0]
+    else:
+        font_family = para_style_font_name
+
+    return font_family
+
+
+# get para toggle
+def get_para_toggle(para_style_value, run_toggle_values, doc_defaults_value = None):
+    """ Function to identify if a paragraph is bold / italic, the paragraph style value is used if
+        set, otherwise every run must be on, see docx_extraction.get_para_bold()
+    Args:
+        para_style_value (bool): The value of the paragraph style, None if not set
+        run_toggle_values (list): The values of the runs
+        doc_defaults_value (bool, optional): The value of the docDefaults, used when no run sets it
+    Returns:
+        [bool]: True/False if the paragraph is bold / italic
+    """
+    if para_style_value is None:
+        if all(run is None for run in run_toggle_values) and not doc_defaults_value is None:
+            return doc_defaults_value
+        return len(run_toggle_values) > 0 and all(run is True for run in run_toggle_values)
+
+    return para_style_value
+
+
+# get para font size
+def get_para_font_size(style_properties, run_values):
+    """ Function to retrieve the font size of a paragraph, see docx_extraction.get_para_font_size()
+    Args:
+        style_properties (dict): The resolved values of the paragraph style
+        run_values (dict): The run values for the paragraph, see get_para_run_values()
+    Returns:
+        [float]: The font size of the paragraph, default to 11
+    """
+    font_size = 11
+    run_font_values = run_values["font_size"]
+    run_style_font_values = run_values["style_font_size"]
+
+    if all(run is None for run in run_font_values):
+        if all(run is None for run in run_style_font_values):
+            if not style_properties["font_size"] is None:
+                font_size = style_properties["font_size"]
+        else:
+            font_size = [size for size in run_style_font_values if not size is None][0]
+    else:
+        font_size = [size for size in run_font_values if not size is None][0]
+
+    return font_size
@@ -0,0 +1,152 @@
+""" Module to check that the lxml engine gives the same paragraph properties XML as the python-docx
+engine, see docx_lxml_extraction. Run on a set of manuscripts before changing either engine:
+
+    python engine_parity.py <docx or folder> [<docx or folder> ...]
+"""
+import os
+import time
+import logging
+import argparse
+import itertools
+from lxml import etree
+import docx_extraction
+from batch_extraction import find_docx_files
+
+# The engines which are compared, the first is the reference
+ENGINES = ["python-docx", "lxml"]
+
+
+# extract with counter ids
+def extract_with_counter_ids(docx_path, read_only, engine):
+    """ Function to extract the properties XML of a docx with the random paraIds replaced by a
+        counter, so both engines give the same ids for the paragraphs without a paraId
+    Args:
+        docx_path (str): String containing the path to the docx
+        read_only (bool): Extract in read only mode, see docx_extraction.iter_properties()
+        engine (str): The extraction engine, see docx_extraction.iter_docx_properties()
+    Returns:
+        [str]: The extracted XML
+        [float]: The extraction time in seconds
+    """
+    id_counter = itertools.count()
+    original_gen_id = docx_extraction.gen_id
+    docx_extraction.gen_id = lambda: "%07X" % next(id_counter)
+    try:
+        start_time = time.perf_counter()
+        para_properties_xml = docx_extraction.extract_docx_properties(docx_path, read_only, engine)
+        elapsed = time.perf_counter() - start_time
+    finally:
+        docx_extraction.gen_id = original_gen_id
+
+    return para_properties_xml, elapsed
+
+
+# find first difference
+def find_first_difference(reference_xml, compared_xml):
+    """ Function to find the first paragraph property which differs between two extractions
+    Args:
+        reference_xml (str): The XML of the reference engine
+        compared_xml (str): The XML of the compared engine
+    Returns:
+        [str]: A description of the first difference, or "" if the XML is identical
+    """
+    if reference_xml == compared_xml:
+        return ""
+
+    reference_paras = list(etree.fromstring(reference_xml.encode("UTF-8")))
+    compared_paras = list(etree.fromstring(compared_xml.encode("UTF-8")))
+    for para_index, (reference_para, compared_para) in enumerate(zip(reference_paras, compared_paras)):
+        for reference_prop, compared_prop in itertools.zip_longest(reference_para, compared_para):
+            if reference_prop is None or compared_prop is None or \
+                reference_prop.tag != compared_prop.tag or reference_prop.text != compared_prop.text:
+                reference_value = None if reference_prop is None else (reference_prop.tag, reference_prop.text)
+                compared_value = None if compared_prop is None else (compared_prop.tag, compared_prop.text)
+                return f"paragraph {para_index + 1}: {reference_value!r} != {compared_value!r}"
+
+    if len(reference_paras) != len(compared_paras):
+        return f"{len(reference_paras)} paragraphs != {len(compared_paras)} paragraphs"
+
+    return "XML differs outside of the paragraph properties"
+
+
+# compare engines
+def compare_engines(docx_path, read_only):
+    """ Function to extract a docx with both engines and compare the XML
+    Args:
+        docx_path (str): String containing the path to the docx
+        read_only (bool): Extract in read only mode, see docx_extraction.iter_properties()
+    Returns:
+        [dict]: A dictionary with the first "difference" ("" if identical), the "errors" of the
+            engines which raised (an error is always a difference, even when both engines raise
+            the same one) and the extraction "seconds" of each engine
+    """
+    outputs = {}
+    seconds = {}
+    errors = {}
+    for engine in ENGINES:
+        try:
+            outputs[engine], seconds[engine] = extract_with_counter_ids(docx_path, read_only, engine)
+        except Exception as error:
+            outputs[engine], seconds[engine] = None, 0.0
+            errors[engine] = f"{type(error).__name__}: {error}"
+
+    difference = ""
+    if len(errors) > 0:
+        difference = "; ".join(f"{engine} raised {error}" for engine, error in errors.items())
+    elif outputs[ENGINES[0]] != outputs[ENGINES[1]]:
+        try:
+            difference = find_first_difference(outputs[ENGINES[0]], outputs[ENGINES[1]])
+        except etree.XMLSyntaxError:
+            difference = f"{outputs[ENGINES[0]][:200]!r} != {outputs[ENGINES[1]][:200]!r}"
+
+    return {
+        "difference" : difference,
+        "errors" : errors,
+        "seconds" : seconds
+    }
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code, 0 if both engines give the same XML for every docx otherwise 1
+    """
+    parser = argparse.ArgumentParser(
+        description = "Check that the lxml engine gives the same properties as the python-docx engine")
+    parser.add_argument("paths", nargs = "+", help = "docx files or folders of docx files")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    docx_files = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            docx_files.extend(find_docx_files(path))
+        else:
+            docx_files.append(path)
+
+    mismatches = 0
+    total_seconds = {engine : 0.0 for engine in ENGINES}
+    for docx_path in docx_files:
+        for read_only in (False, True):
+            result = compare_engines(docx_path, read_only)
+            mode = "read-only" if read_only else "default"
+            for engine in ENGINES:
+                total_seconds[engine] += result["seconds"][engine]
+
+            if result["difference"]:
+                mismatches += 1
+                print(f"DIFF {mode:9} {docx_path}: {result['difference']}")
+            else:
+                print(f"OK   {mode:9} {docx_path}")
+
+    print(f"{len(docx_files)} files, {mismatches} mismatches, " + ", ".join(
+        f"{engine} {seconds:.3f}s" for engine, seconds in total_seconds.items()))
+
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
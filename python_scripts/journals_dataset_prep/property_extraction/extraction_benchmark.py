@@ -0,0 +1,610 @@
+""" Module for benchmarking the docx property extraction on synthetic manuscripts. The generator
+builds docx files with a controlled number of paragraphs, runs per paragraph, styles, multi-level
+lists, text boxes, inline images and tables. The benchmark times extract_docx_properties() end to
+end and each get_para_* function of docx_extraction on its own, for every document shape and size,
+and saves the results as JSON. Compare against a previous run to find regressions:
+
+    python extraction_benchmark.py --output results.json
+    python extraction_benchmark.py --sizes 100 1000 --output new.json --compare results.json
+
+The cold import of docx_extraction is checked against a budget on every run, or on its own:
+
+    python extraction_benchmark.py --import-only
+"""
+import io
+import os
+import sys
+import copy
+import json
+import time
+import zlib
+import struct
+import random
+import inspect
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import docx
+from docx.oxml.ns import qn
+from docx.shared import Pt
+from lxml import etree
+import docx_extraction
+
+# The paragraph counts benchmarked by default
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+# The budget of a cold "import docx_extraction" in a new interpreter, and the modules it must not
+# load, they are only imported by the first extraction
+IMPORT_BUDGET_MS = 50
+IMPORT_DEFERRED_MODULES = ["docx", "lxml", "pandas", "pyarrow"]
+
+# The document shapes, the feature counts are a share of the paragraph count
+DOCUMENT_SHAPES = {
+    "plain" : {
+        "runs_per_paragraph" : 1,
+        "style_count" : 0,
+        "list_share" : 0.0,
+        "list_levels" : 1,
+        "text_box_share" : 0.0,
+        "image_share" : 0.0,
+        "table_share" : 0.0
+    },
+    "styled" : {
+        "runs_per_paragraph" : 4,
+        "style_count" : 8,
+        "list_share" : 0.0,
+        "list_levels" : 1,
+        "text_box_share" : 0.0,
+        "image_share" : 0.0,
+        "table_share" : 0.0
+    },
+    "mixed" : {
+        "runs_per_paragraph" : 3,
+        "style_count" : 8,
+        "list_share" : 0.1,
+        "list_levels" : 3,
+        "text_box_share" : 0.002,
+        "image_share" : 0.01,
+        "table_share" : 0.005
+    }
+}
+
+# The words the paragraph text is made of
+WORDS = ("manuscript journal figure table results method analysis sample data model study "
+         "review author editor reference section abstract introduction discussion").split()
+
+# The number formats of the list levels
+LIST_NUM_FORMATS = ["decimal", "lowerLetter", "lowerRoman", "upperLetter", "upperRoman"]
+
+
+# create png blob
+def create_png_blob(width = 4, height = 4):
+    """ Function to create the bytes of a small grey PNG image, used for the inline images """
+    def create_chunk(chunk_type, chunk_data):
+        chunk = chunk_type + chunk_data
+        return struct.pack(">I", len(chunk_data)) + chunk + struct.pack(">I", zlib.crc32(chunk) & 0xFFFFFFFF)
+
+    raw_rows = b"".join(b"\x00" + b"\x80" * width for row in range(height))
+    return (b"\x89PNG\r\n\x1a\n"
+            + create_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+            + create_chunk(b"IDAT", zlib.compress(raw_rows))
+            + create_chunk(b"IEND", b""))
+
+
+# add multilevel list
+def add_multilevel_list(numbering_element, list_levels):
+    """ Function to add a multi-level decimal/letter/roman list to numbering.xml
+    Args:
+        numbering_element (lxml element): The w:numbering root element
+        list_levels (int): The number of levels of the list
+    Returns:
+        [str]: The numId of the new list
+    """
+    abstract_num_ids = [int(abstract_num.get(qn("w:abstractNumId")))
+                        for abstract_num in numbering_element.iterchildren(qn("w:abstractNum"))]
+    num_ids = [int(num.get(qn("w:numId"))) for num in numbering_element.iterchildren(qn("w:num"))]
+    abstract_num_id = str(max(abstract_num_ids + [-1]) + 1)
+    num_id = str(max(num_ids + [0]) + 1)
+
+    abstract_num = etree.Element(qn("w:abstractNum"))
+    abstract_num.set(qn("w:abstractNumId"), abstract_num_id)
+    etree.SubElement(abstract_num, qn("w:multiLevelType")).set(qn("w:val"), "multilevel")
+    for level in range(list_levels):
+        lvl = etree.SubElement(abstract_num, qn("w:lvl"))
+        lvl.set(qn("w:ilvl"), str(level))
+        etree.SubElement(lvl, qn("w:start")).set(qn("w:val"), "1")
+        etree.SubElement(lvl, qn("w:numFmt")).set(qn("w:val"), LIST_NUM_FORMATS[level % len(LIST_NUM_FORMATS)])
+        etree.SubElement(lvl, qn("w:lvlText")).set(qn("w:val"), f"%{level + 1}.")
+        etree.SubElement(lvl, qn("w:lvlJc")).set(qn("w:val"), "left")
+        ind = etree.SubElement(etree.SubElement(lvl, qn("w:pPr")), qn("w:ind"))
+        ind.set(qn("w:left"), str(720 * (level + 1)))
+        ind.set(qn("w:hanging"), "360")
+
+    # The abstractNum elements come before the num elements
+    first_num = numbering_element.find(qn("w:num"))
+    if first_num is None:
+        numbering_element.append(abstract_num)
+    else:
+        first_num.addprevious(abstract_num)
+
+    num = etree.SubElement(numbering_element, qn("w:num"))
+    num.set(qn("w:numId"), num_id)
+    etree.SubElement(num, qn("w:abstractNumId")).set(qn("w:val"), abstract_num_id)
+
+    return num_id
+
+
+# create synthetic run
+def create_synthetic_run(text, random_generator, character_style_ids):
+    """ Function to create a w:r with random direct and character style formatting """
+    run = etree.Element(qn("w:r"))
+    rPr = etree.SubElement(run, qn("w:rPr"))
+    if character_style_ids and random_generator.random() < 0.2:
+        etree.SubElement(rPr, qn("w:rStyle")).set(qn("w:val"), random_generator.choice(character_style_ids))
+    if random_generator.random() < 0.3:
+        etree.SubElement(rPr, qn("w:rFonts")).set(qn("w:ascii"), random_generator.choice(["Arial", "Cambria", "Times New Roman"]))
+    if random_generator.random() < 0.2:
+        etree.SubElement(rPr, qn("w:b"))
+    if random_generator.random() < 0.2:
+        etree.SubElement(rPr, qn("w:i"))
+    if random_generator.random() < 0.05:
+        etree.SubElement(rPr, qn("w:strike"))
+    if random_generator.random() < 0.05:
+        etree.SubElement(rPr, qn("w:smallCaps"))
+    if random_generator.random() < 0.3:
+        etree.SubElement(rPr, qn("w:sz")).set(qn("w:val"), str(random_generator.choice([18, 20, 22, 24, 28])))
+    if random_generator.random() < 0.1:
+        etree.SubElement(rPr, qn("w:u")).set(qn("w:val"), "single")
+    if len(rPr) == 0:
+        run.remove(rPr)
+
+    text_element = etree.SubElement(run, qn("w:t"))
+    text_element.text = text
+    text_element.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+
+    return run
+
+
+# create synthetic docx
+def create_synthetic_docx(output_path, paragraph_count, runs_per_paragraph = 3, style_count = 0,
+                          list_count = 0, list_levels = 1, text_box_count = 0, image_count = 0,
+                          table_count = 0, seed = 0):
+    """ Function to build a synthetic manuscript, the same arguments always give the same docx
+    Args:
+        output_path (str or file-like): The path of the docx to be written, or a binary file-like object
+        paragraph_count (int): The number of body paragraphs
+        runs_per_paragraph (int, optional): The number of runs in each paragraph
+        style_count (int, optional): The number of custom paragraph styles (and half as many
+            character styles) used by the paragraphs
+        list_count (int, optional): The number of paragraphs in a multi-level list
+        list_levels (int, optional): The number of levels of the list
+        text_box_count (int, optional): The number of paragraphs anchoring a VML text box
+        image_count (int, optional): The number of paragraphs with an inline image
+        table_count (int, optional): The number of 3x3 tables between the paragraphs
+        seed (int, optional): The seed of the random formatting and text
+    Returns:
+        [dict]: The feature counts of the docx
+    """
+    random_generator = random.Random(seed)
+    document = docx.Document()
+    body = document.element.body
+    sect_pr = body.find(qn("w:sectPr"))
+
+    # Custom paragraph styles based on Normal and character styles
+    paragraph_style_ids = []
+    for style_index in range(style_count):
+        style = document.styles.add_style(f"Synthetic Para {style_index}", docx.enum.style.WD_STYLE_TYPE.PARAGRAPH)
+        style.base_style = document.styles["Normal"]
+        style.font.size = Pt(9 + style_index)
+        style.font.bold = style_index % 3 == 0
+        style.paragraph_format.left_indent = Pt(style_index * 6)
+        style.paragraph_format.space_after = Pt(style_index % 4 * 3)
+        paragraph_style_ids.append(style.style_id)
+    character_style_ids = []
+    for style_index in range(style_count // 2):
+        style = document.styles.add_style(f"Synthetic Char {style_index}", docx.enum.style.WD_STYLE_TYPE.CHARACTER)
+        style.font.italic = True
+        style.font.name = "Courier New"
+        character_style_ids.append(style.style_id)
+
+    list_num_id = None
+    if list_count > 0:
+        list_num_id = add_multilevel_list(document.part.numbering_part.element, list_levels)
+
+    # An inline image run, copied into every image paragraph so the image part is shared
+    image_run = None
+    if image_count > 0:
+        image_paragraph = document.add_paragraph()
+        image_paragraph.add_run().add_picture(io.BytesIO(create_png_blob()), width = Pt(24))
+        image_run = image_paragraph._p.find(qn("w:r"))
+        body.remove(image_paragraph._p)
+
+    # A table, copied for every table
+    table_template = None
+    if table_count > 0:
+        table = document.add_table(rows = 3, cols = 3)
+        for cell_index, cell in enumerate(table._cells):
+            cell.text = f"Cell {cell_index}"
+        table_template = table._tbl
+        body.remove(table_template)
+
+    # Spread each feature evenly over the paragraphs
+    def spread(count):
+        if count <= 0:
+            return set()
+        step = paragraph_count / count
+        return set(int(index * step) for index in range(count))
+
+    list_indexes = spread(list_count)
+    text_box_indexes = spread(text_box_count)
+    image_indexes = spread(image_count)
+    table_indexes = spread(table_count)
+
+    for para_index in range(paragraph_count):
+        if para_index in table_indexes:
+            sect_pr.addprevious(copy.deepcopy(table_template))
+
+        p = etree.Element(qn("w:p"))
+        p.set("{http://schemas.microsoft.com/office/word/2010/wordml}paraId", "%08X" % random_generator.getrandbits(31))
+        pPr = etree.SubElement(p, qn("w:pPr"))
+        if paragraph_style_ids and random_generator.random() < 0.7:
+            etree.SubElement(pPr, qn("w:pStyle")).set(qn("w:val"), random_generator.choice(paragraph_style_ids))
+        if para_index in list_indexes:
+            numPr = etree.SubElement(pPr, qn("w:numPr"))
+            etree.SubElement(numPr, qn("w:ilvl")).set(qn("w:val"), str(random_generator.randrange(list_levels)))
+            etree.SubElement(numPr, qn("w:numId")).set(qn("w:val"), list_num_id)
+        if random_generator.random() < 0.2:
+            etree.SubElement(pPr, qn("w:jc")).set(qn("w:val"), random_generator.choice(["center", "right", "both"]))
+        if len(pPr) == 0:
+            p.remove(pPr)
+
+        for run_index in range(runs_per_paragraph):
+            words = [random_generator.choice(WORDS) for word_index in range(random_generator.randint(2, 8))]
+            p.append(create_synthetic_run(" ".join(words) + " ", random_generator, character_style_ids))
+
+        if para_index in image_indexes:
+            p.append(copy.deepcopy(image_run))
+        if para_index in text_box_indexes:
+            p.append(etree.fromstring(
+                f'<w:r xmlns:w="{qn("w:r")[1:].split("}")[0]}" xmlns:v="urn:schemas-microsoft-com:vml">'
+                f'<w:pict><v:shape id="TextBox{para_index}" style="width:120pt;height:40pt">'
+                f'<v:textbox><w:txbxContent><w:p><w:r><w:t>Text box {para_index}</w:t></w:r></w:p>'
+                f'</w:txbxContent></v:textbox></v:shape></w:pict></w:r>'))
+
+        sect_pr.addprevious(p)
+
+    document.save(output_path)
+
+    return {
+        "paragraphs" : paragraph_count,
+        "runs_per_paragraph" : runs_per_paragraph,
+        "styles" : style_count,
+        "list_paragraphs" : len(list_indexes),
+        "list_levels" : list_levels,
+        "text_boxes" : len(text_box_indexes),
+        "images" : len(image_indexes),
+        "tables" : len(table_indexes)
+    }
+
+
+# create shape docx
+def create_shape_docx(output_path, shape_name, paragraph_count, seed = 0):
+    """ Function to build the synthetic docx of a document shape, see DOCUMENT_SHAPES
+    Args:
+        output_path (str): The path of the docx to be written
+        shape_name (str): The name of the document shape
+        paragraph_count (int): The number of body paragraphs
+        seed (int, optional): The seed of the random formatting and text
+    Returns:
+        [dict]: The feature counts of the docx, see create_synthetic_docx()
+    """
+    shape = DOCUMENT_SHAPES[shape_name]
+    return create_synthetic_docx(
+        output_path,
+        paragraph_count,
+        runs_per_paragraph = shape["runs_per_paragraph"],
+        style_count = shape["style_count"],
+        list_count = int(paragraph_count * shape["list_share"]),
+        list_levels = shape["list_levels"],
+        text_box_count = int(paragraph_count * shape["text_box_share"]),
+        image_count = int(paragraph_count * shape["image_share"]),
+        table_count = int(paragraph_count * shape["table_share"]),
+        seed = seed)
+
+
+# time call
+def time_call(function, repeats):
+    """ Function to time a call, the best of the repeats is kept as it is the least affected by
+        other processes
+    Args:
+        function (callable): The function to time, called without arguments
+        repeats (int): The number of times the function is called
+    Returns:
+        [float]: The best time in seconds
+    """
+    best_seconds = None
+    for repeat in range(max(repeats, 1)):
+        start_time = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start_time
+        if best_seconds is None or elapsed < best_seconds:
+            best_seconds = elapsed
+
+    return best_seconds
+
+
+# time import
+def time_import(module_name = "docx_extraction", repeats = 5):
+    """ Function to time a cold import of a module, each repeat in a new interpreter
+    Args:
+        module_name (str, optional): The module imported, from the folder of this module
+        repeats (int, optional): The number of interpreters started, the best time is kept
+    Returns:
+        [float]: The best import time in seconds
+        [list]: The IMPORT_DEFERRED_MODULES loaded by the import
+    """
+    import_code = (
+        "import sys, time\n"
+        "start_time = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start_time\n"
+        f"print(elapsed, *[name for name in {IMPORT_DEFERRED_MODULES!r} if name in sys.modules])\n")
+
+    best_seconds = None
+    loaded_modules = []
+    for repeat in range(max(repeats, 1)):
+        output = subprocess.run(
+            [sys.executable, "-c", import_code],
+            cwd = os.path.dirname(os.path.abspath(__file__)),
+            capture_output = True, text = True, check = True).stdout.split()
+        elapsed = float(output[0])
+        loaded_modules = output[1:]
+        if best_seconds is None or elapsed < best_seconds:
+            best_seconds = elapsed
+
+    return best_seconds, loaded_modules
+
+
+# check import budget
+def check_import_budget(budget_ms = IMPORT_BUDGET_MS, repeats = 5):
+    """ Function to check the cold import of docx_extraction against the budget, see time_import()
+    Args:
+        budget_ms (float, optional): The budget of the import in milliseconds
+        repeats (int, optional): The number of interpreters started, the best time is kept
+    Returns:
+        [bool]: True if the import is within the budget and loads none of IMPORT_DEFERRED_MODULES
+        [float]: The best import time in seconds
+    """
+    seconds, loaded_modules = time_import("docx_extraction", repeats)
+    within_budget = seconds * 1000 <= budget_ms and len(loaded_modules) == 0
+    print(f"{'OK' if within_budget else 'OVER BUDGET'} import docx_extraction: {seconds * 1000:.1f}ms "
+          f"(budget {budget_ms}ms)" + (f", loaded {', '.join(loaded_modules)}" if loaded_modules else ""))
+
+    return within_budget, seconds
+
+
+# get para getters
+def get_para_getters():
+    """ Function to list the get_para_* functions of docx_extraction which are benchmarked
+    Returns:
+        [list]: A sorted list of (name, function) tuples
+    """
+    return sorted(
+        (name, function) for name, function in inspect.getmembers(docx_extraction, inspect.isfunction)
+        if name.startswith("get_para_"))
+
+
+# benchmark para getters
+def benchmark_para_getters(docx_path, repeats):
+    """ Function to time each get_para_* function over all the paragraphs of a docx, the
+        arguments are taken from the parameter names and the run values are computed beforehand
+        as in create_paragraph_properties()
+    Args:
+        docx_path (str): The path of the docx
+        repeats (int): The number of times each function is timed
+    Returns:
+        [dict]: The best time in seconds of each function keyed on the function name
+    """
+    document, numbering_dict, theme_dict, style_dict = docx_extraction.create_document_object(docx_path)
+    paragraphs = [para for para, block_type in docx_extraction.iter_paragraphs(document, read_only = True)]
+    run_values_list = [docx_extraction.get_para_run_values(style_dict, para) for para in paragraphs]
+    context = {
+        "numbering_dict" : numbering_dict,
+        "theme_dict" : theme_dict,
+        "style_dict" : style_dict
+    }
+
+    getter_seconds = {}
+    for name, function in get_para_getters():
+        parameter_names = list(inspect.signature(function).parameters)
+        unknown_parameters = [parameter for parameter in parameter_names
+                              if not parameter in ("para", "run_values", "para_prop_dict")
+                              and not parameter in context
+                              and inspect.signature(function).parameters[parameter].default is inspect.Parameter.empty]
+        if unknown_parameters:
+            logging.warning(f"Skipping {name}, unknown parameters {unknown_parameters}")
+            continue
+
+        def call_getter():
+            for para, run_values in zip(paragraphs, run_values_list):
+                arguments = {}
+                for parameter in parameter_names:
+                    if parameter == "para":
+                        arguments[parameter] = para
+                    elif parameter == "run_values":
+                        arguments[parameter] = run_values
+                    elif parameter == "para_prop_dict":
+                        arguments[parameter] = {}
+                    elif parameter in context:
+                        arguments[parameter] = context[parameter]
+                function(**arguments)
+
+        getter_seconds[name] = time_call(call_getter, repeats)
+
+    return getter_seconds, len(paragraphs)
+
+
+# run benchmarks
+def run_benchmarks(sizes = None, shapes = None, engines = None, repeats = 3, getters = True,
+                   work_dir = None, seed = 0):
+    """ Function to run the benchmarks for every document shape and size
+    Args:
+        sizes (list, optional): The paragraph counts, defaults to DEFAULT_SIZES
+        shapes (list, optional): The document shape names, defaults to all of DOCUMENT_SHAPES
+        engines (list, optional): The extraction engines timed end to end, defaults to both
+        repeats (int, optional): The number of times each benchmark is timed, the best is kept
+        getters (bool, optional): Also time each get_para_* function
+        work_dir (str, optional): The folder of the synthetic docx files, a temporary folder if None
+        seed (int, optional): The seed of the synthetic docx files
+    Returns:
+        [dict]: The environment and the list of results, see main()
+    """
+    sizes = sizes or DEFAULT_SIZES
+    shapes = shapes or list(DOCUMENT_SHAPES)
+    engines = engines or ["python-docx", "lxml"]
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = work_dir or temp_dir
+        os.makedirs(work_dir, exist_ok = True)
+
+        for shape_name in shapes:
+            for size in sizes:
+                docx_path = os.path.join(work_dir, f"synthetic_{shape_name}_{size}_{seed}.docx")
+                features = create_shape_docx(docx_path, shape_name, size, seed)
+                base_result = {
+                    "shape" : shape_name,
+                    "size" : size,
+                    "features" : features,
+                    "docx_bytes" : os.path.getsize(docx_path)
+                }
+                # Large documents are only timed once
+                size_repeats = repeats if size < 10000 else 1
+
+                # The getters print their errors, which are not part of the benchmark
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for engine in engines:
+                        para_count = []
+                        seconds = time_call(
+                            lambda: para_count.append(docx_extraction.extract_docx_properties_to_file(
+                                docx_path, os.devnull, read_only = True, engine = engine)),
+                            size_repeats)
+                        results.append(dict(base_result, benchmark = "extract_docx_properties",
+                                            engine = engine, seconds = seconds,
+                                            paragraphs = para_count[-1]))
+                        logging.info(f"{shape_name} {size}: extract_docx_properties ({engine}) {seconds:.3f}s")
+
+                    if getters:
+                        getter_seconds, para_count = benchmark_para_getters(docx_path, size_repeats)
+                        for name, seconds in getter_seconds.items():
+                            results.append(dict(base_result, benchmark = name, engine = "python-docx",
+                                                seconds = seconds, paragraphs = para_count))
+
+    return {
+        "environment" : {
+            "python" : sys.version.split()[0],
+            "platform" : platform.platform(),
+            "python_docx" : getattr(docx, "__version__", ""),
+            "lxml" : ".".join(str(part) for part in etree.LXML_VERSION),
+            "extractor_version" : docx_extraction.EXTRACTOR_VERSION,
+            "repeats" : repeats,
+            "seed" : seed,
+            "timestamp" : time.strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "results" : results
+    }
+
+
+# compare results
+def compare_results(baseline, current, threshold = 1.2):
+    """ Function to find the benchmarks which are slower than the baseline
+    Args:
+        baseline (dict): The results of the baseline run, see run_benchmarks()
+        current (dict): The results of the current run
+        threshold (float, optional): The ratio of current to baseline time reported as a regression
+    Returns:
+        [list]: A list of (shape, size, benchmark, engine, baseline seconds, current seconds, ratio)
+            for each regression, slowest first
+    """
+    def get_result_key(result):
+        return (result["shape"], result["size"], result["benchmark"], result["engine"])
+
+    baseline_seconds = {get_result_key(result) : result["seconds"] for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = get_result_key(result)
+        if key in baseline_seconds and baseline_seconds[key] > 0:
+            ratio = result["seconds"] / baseline_seconds[key]
+            if ratio > threshold:
+                regressions.append(key + (baseline_seconds[key], result["seconds"], ratio))
+
+    return sorted(regressions, key = lambda regression: regression[-1], reverse = True)
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code, 1 if a regression is found when comparing to a baseline or the
+            import is over its budget
+    """
+    parser = argparse.ArgumentParser(description = "Benchmark the docx property extraction on synthetic manuscripts")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = DEFAULT_SIZES,
+                        help = f"Paragraph counts, defaults to {DEFAULT_SIZES}")
+    parser.add_argument("--shapes", nargs = "+", choices = list(DOCUMENT_SHAPES), default = list(DOCUMENT_SHAPES),
+                        help = "Document shapes, defaults to all")
+    parser.add_argument("--engines", nargs = "+", choices = ["python-docx", "lxml"], default = ["python-docx", "lxml"],
+                        help = "Engines timed end to end, defaults to both")
+    parser.add_argument("--repeats", type = int, default = 3,
+                        help = "Times each benchmark is run below 10000 paragraphs, the best is kept")
+    parser.add_argument("--no-getters", action = "store_false", dest = "getters",
+                        help = "Only time the end to end extraction")
+    parser.add_argument("--work-dir", default = None, help = "Folder to keep the synthetic docx files in")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed of the synthetic docx files")
+    parser.add_argument("--output", default = "extraction_benchmark.json", help = "Path of the JSON results")
+    parser.add_argument("--compare", default = None, help = "JSON results of a baseline run to compare to")
+    parser.add_argument("--threshold", type = float, default = 1.2,
+                        help = "Slowdown ratio reported as a regression, defaults to 1.2")
+    parser.add_argument("--import-budget-ms", type = float, default = IMPORT_BUDGET_MS,
+                        help = f"Budget of a cold import of docx_extraction, defaults to {IMPORT_BUDGET_MS}ms")
+    parser.add_argument("--import-only", action = "store_true",
+                        help = "Only check the import budget")
+    args = parser.parse_args(argv)
+    docx_extraction.configure_logging()
+
+    within_budget, import_seconds = check_import_budget(args.import_budget_ms, args.repeats)
+    if args.import_only:
+        return 0 if within_budget else 1
+
+    benchmark_results = run_benchmarks(
+        args.sizes, args.shapes, args.engines, args.repeats, args.getters, args.work_dir, args.seed)
+    benchmark_results["results"].append({
+        "shape" : "import",
+        "size" : 0,
+        "benchmark" : "import docx_extraction",
+        "engine" : "",
+        "seconds" : import_seconds
+    })
+    with open(args.output, "w", encoding = "UTF-8") as output_file:
+        json.dump(benchmark_results, output_file, indent = 2)
+    logging.info(f"Saved {len(benchmark_results['results'])} results to {args.output}")
+
+    if not args.compare is None:
+        with open(args.compare, "r", encoding = "UTF-8") as baseline_file:
+            regressions = compare_results(json.load(baseline_file), benchmark_results, args.threshold)
+        for shape_name, size, benchmark, engine, baseline_seconds, seconds, ratio in regressions:
+            print(f"REGRESSION {shape_name} {size} {benchmark} ({engine}): "
+                  f"{baseline_seconds:.4f}s -> {seconds:.4f}s ({ratio:.2f}x)")
+        print(f"{len(regressions)} regressions against {args.compare}")
+        return 1 if regressions or not within_budget else 0
+
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
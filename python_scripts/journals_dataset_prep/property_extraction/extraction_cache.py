@@ -0,0 +1,377 @@
+""" Module for a content-addressed on-disk cache of the extracted docx properties. The cache key is a
+hash of the docx parts the extraction reads (document.xml, styles.xml, numbering.xml and the
+theme) with the extractor version and options, so an unchanged manuscript is served from the
+cache whatever its file name or modification time. Entries are evicted least recently used first
+once the cache is over its size limit. Inspect and prune the cache with:
+
+    python extraction_cache.py <cache_dir> stats
+    python extraction_cache.py <cache_dir> prune --max-size-mb 512
+    python extraction_cache.py <cache_dir> clear
+"""
+import io
+import os
+import time
+import shutil
+import hashlib
+import zipfile
+import logging
+import argparse
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from lxml import etree
+import docx_extraction
+from docx_lxml_extraction import read_part_relationships
+
+# The default size limit of the cache
+DEFAULT_CACHE_SIZE_MB = 1024
+
+# The serialised formats which can be cached and their file extension
+CACHE_FORMATS = {
+    "xml" : ".xml",
+    "parquet" : ".parquet"
+}
+
+
+# get cache key
+def get_cache_key(docx_source, read_only, output_format):
+    """ Function to create the cache key of a docx, a sha256 of the parts the extraction reads,
+        the extractor version and the extraction options
+    Args:
+        docx_source (str, bytes or file-like): The path to the docx file, the docx as bytes or a
+            binary file-like object (read from its current position, which is restored)
+        read_only (bool): The read only option of the extraction
+        output_format (str): The serialised format, see CACHE_FORMATS
+    Returns:
+        [str]: The hex digest used as the cache key
+    """
+    key_hash = hashlib.sha256()
+    key_hash.update(f"{docx_extraction.EXTRACTOR_VERSION}\n{bool(read_only)}\n{output_format}\n".encode("UTF-8"))
+
+    start_position = None
+    if isinstance(docx_source, (bytes, bytearray)):
+        docx_source = io.BytesIO(docx_source)
+    elif not isinstance(docx_source, str):
+        start_position = docx_source.tell()
+
+    try:
+        with zipfile.ZipFile(docx_source) as docx_zip:
+            for part_name in get_cached_part_names(docx_zip):
+                part_blob = docx_zip.read(part_name)
+                # The name and length keep the boundaries between the parts in the hash
+                key_hash.update(f"{part_name}\n{len(part_blob)}\n".encode("UTF-8"))
+                key_hash.update(part_blob)
+    finally:
+        if not start_position is None:
+            docx_source.seek(start_position)
+
+    return key_hash.hexdigest()
+
+
+# get cached part names
+def get_cached_part_names(docx_zip):
+    """ Function to list the zip names of the parts the extraction output depends on
+    Args:
+        docx_zip (zipfile.ZipFile): The opened docx zip
+    Returns:
+        [list]: The zip names of the main document, styles, numbering and theme parts
+    """
+    part_names = []
+    package_rels = read_part_relationships(docx_zip, "/")
+    if RT.OFFICE_DOCUMENT in package_rels:
+        document_partname = package_rels[RT.OFFICE_DOCUMENT]
+        part_names.append(document_partname[1:])
+
+        document_rels = read_part_relationships(docx_zip, document_partname)
+        for rel_type in (RT.STYLES, RT.NUMBERING):
+            if rel_type in document_rels:
+                part_names.append(document_rels[rel_type][1:])
+
+    part_names.extend(sorted(
+        zip_name for zip_name in docx_zip.namelist()
+        if zip_name.startswith("word/theme/") and not "/_rels/" in zip_name))
+
+    return part_names
+
+
+# extraction cache
+class ExtractionCache:
+    """ Class for a directory of cached extraction results, one file per entry named after its
+        cache key. The modification time of an entry is updated on every hit and is used as the
+        least recently used order, so several processes can share the same cache directory
+
+    Args:
+        cache_dir (str): The path of the cache directory, created if it does not exist
+        max_size_mb (int, optional): The size limit of the cache in MB, the least recently used
+            entries are removed once it is exceeded
+
+    Attributes:
+        cache_dir (str): The path of the cache directory
+        max_size_bytes (int): The size limit of the cache in bytes
+        size_bytes (int): The size of the cache as last counted plus the entries added since, None
+            until the first entry is added
+    """
+    def __init__(self, cache_dir, max_size_mb = DEFAULT_CACHE_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.size_bytes = None
+        os.makedirs(self.cache_dir, exist_ok = True)
+
+    def get_entry_path(self, cache_key, output_format):
+        """ Function to return the path of a cache entry, sharded on the first two characters """
+        return os.path.join(self.cache_dir, cache_key[:2], cache_key + CACHE_FORMATS[output_format])
+
+    def get(self, cache_key, output_format):
+        """ Function to return the path of a cached entry and mark it as recently used
+        Args:
+            cache_key (str): The cache key, see get_cache_key()
+            output_format (str): The serialised format, see CACHE_FORMATS
+        Returns:
+            [str]: The path of the cached file, or None if the entry is not cached
+        """
+        entry_path = self.get_entry_path(cache_key, output_format)
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+
+        return entry_path
+
+    def put(self, cache_key, output_format, source_path):
+        """ Function to add a serialised result to the cache, the file is copied in under a
+            temporary name and renamed so a reader never sees a partial entry
+        Args:
+            cache_key (str): The cache key, see get_cache_key()
+            output_format (str): The serialised format, see CACHE_FORMATS
+            source_path (str): The path of the serialised result to cache
+        Returns:
+            [str]: The path of the cached file
+        """
+        entry_path = self.get_entry_path(cache_key, output_format)
+        os.makedirs(os.path.dirname(entry_path), exist_ok = True)
+        temp_entry_path = f"{entry_path}.{os.getpid()}.tmp"
+        shutil.copyfile(source_path, temp_entry_path)
+        os.replace(temp_entry_path, entry_path)
+
+        # The cache directory is only walked again once it may be over the size limit
+        if self.size_bytes is None:
+            self.size_bytes = sum(entry[1] for entry in self.iter_entries())
+        else:
+            self.size_bytes += os.path.getsize(entry_path)
+        if self.size_bytes > self.max_size_bytes:
+            self.prune()
+
+        return entry_path
+
+    def iter_entries(self):
+        """ Function to iterate over the cache entries
+        Returns:
+            [generator]: A generator of (path, size in bytes, last used time) for each entry
+        """
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                if file.endswith(".tmp"):
+                    continue
+                entry_path = os.path.join(root, file)
+                try:
+                    entry_stat = os.stat(entry_path)
+                except FileNotFoundError:
+                    continue
+                yield entry_path, entry_stat.st_size, entry_stat.st_mtime
+
+    def prune(self, max_size_bytes = None):
+        """ Function to remove the least recently used entries until the cache fits its size limit
+        Args:
+            max_size_bytes (int, optional): The size limit to prune to, defaults to max_size_bytes
+        Returns:
+            [int]: The number of entries removed
+        """
+        if max_size_bytes is None:
+            max_size_bytes = self.max_size_bytes
+
+        entries = sorted(self.iter_entries(), key = lambda entry: entry[2])
+        total_size = sum(entry[1] for entry in entries)
+        removed_count = 0
+        for entry_path, entry_size, last_used in entries:
+            if total_size <= max_size_bytes:
+                break
+            try:
+                os.remove(entry_path)
+                removed_count += 1
+            except FileNotFoundError:
+                pass
+            total_size -= entry_size
+        self.size_bytes = total_size
+
+        return removed_count
+
+    def clear(self):
+        """ Function to remove every entry of the cache, returns the number of entries removed """
+        return self.prune(max_size_bytes = 0)
+
+    def stats(self):
+        """ Function to summarise the cache
+        Returns:
+            [dict]: The number of entries, total size in MB, size limit in MB and the last used
+                time of the oldest and newest entries
+        """
+        entries = list(self.iter_entries())
+        last_used_times = [entry[2] for entry in entries]
+        return {
+            "cache_dir" : self.cache_dir,
+            "entries" : len(entries),
+            "size_mb" : round(sum(entry[1] for entry in entries) / (1024 * 1024), 3),
+            "max_size_mb" : round(self.max_size_bytes / (1024 * 1024), 3),
+            "oldest_entry" : time.ctime(min(last_used_times)) if entries else "",
+            "newest_entry" : time.ctime(max(last_used_times)) if entries else ""
+        }
+
+
+# extract docx properties to file cached
+def extract_docx_properties_to_file_cached(docx_path, output_path, cache, read_only = False,
+                                           engine = "python-docx", output_format = "xml"):
+    """ Function to extract the properties of a docx into a file through the cache, on a hit the
+        cached result is copied to the output path, on a miss the docx is extracted and the
+        result added to the cache, see docx_extraction.extract_docx_properties_to_file()
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx, or the docx
+            as bytes or a binary file-like object
+        output_path (str): String containing the path of the file to be written
+        cache (ExtractionCache): The cache to use
+        read_only (bool, optional): See docx_extraction.iter_properties()
+        engine (str, optional): The extraction engine, both engines give the same result so it is
+            not part of the cache key
+        output_format (str, optional): "xml" (default) or "parquet"
+    Returns:
+        [int]: The number of paragraphs written to the file
+        [bool]: True if the result came from the cache
+    """
+    if not output_format in CACHE_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}' for the cache, expected 'xml' or 'parquet'")
+
+    # A missing path is not cached, the extraction raises, see docx_extraction.check_docx_source()
+    if docx_path is None or (isinstance(docx_path, str) and not os.path.isfile(docx_path)):
+        para_count = docx_extraction.extract_docx_properties_to_file(
+            docx_path, output_path, read_only, engine, output_format)
+        return para_count, False
+
+    cache_key = get_cache_key(docx_path, read_only, output_format)
+    entry_path = cache.get(cache_key, output_format)
+    if not entry_path is None:
+        shutil.copyfile(entry_path, output_path)
+        return count_result_paragraphs(output_path, output_format), True
+
+    para_count = docx_extraction.extract_docx_properties_to_file(
+        docx_path, output_path, read_only, engine, output_format)
+    cache.put(cache_key, output_format, output_path)
+    return para_count, False
+
+
+# count result paragraphs
+def count_result_paragraphs(result_path, output_format):
+    """ Function to count the paragraphs of a serialised result
+    Args:
+        result_path (str): The path of the XML or Parquet file
+        output_format (str): "xml" or "parquet"
+    Returns:
+        [int]: The number of paragraphs in the file
+    """
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(result_path).metadata.num_rows
+
+    para_count = 0
+    for event, element in etree.iterparse(result_path, tag = "ParagraphProperties"):
+        para_count += 1
+        element.clear()
+
+    return para_count
+
+
+# extract docx properties cached
+def extract_docx_properties_cached(docx_path, cache, read_only = False, engine = "python-docx",
+                                   output_format = "xml"):
+    """ Function to extract the properties of a docx through the cache, see
+        docx_extraction.extract_docx_properties()
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx, or the docx
+            as bytes or a binary file-like object
+        cache (ExtractionCache): The cache to use
+        read_only (bool, optional): See docx_extraction.iter_properties()
+        engine (str, optional): The extraction engine, see docx_extraction.iter_docx_properties()
+        output_format (str, optional): "xml" (default) for the XML string or "arrow" for a
+            pyarrow Table, which is cached as Parquet
+    Returns:
+        [str]: The XML string, or a pyarrow Table when output_format is "arrow"
+    """
+    # The records of ParagraphPropertiesBatch keep values (e.g. "No Text") which the Parquet
+    # columns cannot hold, so only the XML and Arrow results are cached
+    if output_format != "xml" and output_format != "arrow":
+        raise ValueError(f"Unknown output format '{output_format}' for the cache, expected 'xml' or 'arrow'")
+
+    if docx_path is None or (isinstance(docx_path, str) and not os.path.isfile(docx_path)):
+        return docx_extraction.extract_docx_properties(docx_path, read_only, engine, output_format)
+
+    cache_format = "parquet" if output_format == "arrow" else output_format
+    cache_key = get_cache_key(docx_path, read_only, cache_format)
+    entry_path = cache.get(cache_key, cache_format)
+    if not entry_path is None:
+        logging.info(f"Reading the cached properties from {entry_path}")
+        return read_cached_result(entry_path, output_format)
+
+    # Extract into a temporary file next to the entries and add it to the cache
+    temp_output_path = os.path.join(cache.cache_dir, f"{cache_key}.{os.getpid()}.extract.tmp")
+    try:
+        docx_extraction.extract_docx_properties_to_file(
+            docx_path, temp_output_path, read_only, engine, cache_format)
+        cache.put(cache_key, cache_format, temp_output_path)
+        return read_cached_result(temp_output_path, output_format)
+    finally:
+        if os.path.exists(temp_output_path):
+            os.remove(temp_output_path)
+
+
+# read cached result
+def read_cached_result(result_path, output_format):
+    """ Function to read a serialised result, the XML string or a pyarrow Table for "arrow" """
+    if output_format == "arrow":
+        import pyarrow.parquet as pq
+        with open(result_path, "rb") as result_file:
+            return pq.read_table(io.BytesIO(result_file.read()))
+
+    with open(result_path, "r", encoding = "UTF-8") as result_file:
+        return result_file.read()
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code
+    """
+    parser = argparse.ArgumentParser(description = "Inspect and prune the extraction cache")
+    parser.add_argument("cache_dir", help = "The cache directory")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    subparsers.add_parser("stats", help = "Print the number of entries and the size of the cache")
+    prune_parser = subparsers.add_parser("prune", help = "Remove the least recently used entries")
+    prune_parser.add_argument("--max-size-mb", type = float, default = DEFAULT_CACHE_SIZE_MB,
+                              help = f"Size to prune the cache to in MB, defaults to {DEFAULT_CACHE_SIZE_MB}")
+    subparsers.add_parser("clear", help = "Remove every entry of the cache")
+    args = parser.parse_args(argv)
+    docx_extraction.configure_logging()
+
+    cache = ExtractionCache(args.cache_dir)
+    if args.command == "prune":
+        removed_count = cache.prune(int(args.max_size_mb * 1024 * 1024))
+        print(f"Removed {removed_count} entries")
+    elif args.command == "clear":
+        print(f"Removed {cache.clear()} entries")
+
+    for key, value in cache.stats().items():
+        print(f"{key}: {value}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
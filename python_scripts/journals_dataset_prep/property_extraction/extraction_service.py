@@ -0,0 +1,501 @@
+""" Module for a long running local extraction service, so Element Prediction does not pay a new
+interpreter, the imports and the parsing setup for every manuscript. The service keeps a pool of
+warm worker processes and answers over HTTP on localhost or on a Unix socket:
+
+    python extraction_service.py --port 8765 --workers 4
+    curl --data-binary @manuscript.docx "http://127.0.0.1:8765/extract?read_only=1&engine=lxml"
+    curl -H "Content-Type: application/json" -d '{"path": "/data/manuscript.docx"}' http://127.0.0.1:8765/extract
+    curl http://127.0.0.1:8765/health
+    curl http://127.0.0.1:8765/metrics
+
+    python extraction_service.py --socket /tmp/extraction.sock
+    curl --unix-socket /tmp/extraction.sock http://localhost/health
+
+POST /extract takes the docx as the request body, or a JSON body with the "path" of a docx on the
+same machine, and returns the ParagraphProperties XML of extract_docx_properties(). Requests
+above the worker count wait in a bounded queue, a full queue is answered with 503.
+"""
+import os
+import json
+import time
+import shutil
+import signal
+import logging
+import argparse
+import tempfile
+import threading
+import collections
+import socketserver
+import multiprocessing
+import concurrent.futures
+import urllib.parse
+import urllib.request
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import docx_extraction
+from batch_extraction import extract_file
+from extraction_cache import ExtractionCache, DEFAULT_CACHE_SIZE_MB
+
+# The size of the chunks the uploads and the XML are streamed in
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# The number of recent requests the latency percentiles are taken from
+LATENCY_WINDOW = 1000
+
+# The extraction cache of a worker process, see warm_worker()
+WORKER_CACHE = None
+
+
+# warm worker
+def warm_worker(cache_dir = None, cache_size_mb = DEFAULT_CACHE_SIZE_MB):
+    """ Function run once in each worker process when it starts, the python-docx and lxml engines
+        are loaded here so the first request does not pay for them
+    Args:
+        cache_dir (str, optional): The directory of the extraction cache, None for no cache
+        cache_size_mb (float, optional): The size limit of the extraction cache in MB
+    """
+    global WORKER_CACHE
+    # Imported for their load time only, docx_extraction imports them lazily
+    import docx
+    import docx_lxml_extraction
+    docx_extraction.health_check()
+
+    if not cache_dir is None:
+        WORKER_CACHE = ExtractionCache(cache_dir, cache_size_mb)
+
+
+# extract in worker
+def extract_in_worker(docx_path, output_path, read_only = False, engine = "python-docx"):
+    """ Function run in a worker process for a single request, the XML is written to the output
+        path, see batch_extraction.extract_file()
+    Args:
+        docx_path (str): String containing the path to the docx
+        output_path (str): String containing the path of the XML file
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml
+    Returns:
+        [int]: The number of paragraphs extracted
+        [bool]: True if the result came from the cache
+    """
+    return extract_file(docx_path, output_path, "xml", read_only, engine, WORKER_CACHE)
+
+
+# extraction service
+class ExtractionService:
+    """ Class holding the worker pool, the bounded queue and the metrics of the service, shared by
+        the request handler threads
+
+    Args:
+        workers (int, optional): The number of worker processes, defaults to the number of CPUs
+        queue_size (int, optional): The number of requests waiting for a worker before new requests
+            are rejected, defaults to twice the number of workers
+        timeout (float, optional): Seconds a request waits for its extraction, None for no limit
+        spool_dir (str, optional): The directory of the uploaded docx and XML files, a temporary
+            directory if None
+        cache_dir (str, optional): The directory of the extraction cache, None for no cache
+        cache_size_mb (float, optional): The size limit of the extraction cache in MB
+
+    Attributes:
+        workers (int): The number of worker processes
+        queue_size (int): The number of requests waiting for a worker
+        metrics (dict): The request counters, see get_metrics()
+    """
+    def __init__(self, workers = None, queue_size = None, timeout = None, spool_dir = None,
+                 cache_dir = None, cache_size_mb = DEFAULT_CACHE_SIZE_MB):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size if not queue_size is None else 2 * self.workers
+        self.timeout = timeout
+        self.cache_dir = cache_dir
+        self.cache_size_mb = cache_size_mb
+
+        self.temp_dir = None
+        if spool_dir is None:
+            self.temp_dir = tempfile.mkdtemp(prefix = "extraction_service_")
+            spool_dir = self.temp_dir
+        os.makedirs(spool_dir, exist_ok = True)
+        self.spool_dir = spool_dir
+
+        # A slot for each running and queued request, released when the extraction finishes
+        self.request_slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+        self.latencies = collections.deque(maxlen = LATENCY_WINDOW)
+        self.metrics = {
+            "requests" : 0,
+            "succeeded" : 0,
+            "failed" : 0,
+            "rejected" : 0,
+            "timed_out" : 0,
+            "from_cache" : 0,
+            "in_flight" : 0,
+            "paragraphs" : 0,
+            "bytes_received" : 0,
+            "bytes_sent" : 0
+        }
+        self.executor = self.create_executor()
+
+    def create_executor(self):
+        """ Function to start the pool of warm worker processes """
+        # spawn, so the workers do not inherit the listening socket and the handler threads
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers = self.workers,
+            mp_context = multiprocessing.get_context("spawn"),
+            initializer = warm_worker,
+            initargs = (self.cache_dir, self.cache_size_mb))
+
+    def submit(self, docx_path, output_path, read_only, engine):
+        """ Function to queue an extraction on the worker pool
+        Args:
+            docx_path (str): String containing the path to the docx
+            output_path (str): String containing the path of the XML file
+            read_only (bool): Extract without modifying the docx
+            engine (str): The extraction engine, python-docx or lxml
+        Returns:
+            [concurrent.futures.Future]: The future of extract_in_worker(), None if the queue is full
+        """
+        if not self.request_slots.acquire(blocking = False):
+            self.count("rejected")
+            return None
+
+        self.count("in_flight")
+        try:
+            try:
+                future = self.executor.submit(extract_in_worker, docx_path, output_path, read_only, engine)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory), start a new pool and retry once
+                logging.error("The worker pool is broken, starting new workers")
+                with self.lock:
+                    self.executor = self.create_executor()
+                future = self.executor.submit(extract_in_worker, docx_path, output_path, read_only, engine)
+        except Exception:
+            self.release_slot(None)
+            raise
+
+        # The slot is only released when the worker is free again, even if the request timed out
+        future.add_done_callback(self.release_slot)
+        return future
+
+    def release_slot(self, future):
+        """ Function to release the queue slot of a finished extraction """
+        self.count("in_flight", -1)
+        self.request_slots.release()
+
+    def count(self, name, value = 1):
+        """ Function to add to one of the metrics counters """
+        with self.lock:
+            self.metrics[name] += value
+
+    def record_latency(self, seconds):
+        """ Function to record the latency of an answered request """
+        with self.lock:
+            self.latencies.append(seconds)
+
+    def get_metrics(self):
+        """ Function to return the throughput and latency metrics of the service
+        Returns:
+            [dict]: The counters, the uptime, the requests and paragraphs per second and the
+                mean, p50, p95 and max latency in seconds of the recent requests
+        """
+        with self.lock:
+            metrics = dict(self.metrics)
+            latencies = sorted(self.latencies)
+
+        uptime = time.monotonic() - self.start_time
+        metrics["workers"] = self.workers
+        metrics["queue_size"] = self.queue_size
+        metrics["uptime_seconds"] = round(uptime, 3)
+        metrics["requests_per_second"] = round(metrics["succeeded"] / uptime, 3) if uptime > 0 else 0
+        metrics["paragraphs_per_second"] = round(metrics["paragraphs"] / uptime, 3) if uptime > 0 else 0
+        metrics["latency_seconds"] = {
+            "mean" : round(sum(latencies) / len(latencies), 4) if latencies else None,
+            "p50" : round(latencies[int(0.50 * (len(latencies) - 1))], 4) if latencies else None,
+            "p95" : round(latencies[int(0.95 * (len(latencies) - 1))], 4) if latencies else None,
+            "max" : round(latencies[-1], 4) if latencies else None
+        }
+
+        return metrics
+
+    def warm_up(self):
+        """ Function to start every worker process now rather than on the first requests """
+        futures = [self.executor.submit(docx_extraction.health_check) for worker in range(self.workers)]
+        concurrent.futures.wait(futures)
+
+    def close(self):
+        """ Function to stop the workers and remove the temporary spool directory """
+        self.executor.shutdown(wait = True, cancel_futures = True)
+        if not self.temp_dir is None:
+            shutil.rmtree(self.temp_dir, ignore_errors = True)
+
+
+# extraction request handler
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+    """ Class handling the HTTP requests of the service, see the module docstring for the routes """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        service = self.server.service
+        path = urllib.parse.urlparse(self.path).path
+        if path == "/health":
+            self.send_text(200, docx_extraction.health_check())
+        elif path == "/metrics":
+            self.send_text(200, json.dumps(service.get_metrics(), indent = 2), "application/json")
+        else:
+            self.send_text(404, f"Unknown path '{path}'")
+
+    def do_POST(self):
+        service = self.server.service
+        request_url = urllib.parse.urlparse(self.path)
+        if request_url.path != "/extract":
+            self.send_text(404, f"Unknown path '{request_url.path}'")
+            return
+
+        start_time = time.monotonic()
+        service.count("requests")
+        query = urllib.parse.parse_qs(request_url.query)
+        read_only = query.get("read_only", ["0"])[0].lower() in ["1", "true", "yes"]
+        engine = query.get("engine", ["python-docx"])[0]
+
+        upload_path = None
+        output_path = None
+        try:
+            content_length = self.headers.get("Content-Length")
+            if content_length is None:
+                self.send_text(411, "Content-Length is required")
+                return
+            content_length = int(content_length)
+            service.count("bytes_received", content_length)
+
+            # A JSON body names a docx on this machine, anything else is the docx itself
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                request_body = json.loads(self.rfile.read(content_length))
+                docx_path = request_body.get("path", "")
+                read_only = bool(request_body.get("read_only", read_only))
+                engine = request_body.get("engine", engine)
+                if not os.path.isfile(docx_path):
+                    self.send_text(400, f"No docx at '{docx_path}'")
+                    service.count("failed")
+                    return
+            else:
+                upload_path = self.receive_upload(content_length)
+                docx_path = upload_path
+
+            if engine not in ["python-docx", "lxml"]:
+                self.send_text(400, f"Unknown extraction engine '{engine}', expected 'python-docx' or 'lxml'")
+                service.count("failed")
+                return
+
+            output_fd, output_path = tempfile.mkstemp(suffix = ".xml", dir = service.spool_dir)
+            os.close(output_fd)
+            future = service.submit(docx_path, output_path, read_only, engine)
+            if future is None:
+                self.send_text(503, "The extraction queue is full, retry later", retry_after = 1)
+                return
+
+            try:
+                para_count, from_cache = future.result(timeout = service.timeout)
+            except concurrent.futures.TimeoutError:
+                service.count("timed_out")
+                self.send_text(504, f"The extraction took longer than {service.timeout} seconds")
+                # The worker still uses the spool files, they are removed once the extraction finishes
+                for spool_path in [upload_path, output_path]:
+                    if not spool_path is None:
+                        future.add_done_callback(lambda done_future, path = spool_path: remove_file(path))
+                upload_path = None
+                output_path = None
+                return
+
+            self.send_xml(output_path, para_count, from_cache)
+            service.count("succeeded")
+            service.count("paragraphs", para_count)
+            if from_cache:
+                service.count("from_cache")
+            service.record_latency(time.monotonic() - start_time)
+        except Exception as error:
+            service.count("failed")
+            logging.error(f"Error while extracting the request {self.path}: {type(error).__name__}: {error}")
+            self.send_text(500, f"{type(error).__name__}: {error}")
+        finally:
+            if not upload_path is None:
+                remove_file(upload_path)
+            if not output_path is None:
+                remove_file(output_path)
+
+    def receive_upload(self, content_length):
+        """ Function to stream the uploaded docx into a file of the spool directory
+        Args:
+            content_length (int): The size of the request body in bytes
+        Returns:
+            [str]: The path of the uploaded docx
+        """
+        upload_fd, upload_path = tempfile.mkstemp(suffix = ".docx", dir = self.server.service.spool_dir)
+        with os.fdopen(upload_fd, "wb") as upload_file:
+            remaining = content_length
+            while remaining > 0:
+                chunk = self.rfile.read(min(STREAM_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                upload_file.write(chunk)
+                remaining -= len(chunk)
+
+        return upload_path
+
+    def send_xml(self, output_path, para_count, from_cache):
+        """ Function to stream the extracted XML back in chunks, see extract_in_worker() """
+        xml_size = os.path.getsize(output_path)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml; charset=UTF-8")
+        self.send_header("Content-Length", str(xml_size))
+        self.send_header("X-Paragraph-Count", str(para_count))
+        self.send_header("X-From-Cache", "1" if from_cache else "0")
+        self.end_headers()
+        with open(output_path, "rb") as xml_file:
+            shutil.copyfileobj(xml_file, self.wfile, STREAM_CHUNK_SIZE)
+        self.server.service.count("bytes_sent", xml_size)
+
+    def send_text(self, status, text, content_type = "text/plain", retry_after = None):
+        """ Function to send a short text or JSON answer """
+        body = text.encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        if not retry_after is None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # A Unix socket client has no address
+        if isinstance(self.client_address, tuple) and len(self.client_address) > 0:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} {format % args}")
+
+
+# threading unix http server
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Class for the HTTP server on a Unix socket, the same handler as on TCP """
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+# create server
+def create_server(service, host = "127.0.0.1", port = 8765, socket_path = None):
+    """ Function to create the HTTP server of the service, on a TCP port or on a Unix socket
+    Args:
+        service (ExtractionService): The worker pool and metrics of the service
+        host (str, optional): The address listened on, localhost by default
+        port (int, optional): The TCP port, 0 for any free port
+        socket_path (str, optional): The path of a Unix socket used instead of the TCP port
+    Returns:
+        [socketserver.BaseServer]: The server, call serve_forever() to answer the requests
+    """
+    if not socket_path is None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, ExtractionRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), ExtractionRequestHandler)
+        server.daemon_threads = True
+
+    server.service = service
+    return server
+
+
+# remove file
+def remove_file(file_path):
+    """ Function to remove a spool file, missing files are ignored """
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+# stop service
+def stop_service(signum, frame):
+    """ Function to stop the service on SIGTERM (e.g. a container stop) the same as on Ctrl+C """
+    raise KeyboardInterrupt
+
+
+# request extraction
+def request_extraction(service_url, docx_path, read_only = False, engine = "python-docx", timeout = None):
+    """ Function to extract a docx through a running service over HTTP, e.g. from Element Prediction
+    Args:
+        service_url (str): The address of the service, e.g. "http://127.0.0.1:8765"
+        docx_path (str): String containing the path to the docx, uploaded to the service
+        read_only (bool, optional): Extract without modifying the docx, see iter_docx_properties()
+        engine (str, optional): The extraction engine, python-docx or lxml
+        timeout (float, optional): Seconds to wait for the answer
+    Returns:
+        [str]: The ParagraphProperties XML, see docx_extraction.extract_docx_properties()
+    """
+    query = urllib.parse.urlencode({"read_only" : int(read_only), "engine" : engine})
+    with open(docx_path, "rb") as docx_file:
+        request = urllib.request.Request(
+            f"{service_url.rstrip('/')}/extract?{query}",
+            data = docx_file.read(),
+            headers = {"Content-Type" : "application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+            method = "POST")
+
+    with urllib.request.urlopen(request, timeout = timeout) as response:
+        return response.read().decode("UTF-8")
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code
+    """
+    parser = argparse.ArgumentParser(description = "Serve the docx property extraction on localhost")
+    parser.add_argument("--host", default = "127.0.0.1", help = "Address listened on, defaults to 127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8765, help = "TCP port, defaults to 8765")
+    parser.add_argument("--socket", default = None, dest = "socket_path",
+                        help = "Path of a Unix socket to listen on instead of the TCP port")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "Number of warm worker processes, defaults to the number of CPUs")
+    parser.add_argument("--queue-size", type = int, default = None,
+                        help = "Requests waiting for a worker before new ones get 503, defaults to twice the workers")
+    parser.add_argument("--timeout", type = float, default = None,
+                        help = "Seconds a request waits for its extraction before a 504")
+    parser.add_argument("--spool-dir", default = None,
+                        help = "Directory of the uploaded docx and XML files, a temporary directory by default")
+    parser.add_argument("--cache-dir", default = None,
+                        help = "Directory of the extraction cache, see extraction_cache.py")
+    parser.add_argument("--cache-size-mb", type = float, default = DEFAULT_CACHE_SIZE_MB,
+                        help = f"Size limit of the extraction cache in MB, defaults to {DEFAULT_CACHE_SIZE_MB}")
+    args = parser.parse_args(argv)
+    docx_extraction.configure_logging()
+
+    service = ExtractionService(args.workers, args.queue_size, args.timeout, args.spool_dir,
+                                args.cache_dir, args.cache_size_mb)
+    server = create_server(service, args.host, args.port, args.socket_path)
+    signal.signal(signal.SIGTERM, stop_service)
+    try:
+        logging.info(f"Starting {service.workers} workers")
+        service.warm_up()
+        if args.socket_path is None:
+            logging.info(f"Serving the extraction on http://{args.host}:{server.server_address[1]}")
+        else:
+            logging.info(f"Serving the extraction on the Unix socket {args.socket_path}")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if not args.socket_path is None and os.path.exists(args.socket_path):
+            os.remove(args.socket_path)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
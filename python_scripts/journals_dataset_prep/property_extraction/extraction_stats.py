@@ -0,0 +1,162 @@
+""" Module for the opt-in instrumentation of the docx property extraction, the wall time, call
+count and exception count of each property getter and each block type, see
+docx_extraction.create_paragraph_properties()"""
+import time
+import contextvars
+
+# The stats and the getter name of the getter being run, so an error handled inside a getter
+# (see report_getter_error()) is counted against it. A context variable keeps threads and
+# asyncio tasks apart
+ACTIVE_GETTER = contextvars.ContextVar("active_getter", default = None)
+
+
+# extraction stats
+class ExtractionStats:
+    """ Class to collect the instrumentation of one or more extractions, pass an instance as the
+        stats argument of docx_extraction.extract_docx_properties() (or iter_docx_properties(),
+        extract_properties_to_list(), ...) to enable it
+
+    Attributes:
+        getters (dict): For each getter name, the number of "calls", the cumulative "seconds", the
+            "exceptions" raised out of the getter and the "errors" handled inside the getter
+        block_types (dict): For each block type, the number of "paragraphs", the cumulative
+            "seconds" and the "exceptions" raised while creating the paragraph properties
+        documents (int): The number of documents extracted
+        seconds (float): The cumulative wall time of the extractions
+        formatting_memo (dict): The "hits" and "misses" of the formatting memo of the documents,
+            see formatting_memo
+    """
+    def __init__(self):
+        self.getters = {}
+        self.block_types = {}
+        self.documents = 0
+        self.seconds = 0.0
+        self.formatting_memo = {"hits" : 0, "misses" : 0}
+
+    def call_getter(self, getter, /, *args):
+        """ Function to run and time a property getter
+        Args:
+            getter (callable): The property getter, recorded under its function name
+            *args: The arguments of the getter
+        Returns:
+            [object]: The value returned by the getter
+        """
+        getter_entry = self.getters.get(getter.__name__)
+        if getter_entry is None:
+            getter_entry = {"calls" : 0, "seconds" : 0.0, "exceptions" : 0, "errors" : 0}
+            self.getters[getter.__name__] = getter_entry
+
+        token = ACTIVE_GETTER.set(getter_entry)
+        start_time = time.perf_counter()
+        try:
+            return getter(*args)
+        except Exception:
+            getter_entry["exceptions"] += 1
+            raise
+        finally:
+            getter_entry["seconds"] += time.perf_counter() - start_time
+            getter_entry["calls"] += 1
+            ACTIVE_GETTER.reset(token)
+
+    def call_block(self, block_type, create_properties, /, *args, **kwargs):
+        """ Function to run and time the creation of the properties of a paragraph
+        Args:
+            block_type (str): The block type of the paragraph
+            create_properties (callable): The function creating the paragraph properties
+            *args, **kwargs: The arguments of the function
+        Returns:
+            [dict]: The paragraph properties
+        """
+        block_entry = self.block_types.get(block_type)
+        if block_entry is None:
+            block_entry = {"paragraphs" : 0, "seconds" : 0.0, "exceptions" : 0}
+            self.block_types[block_type] = block_entry
+
+        start_time = time.perf_counter()
+        try:
+            return create_properties(*args, **kwargs)
+        except Exception:
+            block_entry["exceptions"] += 1
+            raise
+        finally:
+            block_entry["seconds"] += time.perf_counter() - start_time
+            block_entry["paragraphs"] += 1
+
+    def record_document(self, seconds):
+        """ Function to record the wall time of an extracted document """
+        self.documents += 1
+        self.seconds += seconds
+
+    def record_formatting_memo(self, formatting_memo):
+        """ Function to add the hits and misses of the formatting memo of a document """
+        self.formatting_memo["hits"] += formatting_memo.hits
+        self.formatting_memo["misses"] += formatting_memo.misses
+
+    def as_dict(self):
+        """ Function to return the stats as a dictionary, the getters sorted slowest first """
+        return {
+            "documents" : self.documents,
+            "seconds" : self.seconds,
+            "getters" : dict(sorted(self.getters.items(), key = lambda item: item[1]["seconds"], reverse = True)),
+            "block_types" : dict(self.block_types),
+            "formatting_memo" : dict(self.formatting_memo)
+        }
+
+    def format_summary(self, getter_count = 5):
+        """ Function to format the stats as a single log line, with the slowest getters
+        Args:
+            getter_count (int, optional): The number of getters included
+        Returns:
+            [str]: The summary line
+        """
+        stats_dict = self.as_dict()
+        block_summary = ", ".join(
+            f"{block_type} {entry['paragraphs']} ({entry['seconds']:.3f}s, {entry['exceptions']} exceptions)"
+            for block_type, entry in stats_dict["block_types"].items())
+        getter_summary = ", ".join(
+            f"{name} {entry['seconds']:.3f}s/{entry['calls']} calls"
+            + (f"/{entry['errors']} errors" if entry["errors"] else "")
+            + (f"/{entry['exceptions']} exceptions" if entry["exceptions"] else "")
+            for name, entry in list(stats_dict["getters"].items())[:getter_count])
+        memo_summary = f"{stats_dict['formatting_memo']['hits']} hits/{stats_dict['formatting_memo']['misses']} misses"
+        return (f"Extraction stats: {stats_dict['documents']} documents in {stats_dict['seconds']:.3f}s; "
+                f"block types: {block_summary or 'none'}; slowest getters: {getter_summary or 'none'}; "
+                f"formatting memo: {memo_summary}")
+
+
+# call getter
+def call_getter(stats, getter, /, *args):
+    """ Function to run a property getter, timed when the stats are enabled
+    Args:
+        stats (ExtractionStats): The stats to record to, None when disabled
+        getter (callable): The property getter
+        *args: The arguments of the getter
+    Returns:
+        [object]: The value returned by the getter
+    """
+    if stats is None:
+        return getter(*args)
+    return stats.call_getter(getter, *args)
+
+
+# call block
+def call_block(stats, block_type, create_properties, /, *args, **kwargs):
+    """ Function to create the properties of a paragraph, timed when the stats are enabled, see
+        ExtractionStats.call_block()
+    """
+    if stats is None:
+        return create_properties(*args, **kwargs)
+    return stats.call_block(block_type, create_properties, *args, **kwargs)
+
+
+# report getter error
+def report_getter_error(message):
+    """ Function to print an error handled inside a property getter, and count it against the
+        getter when the stats are enabled
+    Args:
+        message (str): The error message
+    """
+    print(message)
+    getter_entry = ACTIVE_GETTER.get()
+    if not getter_entry is None:
+        getter_entry["errors"] += 1
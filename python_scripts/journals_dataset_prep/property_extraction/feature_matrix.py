@@ -0,0 +1,311 @@
+""" Module for exporting the paragraph properties as NumPy feature matrices for the Element
+Prediction models, straight from the Arrow output (see properties_table and corpus_dataset) rather
+than by parsing the XML / CSV again. Numeric properties become a float matrix and categorical
+properties an integer matrix, encoded against a vocabulary saved as JSON next to the model:
+
+    python feature_matrix.py <dataset folder> features.npz --vocabulary vocabulary.json --fit
+
+Code 0 of every categorical feature is a missing or unknown value, so a vocabulary fitted on the
+training data encodes any later document without new columns"""
+import os
+import json
+import logging
+import argparse
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from docx_extraction import EXTRACTOR_VERSION, configure_logging, extract_docx_properties
+from property_labels import CLASSNAME_COLUMN
+
+# The properties encoded as float features, the booleans are 1.0 / 0.0 and a missing value is NaN
+NUMERIC_FEATURES = [
+    "ParaContentTabStart",
+    "ParaFontSize",
+    "ParaLeftIndent",
+    "ParaRightIndent",
+    "ParaFirstLineIndent",
+    "ParaLineSpace",
+    "ParaAboveSpace",
+    "ParaBelowSpace",
+    "ParaBold",
+    "ParaItalic",
+    "ParaSingleStrike",
+    "ParaDoubleStrike",
+    "ParaSmallCaps"
+] + [f"ParaBorder{border_side}{key_name}"
+     for border_side in ["Top", "Left", "Bottom", "Right", "Between"]
+     for key_name in ["Sz", "Space"]]
+
+# The properties encoded as integer codes against the vocabulary
+CATEGORICAL_FEATURES = [
+    "ParaObjectType",
+    "ParaFontFamily",
+    "ParaStyle",
+    "ParaListStyle",
+    "ParaAlignment",
+    "ParaUnderline",
+    "ParaShadingVal"
+] + [f"ParaBorder{border_side}Val" for border_side in ["Top", "Left", "Bottom", "Right", "Between"]]
+
+
+# feature vocabulary
+class FeatureVocabulary:
+    """ Class for the values of each categorical feature (and of the classname label), a value is
+        encoded as its position in the list plus one. Values are only ever appended, so the codes
+        given by an earlier version of the vocabulary stay the same
+
+    Args:
+        categories (dict, optional): The list of values of each feature, empty by default
+        version (int, optional): The version of the vocabulary, increased by fit() whenever
+            values are added
+        extractor_version (str, optional): The EXTRACTOR_VERSION of the properties the
+            vocabulary was fitted on
+
+    Attributes:
+        categories (dict): The list of values of each feature
+        version (int): The version of the vocabulary
+        extractor_version (str): The EXTRACTOR_VERSION the vocabulary was fitted on
+    """
+    def __init__(self, categories = None, version = 0, extractor_version = EXTRACTOR_VERSION):
+        self.categories = {feature_name : [] for feature_name in CATEGORICAL_FEATURES + [CLASSNAME_COLUMN]}
+        if not categories is None:
+            self.categories.update({feature_name : list(values) for feature_name, values in categories.items()})
+        self.version = version
+        self.extractor_version = extractor_version
+
+    def fit(self, para_table):
+        """ Function to add the values of a table which are not in the vocabulary yet
+        Args:
+            para_table (pyarrow.Table or pyarrow.RecordBatch): The paragraph properties, see
+                properties_table.create_properties_table()
+        Returns:
+            [int]: The number of values added
+        """
+        added_count = 0
+        for feature_name, values in self.categories.items():
+            if para_table.schema.get_field_index(feature_name) < 0:
+                continue
+            known_values = set(values)
+            column_values = pc.unique(para_table.column(feature_name).cast(pa.string())).to_pylist()
+            new_values = sorted(value for value in column_values if not value is None and not value in known_values)
+            values.extend(new_values)
+            added_count += len(new_values)
+
+        if added_count > 0:
+            self.version += 1
+            self.extractor_version = EXTRACTOR_VERSION
+
+        return added_count
+
+    def encode(self, column, feature_name):
+        """ Function to encode a column against the values of a feature
+        Args:
+            column (pyarrow Array or ChunkedArray): The values to encode
+            feature_name (str): The feature, see CATEGORICAL_FEATURES
+        Returns:
+            [numpy.ndarray]: The int32 codes, 0 for a missing or unknown value
+        """
+        value_set = pa.array(self.categories[feature_name], type = pa.string())
+        codes = pc.index_in(column.cast(pa.string()), value_set = value_set)
+        return pc.fill_null(pc.add(codes, 1), 0).to_numpy().astype(np.int32)
+
+    def as_dict(self):
+        """ Function to return the vocabulary as a dictionary, see save() """
+        return {
+            "version" : self.version,
+            "extractor_version" : self.extractor_version,
+            "categories" : self.categories
+        }
+
+    def save(self, vocabulary_path):
+        """ Function to write the vocabulary into a JSON file, under a temporary name first so
+            a model never loads a partial vocabulary """
+        temp_vocabulary_path = vocabulary_path + ".tmp"
+        with open(temp_vocabulary_path, "w", encoding = "utf-8") as vocabulary_file:
+            json.dump(self.as_dict(), vocabulary_file, indent = 2)
+        os.replace(temp_vocabulary_path, vocabulary_path)
+
+    @classmethod
+    def load(cls, vocabulary_path):
+        """ Function to read a vocabulary written by save(), a warning is logged when it was
+            fitted on properties of another EXTRACTOR_VERSION
+        Args:
+            vocabulary_path (str): The path of the JSON file
+        Returns:
+            [FeatureVocabulary]: The vocabulary
+        """
+        with open(vocabulary_path, encoding = "utf-8") as vocabulary_file:
+            vocabulary_dict = json.load(vocabulary_file)
+
+        vocabulary = cls(vocabulary_dict["categories"], vocabulary_dict["version"], vocabulary_dict["extractor_version"])
+        if vocabulary.extractor_version != EXTRACTOR_VERSION:
+            logging.warning(
+                f"The vocabulary {vocabulary_path} was fitted on extractor version "
+                f"{vocabulary.extractor_version}, the properties are extracted with {EXTRACTOR_VERSION}")
+
+        return vocabulary
+
+
+# create numeric matrix
+def create_numeric_matrix(para_table):
+    """ Function to create the float matrix of the NUMERIC_FEATURES, one row per paragraph
+    Args:
+        para_table (pyarrow.Table or pyarrow.RecordBatch): The paragraph properties
+    Returns:
+        [numpy.ndarray]: A float64 matrix of shape (paragraphs, NUMERIC_FEATURES), NaN where a
+            value is missing
+    """
+    numeric_matrix = np.empty((para_table.num_rows, len(NUMERIC_FEATURES)), dtype = np.float64)
+    for feature_index, feature_name in enumerate(NUMERIC_FEATURES):
+        numeric_matrix[:, feature_index] = pc.fill_null(
+            para_table.column(feature_name).cast(pa.float64()), np.nan).to_numpy()
+
+    return numeric_matrix
+
+
+# create categorical matrix
+def create_categorical_matrix(para_table, vocabulary):
+    """ Function to create the integer matrix of the CATEGORICAL_FEATURES, one row per paragraph
+    Args:
+        para_table (pyarrow.Table or pyarrow.RecordBatch): The paragraph properties
+        vocabulary (FeatureVocabulary): The vocabulary the values are encoded against
+    Returns:
+        [numpy.ndarray]: An int32 matrix of shape (paragraphs, CATEGORICAL_FEATURES)
+    """
+    categorical_matrix = np.empty((para_table.num_rows, len(CATEGORICAL_FEATURES)), dtype = np.int32)
+    for feature_index, feature_name in enumerate(CATEGORICAL_FEATURES):
+        categorical_matrix[:, feature_index] = vocabulary.encode(para_table.column(feature_name), feature_name)
+
+    return categorical_matrix
+
+
+# create feature matrix
+def create_feature_matrix(para_table, vocabulary):
+    """ Function to create the feature matrices of a table of paragraph properties
+    Args:
+        para_table (pyarrow.Table or pyarrow.RecordBatch): The paragraph properties, e.g. from
+            extract_docx_properties(output_format = "arrow") or corpus_dataset.read_corpus_dataset()
+        vocabulary (FeatureVocabulary): The vocabulary the categorical values are encoded against
+    Returns:
+        [dict]: The "numeric" float64 matrix and the "categorical" int32 matrix (see
+            create_numeric_matrix() and create_categorical_matrix()), the int32 "labels" (empty
+            when the table has no classname column) and the "vocabulary_version"
+    """
+    labels = np.empty(0, dtype = np.int32)
+    if para_table.schema.get_field_index(CLASSNAME_COLUMN) >= 0:
+        labels = vocabulary.encode(para_table.column(CLASSNAME_COLUMN), CLASSNAME_COLUMN)
+
+    return {
+        "numeric" : create_numeric_matrix(para_table),
+        "categorical" : create_categorical_matrix(para_table, vocabulary),
+        "labels" : labels,
+        "vocabulary_version" : vocabulary.version
+    }
+
+
+# create one hot matrix
+def create_one_hot_matrix(categorical_matrix, vocabulary):
+    """ Function to create the sparse one hot encoding of a categorical matrix in CSR form, e.g.
+        for scipy.sparse.csr_matrix((data, indices, indptr), shape = shape). Each feature has a
+        column per vocabulary value plus one for the missing / unknown code
+    Args:
+        categorical_matrix (numpy.ndarray): The int32 codes, see create_categorical_matrix()
+        vocabulary (FeatureVocabulary): The vocabulary the codes were encoded against
+    Returns:
+        [dict]: The CSR "data", "indices" and "indptr" arrays and the "shape" of the matrix
+    """
+    feature_widths = np.array(
+        [len(vocabulary.categories[feature_name]) + 1 for feature_name in CATEGORICAL_FEATURES], dtype = np.int64)
+    feature_offsets = np.concatenate([[0], np.cumsum(feature_widths)[:-1]])
+    row_count, feature_count = categorical_matrix.shape
+
+    # Every row has exactly one value for each feature
+    return {
+        "data" : np.ones(row_count * feature_count, dtype = np.float32),
+        "indices" : (categorical_matrix + feature_offsets).ravel(),
+        "indptr" : np.arange(0, row_count * feature_count + 1, feature_count, dtype = np.int64),
+        "shape" : (row_count, int(feature_widths.sum()))
+    }
+
+
+# extract docx features
+def extract_docx_features(docx_path, vocabulary, read_only = False, engine = "python-docx"):
+    """ Function to extract the feature matrices of a docx, for the inference of a single document
+    Args:
+        docx_path (str, bytes or file-like): The docx, see docx_extraction.extract_docx_properties()
+        vocabulary (FeatureVocabulary): The vocabulary the categorical values are encoded against
+        read_only (bool, optional): Extract without modifying the docx
+        engine (str, optional): The extraction engine, python-docx or lxml
+    Returns:
+        [dict]: The feature matrices, see create_feature_matrix()
+    """
+    para_table = extract_docx_properties(docx_path, read_only, engine, output_format = "arrow")
+    return create_feature_matrix(para_table, vocabulary)
+
+
+# save feature matrix
+def save_feature_matrix(feature_matrix, output_path):
+    """ Function to write the feature matrices into a NumPy .npz file with the feature names,
+        under a temporary name first so a partial file is never left behind
+    Args:
+        feature_matrix (dict): The feature matrices, see create_feature_matrix()
+        output_path (str): The path of the .npz file
+    """
+    temp_output_path = output_path + ".tmp"
+    with open(temp_output_path, "wb") as output_file:
+        np.savez(
+            output_file,
+            numeric = feature_matrix["numeric"],
+            categorical = feature_matrix["categorical"],
+            labels = feature_matrix["labels"],
+            vocabulary_version = feature_matrix["vocabulary_version"],
+            numeric_features = np.array(NUMERIC_FEATURES),
+            categorical_features = np.array(CATEGORICAL_FEATURES))
+    os.replace(temp_output_path, output_path)
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code
+    """
+    parser = argparse.ArgumentParser(
+        description = "Export the paragraph properties of a Parquet dataset as NumPy feature matrices")
+    parser.add_argument("dataset_path", help = "Parquet file or dataset folder, see corpus_dataset.py")
+    parser.add_argument("output_path", help = "Path of the .npz file")
+    parser.add_argument("--vocabulary", required = True, dest = "vocabulary_path",
+                        help = "JSON file of the categorical vocabulary")
+    parser.add_argument("--fit", action = "store_true",
+                        help = "Add the new values of the dataset to the vocabulary (created if it "
+                               "does not exist) and save it, for training")
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    vocabulary = FeatureVocabulary()
+    if os.path.exists(args.vocabulary_path):
+        vocabulary = FeatureVocabulary.load(args.vocabulary_path)
+    elif not args.fit:
+        parser.error(f"The vocabulary {args.vocabulary_path} does not exist, use --fit to create it")
+
+    para_table = pq.read_table(args.dataset_path)
+
+    if args.fit:
+        added_count = vocabulary.fit(para_table)
+        vocabulary.save(args.vocabulary_path)
+        logging.info(f"Added {added_count} values to the vocabulary, version {vocabulary.version}")
+
+    feature_matrix = create_feature_matrix(para_table, vocabulary)
+    save_feature_matrix(feature_matrix, args.output_path)
+    logging.info(
+        f"Wrote the features of {para_table.num_rows} paragraphs to {args.output_path}, "
+        f"{len(NUMERIC_FEATURES)} numeric and {len(CATEGORICAL_FEATURES)} categorical")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+""" Module for the memo of the resolved paragraph formatting of a document. Apart from the text
+fields, the paragraph properties only depend on the w:pPr of the paragraph and the w:rPr of its
+runs (with the styles, numbering and theme of the document), so paragraphs with the same
+formatting signature share the values resolved for the first one, see
+docx_extraction.create_paragraph_properties()"""
+from collections import OrderedDict
+
+# The number of formatting signatures kept for a document, the least recently used is dropped
+FORMATTING_MEMO_SIZE = 4096
+
+# The properties taken from the text and position of each paragraph, never memoised
+TEXT_PROPERTY_KEYS = frozenset([
+    "ParaID",
+    "ParaObjectType",
+    "ParaHexId",
+    "ParaCleanedContent",
+    "ParaContent",
+    "ParaContentTabStart"
+])
+
+
+# formatting memo
+class FormattingMemo:
+    """ Class for the formatting values of the signatures seen in a document, see
+        get_formatting_signature()
+
+    Args:
+        max_size (int, optional): The number of signatures kept
+
+    Attributes:
+        entries (OrderedDict): The formatting (key, value) pairs of each signature, in least
+            recently used order
+        max_size (int): The number of signatures kept
+        hits (int): The number of paragraphs which reused the values of a signature
+        misses (int): The number of paragraphs whose formatting was resolved
+    """
+    def __init__(self, max_size = FORMATTING_MEMO_SIZE):
+        self.entries = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, signature):
+        """ Function to return the formatting values of a signature
+        Args:
+            signature (tuple): The formatting signature of the paragraph
+        Returns:
+            [tuple]: The (key, value) pairs of the formatting properties, None if not memoised
+        """
+        formatting_values = self.entries.get(signature)
+        if formatting_values is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(signature)
+
+        return formatting_values
+
+    def put(self, signature, para_prop_dict):
+        """ Function to memoise the formatting properties of a paragraph
+        Args:
+            signature (tuple): The formatting signature of the paragraph
+            para_prop_dict (dict): The paragraph properties, the text properties are left out
+        """
+        self.entries[signature] = tuple(
+            (key, value) for key, value in para_prop_dict.items() if not key in TEXT_PROPERTY_KEYS)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last = False)
+
+    def as_dict(self):
+        """ Function to return the counters of the memo """
+        return {
+            "hits" : self.hits,
+            "misses" : self.misses,
+            "entries" : len(self.entries),
+            "max_size" : self.max_size
+        }
+
+
+# get run text class
+def get_run_text_class(run_text):
+    """ Function to classify the text of a run as the run based properties see it, empty, a
+        single new line or text, see docx_extraction.get_para_run_values()
+    Args:
+        run_text (str): The text of the run
+    Returns:
+        [int]: 0 for an empty run, 1 for a new line and 2 for text
+    """
+    if run_text == "":
+        return 0
+    if run_text == "\n":
+        return 1
+    return 2
+
+
+# get element signature
+def get_element_signature(element):
+    """ Function to return the tags and attributes of an element and its descendants as a tuple,
+        the w:pPr and w:rPr elements hold no text so they are equal when their signatures are
+    Args:
+        element (lxml element): The element, can be None
+    Returns:
+        [tuple]: The signature, None for no element
+    """
+    if element is None:
+        return None
+    return tuple([(child.tag, tuple(child.items())) for child in element.iter()])
+
+
+# get formatting signature
+def get_formatting_signature(pPr, run_items):
+    """ Function to create the formatting signature of a paragraph, the signature of the w:pPr and
+        the signature of the w:rPr and the text class of each run in order. The order and repeats
+        of the runs are kept, the majority font and the first font size of a paragraph depend on them
+    Args:
+        pPr (lxml element): The w:pPr of the paragraph, can be None
+        run_items (list): The (w:rPr, text) of each run, the w:rPr can be None
+    Returns:
+        [tuple]: The signature
+    """
+    signature = [get_element_signature(pPr)]
+    for rPr, run_text in run_items:
+        signature.append(get_element_signature(rPr))
+        signature.append(get_run_text_class(run_text))
+
+    return tuple(signature)
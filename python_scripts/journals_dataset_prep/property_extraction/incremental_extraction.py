@@ -0,0 +1,282 @@
+""" Module for the incremental extraction of a revised manuscript. Each paragraph is anchored on
+its w14:paraId and fingerprinted on its XML, its block type and the resolved styles, numbering and
+theme fonts it depends on. The properties of the paragraphs whose fingerprint did not change since
+the previous revision are reused, only the changed paragraphs are extracted again:
+
+    python incremental_extraction.py <docx> <output xml> --previous-state <previous output xml>.state.jsonl
+
+The state of each extraction (the fingerprint and properties of every paragraph) is written next to
+the output as <output>.state.jsonl, and is the previous state of the next revision.
+"""
+import os
+import json
+import hashlib
+import logging
+import argparse
+from lxml import etree
+import docx_extraction
+from docx.oxml.ns import qn
+
+# The suffix of the state file written next to the output
+STATE_SUFFIX = ".state.jsonl"
+
+W14_PARA_ID = "{http://schemas.microsoft.com/office/word/2010/wordml}paraId"
+
+
+# read extraction state
+def read_extraction_state(state_path):
+    """ Function to read the state of a previous extraction
+    Args:
+        state_path (str): The path of the state file, see write_extraction_state()
+    Returns:
+        [dict]: A dictionary of the fingerprint and properties of each paragraph keyed on its
+            ParaHexId, empty if the file does not exist
+    """
+    previous_state = {}
+    if state_path is None or not os.path.exists(state_path):
+        return previous_state
+
+    with open(state_path, "r", encoding = "UTF-8") as state_file:
+        for line in state_file:
+            state_entry = json.loads(line)
+            if not state_entry["fingerprint"] is None:
+                previous_state[state_entry["properties"]["ParaHexId"]] = state_entry
+
+    return previous_state
+
+
+# write extraction state
+def write_extraction_state(state_entries, state_path):
+    """ Function to write the state of an extraction, one JSON line per paragraph
+    Args:
+        state_entries (list): A list of dictionaries with the "fingerprint" (None when the
+            paragraph has no paraId) and the "properties" of each paragraph
+        state_path (str): The path of the state file
+    """
+    temp_state_path = state_path + ".tmp"
+    with open(temp_state_path, "w", encoding = "UTF-8") as state_file:
+        for state_entry in state_entries:
+            state_file.write(json.dumps(state_entry, ensure_ascii = False) + "\n")
+    os.replace(temp_state_path, state_path)
+
+
+# get value digest
+def get_value_digest(value):
+    """ Function to return a short digest of a resolved style, numbering or theme value """
+    return hashlib.sha1(repr(value).encode("UTF-8")).hexdigest()
+
+
+# create dependency digests
+def create_dependency_digests(numbering_dict, theme_dict, style_dict):
+    """ Function to create the digests of the resolved values a paragraph can depend on, computed
+        once for the document
+    Args:
+        numbering_dict (dict): A dictionary representing the numbering.xml, can be None
+        theme_dict (dict): A dictionary for the major and minor fonts
+        style_dict (dict): A dictionary of the resolved style values
+    Returns:
+        [dict]: The digests of each "paragraph" and "character" style keyed on the style id, of
+            the default styles, of the numbering levels keyed on the numId and of the theme
+    """
+    dependency_digests = {
+        "paragraph" : {},
+        "character" : {},
+        "default_paragraph" : get_value_digest(style_dict["default_paragraph"]),
+        "default_character" : get_value_digest(style_dict["default_character"]),
+        "numbering" : {},
+        "theme" : get_value_digest(theme_dict)
+    }
+    for style_type in ("paragraph", "character"):
+        for style_id, style_values in style_dict[style_type].items():
+            dependency_digests[style_type][style_id] = get_value_digest(style_values)
+
+    # Group the numbering levels on the numId, a list depends on all of its levels
+    numbering_levels = {}
+    for (num_id, level), level_values in (numbering_dict or {}).items():
+        numbering_levels.setdefault(num_id, []).append((level, level_values))
+    for num_id, levels in numbering_levels.items():
+        dependency_digests["numbering"][num_id] = get_value_digest(sorted(levels, key = lambda level: level[0]))
+
+    return dependency_digests
+
+
+# get para fingerprint
+def get_para_fingerprint(p, block_type, read_only, style_dict, dependency_digests):
+    """ Function to create the fingerprint of a paragraph, which changes whenever the paragraph
+        properties may change
+    Args:
+        p (lxml element): The w:p element of the paragraph
+        block_type (str): The block type of the paragraph, see docx_extraction.iter_paragraphs()
+        read_only (bool): The read only option of the extraction
+        style_dict (dict): A dictionary of the resolved style values
+        dependency_digests (dict): The digests of the resolved values, see create_dependency_digests()
+    Returns:
+        [str]: The fingerprint of the paragraph, None if the paragraph has no paraId to anchor it
+    """
+    if p.get(W14_PARA_ID) is None:
+        return None
+
+    fingerprint_hash = hashlib.sha1()
+    fingerprint_hash.update(f"{docx_extraction.EXTRACTOR_VERSION}\n{bool(read_only)}\n{block_type}\n".encode("UTF-8"))
+    fingerprint_hash.update(etree.tostring(p))
+
+    # The paragraph style, or the default paragraph style for no (or an unknown) style
+    para_style_id = None
+    pPr = p.find(qn("w:pPr"))
+    if not pPr is None and not pPr.find(qn("w:pStyle")) is None:
+        para_style_id = pPr.find(qn("w:pStyle")).get(qn("w:val"))
+    para_style_digest = dependency_digests["paragraph"].get(para_style_id, dependency_digests["default_paragraph"])
+    fingerprint_hash.update(f"{para_style_digest}\n{dependency_digests['default_character']}\n".encode("UTF-8"))
+
+    # The character styles of the runs
+    for run_style in p.iterfind(f"{qn('w:r')}/{qn('w:rPr')}/{qn('w:rStyle')}"):
+        run_style_digest = dependency_digests["character"].get(run_style.get(qn("w:val")), "")
+        fingerprint_hash.update(f"{run_style_digest}\n".encode("UTF-8"))
+
+    # The list numbering, from the paragraph or its style
+    num_id = None
+    num_id_element = None if pPr is None else pPr.find(f"{qn('w:numPr')}/{qn('w:numId')}")
+    if not num_id_element is None:
+        num_id = num_id_element.get(qn("w:val"))
+    else:
+        para_style = style_dict["paragraph"].get(para_style_id) or style_dict["default_paragraph"]
+        num_id = para_style["num_id"]
+    try:
+        num_id = str(int(num_id))
+    except (TypeError, ValueError):
+        pass
+    numbering_digest = dependency_digests["numbering"].get(num_id, "")
+    fingerprint_hash.update(f"{numbering_digest}\n{dependency_digests['theme']}\n".encode("UTF-8"))
+
+    return fingerprint_hash.hexdigest()
+
+
+# iterate over docx properties incremental
+def iter_docx_properties_incremental(docx_path, previous_state, read_only = False, engine = "python-docx"):
+    """ Function to extract the properties of a docx as a generator, reusing the properties of
+        the paragraphs which did not change since the previous extraction
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx, or the docx
+            as bytes or a binary file-like object
+        previous_state (dict): The state of the previous extraction, see read_extraction_state()
+        read_only (bool, optional): See docx_extraction.iter_properties()
+        engine (str, optional): The extraction engine, "python-docx" (default) or "lxml"
+    Returns:
+        [generator]: A generator of (properties dictionary, fingerprint, changed) tuples, one for
+            each paragraph, changed is False when the properties were reused
+    """
+    if engine == "lxml":
+        import docx_lxml_extraction
+        document, numbering_dict, theme_dict, style_dict = docx_lxml_extraction.create_document_object(docx_path)
+        paragraphs = docx_lxml_extraction.iter_paragraphs(document, read_only)
+        get_para_element = lambda para: para
+        create_properties = lambda para, para_id, block_type: docx_lxml_extraction.create_paragraph_properties(
+            para, para_id, block_type, numbering_dict, theme_dict, style_dict, read_only)
+    elif engine == "python-docx":
+        document, numbering_dict, theme_dict, style_dict = docx_extraction.create_document_object(docx_path)
+        paragraphs = docx_extraction.iter_paragraphs(document, read_only)
+        get_para_element = lambda para: para._p
+        create_properties = lambda para, para_id, block_type: docx_extraction.create_paragraph_properties(
+            document, para, para_id, block_type, numbering_dict, theme_dict, style_dict, read_only)
+    else:
+        raise ValueError(f"Unknown extraction engine '{engine}', expected 'python-docx' or 'lxml'")
+
+    dependency_digests = create_dependency_digests(numbering_dict, theme_dict, style_dict)
+
+    block_id = 1
+    for para, block_type in paragraphs:
+        p = get_para_element(para)
+        fingerprint = get_para_fingerprint(p, block_type, read_only, style_dict, dependency_digests)
+        previous_entry = None
+        if not fingerprint is None:
+            previous_entry = previous_state.get(p.get(W14_PARA_ID))
+
+        if not previous_entry is None and previous_entry["fingerprint"] == fingerprint:
+            # Only the position of the paragraph can differ
+            para_prop_dict = dict(previous_entry["properties"])
+            para_prop_dict["ParaID"] = block_id
+            yield para_prop_dict, fingerprint, False
+        else:
+            yield create_properties(para, block_id, block_type), fingerprint, True
+
+        block_id += 1
+
+
+# extract docx properties incremental
+def extract_docx_properties_incremental(docx_path, output_path, previous_state_path = None,
+                                        read_only = False, engine = "python-docx"):
+    """ Function to extract the properties of a revised docx into an XML file, reusing the
+        unchanged paragraphs of the previous extraction. The XML is the same as
+        docx_extraction.extract_docx_properties_to_file() gives, and the new state is written to
+        output_path + STATE_SUFFIX
+    Args:
+        docx_path (str, bytes or file-like): String containing the path to the docx, or the docx
+            as bytes or a binary file-like object
+        output_path (str): String containing the path of the XML file to be written
+        previous_state_path (str, optional): The state file of the previous revision, None (or a
+            missing file) extracts every paragraph
+        read_only (bool, optional): See docx_extraction.iter_properties()
+        engine (str, optional): The extraction engine, "python-docx" (default) or "lxml"
+    Returns:
+        [dict]: A dictionary with the ParaHexId of the "changed" paragraphs (extracted again, in
+            document order), of the "removed" paragraphs (in the previous state only) and the
+            number of "reused" paragraphs
+    """
+    previous_state = read_extraction_state(previous_state_path)
+    state_entries = []
+    changed_para_ids = []
+
+    # Collect the state while the merged properties are written
+    def iter_merged_properties():
+        for para_prop_dict, fingerprint, changed in iter_docx_properties_incremental(
+                docx_path, previous_state, read_only, engine):
+            state_entries.append({"fingerprint" : fingerprint, "properties" : para_prop_dict})
+            if changed:
+                changed_para_ids.append(para_prop_dict["ParaHexId"])
+            yield para_prop_dict
+
+    # Create list that will hold all the properties which should be treated as CDATA
+    c_data_tags = ["ParaContent"]
+    para_count = docx_extraction.write_structured_xml(iter_merged_properties(), c_data_tags, output_path)
+    write_extraction_state(state_entries, output_path + STATE_SUFFIX)
+
+    current_para_ids = set(state_entry["properties"]["ParaHexId"] for state_entry in state_entries)
+    return {
+        "changed" : changed_para_ids,
+        "removed" : [para_hex_id for para_hex_id in previous_state if not para_hex_id in current_para_ids],
+        "reused" : para_count - len(changed_para_ids)
+    }
+
+
+# main
+def main(argv = None):
+    """ Function for the command line entry point, see --help
+    Args:
+        argv (list, optional): The command line arguments, defaults to sys.argv
+    Returns:
+        [int]: The exit code
+    """
+    parser = argparse.ArgumentParser(
+        description = "Extract the properties of a revised docx, reusing the unchanged paragraphs")
+    parser.add_argument("docx_path", help = "The revised docx")
+    parser.add_argument("output_path", help = "The XML file the properties are written to")
+    parser.add_argument("--previous-state", default = None, dest = "previous_state_path",
+                        help = f"The state file of the previous revision (<output>{STATE_SUFFIX})")
+    parser.add_argument("--read-only", action = "store_true", dest = "read_only",
+                        help = "Skip empty paragraphs in memory and generate deterministic paraIds")
+    parser.add_argument("--engine", choices = ["python-docx", "lxml"], default = "python-docx",
+                        help = "Extraction engine, defaults to python-docx")
+    args = parser.parse_args(argv)
+    docx_extraction.configure_logging()
+
+    changes = extract_docx_properties_incremental(
+        args.docx_path, args.output_path, args.previous_state_path, args.read_only, args.engine)
+    logging.info(f"Reused {changes['reused']} paragraphs, extracted {len(changes['changed'])} "
+                 f"paragraphs again, {len(changes['removed'])} paragraphs removed")
+    print(json.dumps({"changed" : changes["changed"], "removed" : changes["removed"]}, indent = 2))
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
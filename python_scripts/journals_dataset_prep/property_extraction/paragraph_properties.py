@@ -0,0 +1,181 @@
+""" Module for the typed record of the paragraph properties, a slotted alternative to the
+dictionary of docx_extraction.create_paragraph_properties(), and a column oriented batch of the
+records of a whole document. A record is read like the dictionary (para["ParaContent"], .get(),
+.items()), so the XML, CSV and Arrow writers take either"""
+import operator
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Optional, Union
+
+
+# paragraph properties
+@dataclass(slots = True)
+class ParagraphProperties(Mapping):
+    """ Class for the properties of a paragraph, the fields are the keys of the dictionary of
+        docx_extraction.create_paragraph_properties() in the same order. The getters that give a
+        marker string rather than a value (e.g. ParaSmallCaps "No Text") keep it, and the border
+        and shading values are the XML strings or their 0 / -1 defaults
+    """
+    ParaID: Optional[int] = None
+    ParaObjectType: Optional[str] = None
+    ParaHexId: Optional[str] = None
+    ParaCleanedContent: Optional[str] = None
+    ParaContent: Optional[str] = None
+    ParaContentTabStart: Optional[int] = None
+    ParaFontFamily: Optional[str] = None
+    ParaBold: Optional[Union[bool, str]] = None
+    ParaItalic: Optional[Union[bool, str]] = None
+    ParaFontSize: Optional[float] = None
+    ParaStyle: Optional[str] = None
+    ParaListStyle: Optional[str] = None
+    ParaLeftIndent: Optional[float] = None
+    ParaRightIndent: Optional[float] = None
+    ParaFirstLineIndent: Optional[float] = None
+    ParaAlignment: Optional[str] = None
+    ParaLineSpace: Optional[float] = None
+    ParaAboveSpace: Optional[float] = None
+    ParaBelowSpace: Optional[float] = None
+    ParaBorderTopVal: Optional[Union[str, int]] = None
+    ParaBorderTopSz: Optional[Union[str, int]] = None
+    ParaBorderTopSpace: Optional[Union[str, int]] = None
+    ParaBorderTopColor: Optional[Union[str, int]] = None
+    ParaBorderLeftVal: Optional[Union[str, int]] = None
+    ParaBorderLeftSz: Optional[Union[str, int]] = None
+    ParaBorderLeftSpace: Optional[Union[str, int]] = None
+    ParaBorderLeftColor: Optional[Union[str, int]] = None
+    ParaBorderBottomVal: Optional[Union[str, int]] = None
+    ParaBorderBottomSz: Optional[Union[str, int]] = None
+    ParaBorderBottomSpace: Optional[Union[str, int]] = None
+    ParaBorderBottomColor: Optional[Union[str, int]] = None
+    ParaBorderRightVal: Optional[Union[str, int]] = None
+    ParaBorderRightSz: Optional[Union[str, int]] = None
+    ParaBorderRightSpace: Optional[Union[str, int]] = None
+    ParaBorderRightColor: Optional[Union[str, int]] = None
+    ParaBorderBetweenVal: Optional[Union[str, int]] = None
+    ParaBorderBetweenSz: Optional[Union[str, int]] = None
+    ParaBorderBetweenSpace: Optional[Union[str, int]] = None
+    ParaBorderBetweenColor: Optional[Union[str, int]] = None
+    ParaShadingVal: Optional[Union[str, int]] = None
+    ParaShadingColor: Optional[Union[str, int]] = None
+    ParaShadingFill: Optional[Union[str, int]] = None
+    ParaSingleStrike: Optional[Union[bool, str]] = None
+    ParaDoubleStrike: Optional[Union[bool, str]] = None
+    ParaUnderline: Optional[str] = None
+    ParaSmallCaps: Optional[Union[bool, str]] = None
+
+    def __getitem__(self, key):
+        if not key in PARA_PROPERTY_FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        # The getters fill the record as they fill the dictionary, e.g. get_para_border_shading()
+        if not key in PARA_PROPERTY_FIELD_SET:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(PARA_PROPERTY_FIELDS)
+
+    def __len__(self):
+        return len(PARA_PROPERTY_FIELDS)
+
+    def values(self):
+        """ Function to return the values of the fields in order, without a lookup per field """
+        return PARA_PROPERTY_VALUES(self)
+
+    def items(self):
+        """ Function to return the (field, value) pairs in order, as dict.items() """
+        return list(zip(PARA_PROPERTY_FIELDS, PARA_PROPERTY_VALUES(self)))
+
+    def as_dict(self):
+        """ Function to return the properties as the dictionary of create_paragraph_properties() """
+        return dict(zip(PARA_PROPERTY_FIELDS, PARA_PROPERTY_VALUES(self)))
+
+    @classmethod
+    def from_dict(cls, para_dict):
+        """ Function to create a record from a paragraph properties dictionary, missing keys are None
+        Args:
+            para_dict (dict): Dictionary of the paragraph properties, see
+                docx_extraction.create_paragraph_properties()
+        Returns:
+            [ParagraphProperties]: The record of the paragraph
+        """
+        return cls(*[para_dict.get(field_name) for field_name in PARA_PROPERTY_FIELDS])
+
+
+# The field names in order, and a getter of all their values as a tuple
+PARA_PROPERTY_FIELDS = tuple(ParagraphProperties.__dataclass_fields__)
+PARA_PROPERTY_FIELD_SET = frozenset(PARA_PROPERTY_FIELDS)
+PARA_PROPERTY_VALUES = operator.attrgetter(*PARA_PROPERTY_FIELDS)
+
+
+# paragraph properties batch
+class ParagraphPropertiesBatch:
+    """ Class holding the properties of many paragraphs as a list per field (struct of arrays),
+        rather than a record or a dictionary per paragraph
+
+    Args:
+        para_properties_iter (iterable, optional): Records or dictionaries of the paragraphs, see
+            docx_extraction.iter_docx_properties()
+
+    Attributes:
+        columns (dict): A list of the values of each field, in the order of PARA_PROPERTY_FIELDS
+    """
+    __slots__ = ["columns"]
+
+    def __init__(self, para_properties_iter = None):
+        self.columns = {field_name : [] for field_name in PARA_PROPERTY_FIELDS}
+        if not para_properties_iter is None:
+            self.extend(para_properties_iter)
+
+    def append(self, para_properties):
+        """ Function to add the properties of a paragraph, a record or a dictionary """
+        if isinstance(para_properties, ParagraphProperties):
+            values = para_properties.values()
+        else:
+            values = [para_properties.get(field_name) for field_name in PARA_PROPERTY_FIELDS]
+        for column, value in zip(self.columns.values(), values):
+            column.append(value)
+
+    def extend(self, para_properties_iter):
+        """ Function to add the properties of many paragraphs, see append() """
+        for para_properties in para_properties_iter:
+            self.append(para_properties)
+
+    def __len__(self):
+        return len(self.columns["ParaID"])
+
+    def __getitem__(self, index):
+        return ParagraphProperties(*[column[index] for column in self.columns.values()])
+
+    def __iter__(self):
+        # One record per paragraph, built from the columns as they are read
+        for values in zip(*self.columns.values()):
+            yield ParagraphProperties(*values)
+
+    def column(self, field_name):
+        """ Function to return the list of the values of a field, e.g. batch.column("ParaContent") """
+        return self.columns[field_name]
+
+    def to_dicts(self):
+        """ Function to return the paragraphs as a list of dictionaries """
+        return [dict(zip(PARA_PROPERTY_FIELDS, values)) for values in zip(*self.columns.values())]
+
+    def to_arrow(self):
+        """ Function to create the typed Arrow table of the paragraphs straight from the columns,
+            see properties_table.create_properties_table()
+        Returns:
+            [pyarrow.Table]: A table with the properties_table.PROPERTIES_SCHEMA columns
+        """
+        # Only imported when used, pyarrow is not needed for the records
+        import pyarrow as pa
+        import properties_table
+
+        arrays = []
+        for field in properties_table.PROPERTIES_SCHEMA:
+            arrays.append(pa.array(
+                [properties_table.convert_property_value(value, field.type) for value in self.columns[field.name]],
+                type = field.type))
+
+        return pa.Table.from_arrays(arrays, schema = properties_table.PROPERTIES_SCHEMA)
@@ -0,0 +1,154 @@
+""" Module to convert the extracted paragraph properties into typed columnar output, an Arrow table
+or a Parquet file, see docx_extraction.extract_docx_properties()"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# The paragraph properties written in each batch of the Parquet file
+PARQUET_BATCH_SIZE = 10000
+
+# The columns in the same order as the paragraph properties dictionary, see
+# docx_extraction.create_paragraph_properties(). The border and shading values are kept as the
+# XML strings (with the "0" / "-1" defaults), except the border size and space which are numbers
+PROPERTIES_SCHEMA = pa.schema(
+    [
+        ("ParaID", pa.int64()),
+        ("ParaObjectType", pa.string()),
+        ("ParaHexId", pa.string()),
+        ("ParaCleanedContent", pa.string()),
+        ("ParaContent", pa.string()),
+        ("ParaContentTabStart", pa.int64()),
+        ("ParaFontFamily", pa.string()),
+        ("ParaBold", pa.bool_()),
+        ("ParaItalic", pa.bool_()),
+        ("ParaFontSize", pa.float64()),
+        ("ParaStyle", pa.string()),
+        ("ParaListStyle", pa.string()),
+        ("ParaLeftIndent", pa.float64()),
+        ("ParaRightIndent", pa.float64()),
+        ("ParaFirstLineIndent", pa.float64()),
+        ("ParaAlignment", pa.string()),
+        ("ParaLineSpace", pa.float64()),
+        ("ParaAboveSpace", pa.float64()),
+        ("ParaBelowSpace", pa.float64())
+    ]
+    + [
+        (f"ParaBorder{border_side}{key_name}", key_type)
+        for border_side in ["Top", "Left", "Bottom", "Right", "Between"]
+        for key_name, key_type in [("Val", pa.string()), ("Sz", pa.int64()),
+                                   ("Space", pa.int64()), ("Color", pa.string())]
+    ]
+    + [
+        ("ParaShadingVal", pa.string()),
+        ("ParaShadingColor", pa.string()),
+        ("ParaShadingFill", pa.string()),
+        ("ParaSingleStrike", pa.bool_()),
+        ("ParaDoubleStrike", pa.bool_()),
+        ("ParaUnderline", pa.string()),
+        ("ParaSmallCaps", pa.bool_())
+    ]
+)
+
+
+# convert property value
+def convert_property_value(value, value_type):
+    """ Function to convert a paragraph property value to the Python type of its column
+    Args:
+        value (object): The value from the paragraph properties dictionary
+        value_type (pyarrow DataType): The type of the column, see PROPERTIES_SCHEMA
+    Returns:
+        [object]: The converted value, None if the value is not set or cannot be converted
+            (e.g. ParaSmallCaps is "No Text" for a paragraph without text)
+    """
+    if value is None:
+        return None
+
+    try:
+        if pa.types.is_string(value_type):
+            return str(value)
+        if pa.types.is_boolean(value_type):
+            if isinstance(value, bool):
+                return value
+            return None
+        if pa.types.is_integer(value_type):
+            return int(value)
+        if pa.types.is_floating(value_type):
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return value
+
+
+# create properties batch
+def create_properties_batch(para_properties_list):
+    """ Function to create an Arrow record batch from a list of paragraph properties dictionaries
+    Args:
+        para_properties_list (list): A list of dictionaries for each paragraph, see
+            docx_extraction.create_paragraph_properties()
+    Returns:
+        [pyarrow.RecordBatch]: A record batch with the PROPERTIES_SCHEMA columns
+    """
+    columns = []
+    for field in PROPERTIES_SCHEMA:
+        columns.append(pa.array(
+            [convert_property_value(para_dict.get(field.name), field.type)
+             for para_dict in para_properties_list],
+            type = field.type))
+
+    return pa.RecordBatch.from_arrays(columns, schema = PROPERTIES_SCHEMA)
+
+
+# iterate over properties batches
+def iter_properties_batches(para_properties_iter, batch_size = PARQUET_BATCH_SIZE):
+    """ Function to group an iterable of paragraph properties into Arrow record batches
+    Args:
+        para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+            docx_extraction.iter_docx_properties()
+        batch_size (int, optional): The number of paragraphs in each batch
+    Returns:
+        [generator]: A generator of pyarrow.RecordBatch, see create_properties_batch()
+    """
+    para_properties_list = []
+    for para_dict in para_properties_iter:
+        para_properties_list.append(para_dict)
+        if len(para_properties_list) >= batch_size:
+            yield create_properties_batch(para_properties_list)
+            para_properties_list = []
+
+    if len(para_properties_list) > 0:
+        yield create_properties_batch(para_properties_list)
+
+
+# create properties table
+def create_properties_table(para_properties_iter):
+    """ Function to create a typed Arrow table from the paragraph properties, one row per paragraph
+    Args:
+        para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+            docx_extraction.iter_docx_properties()
+    Returns:
+        [pyarrow.Table]: A table with the PROPERTIES_SCHEMA columns, empty if there are no paragraphs
+    """
+    return pa.Table.from_batches(
+        list(iter_properties_batches(para_properties_iter)),
+        schema = PROPERTIES_SCHEMA)
+
+
+# write properties parquet
+def write_properties_parquet(para_properties_iter, output, batch_size = PARQUET_BATCH_SIZE):
+    """ Function to write the paragraph properties into a Parquet file, a batch of paragraphs at a
+        time so the whole document is never held as one table
+    Args:
+        para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+            docx_extraction.iter_docx_properties()
+        output (str or file-like): The path of the Parquet file, or a binary file-like object
+        batch_size (int, optional): The number of paragraphs in each row group
+    Returns:
+        [int]: The number of paragraphs written
+    """
+    para_count = 0
+    with pq.ParquetWriter(output, PROPERTIES_SCHEMA, compression = "zstd") as writer:
+        for properties_batch in iter_properties_batches(para_properties_iter, batch_size):
+            writer.write_batch(properties_batch)
+            para_count += properties_batch.num_rows
+
+    return para_count
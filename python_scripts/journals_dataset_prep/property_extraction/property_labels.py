@@ -0,0 +1,89 @@
+""" Module for the element labels of the training data, a paragraph of a labelled manuscript
+starts with its class in {{ }} (e.g. "{{H1}}Introduction"). The label is moved into a classname
+column and the markup is removed from ParaContent and ParaCleanedContent, as the
+add_classname_column() and remove_empty_classname_rows() steps of combine_csv.ipynb"""
+import re
+
+# The label markup, the classname is taken from the first one in ParaCleanedContent
+CLASSNAME_PATTERN = re.compile(r"{{(.*?)}}")
+ARROW_CLASSNAME_PATTERN = r"{{(?P<classname>.*?)}}"
+
+# The column holding the label
+CLASSNAME_COLUMN = "classname"
+
+
+# label paragraph properties
+def label_paragraph_properties(para_dict):
+    """ Function to move the label of a paragraph into the classname key, the markup is removed
+        from ParaContent and ParaCleanedContent and the content is stripped
+    Args:
+        para_dict (dict): Dictionary of the paragraph properties, see
+            docx_extraction.create_paragraph_properties(), updated in place
+    Returns:
+        [str]: The classname, None if the paragraph has no (or an empty) label
+    """
+    classname = None
+    cleaned_content = para_dict.get("ParaCleanedContent")
+    if cleaned_content:
+        match = CLASSNAME_PATTERN.search(cleaned_content)
+        if not match is None and len(match.group(1)) > 0:
+            classname = match.group(1)
+        para_dict["ParaCleanedContent"] = CLASSNAME_PATTERN.sub("", cleaned_content).strip()
+
+    if para_dict.get("ParaContent"):
+        para_dict["ParaContent"] = CLASSNAME_PATTERN.sub("", para_dict["ParaContent"]).strip()
+
+    para_dict[CLASSNAME_COLUMN] = classname
+
+    return classname
+
+
+# iterate over labeled properties
+def iter_labeled_properties(para_properties_iter, drop_unlabeled = True):
+    """ Function to label the paragraphs as they are extracted, see label_paragraph_properties()
+    Args:
+        para_properties_iter (iterable): Iterable of dictionaries for each paragraph, see
+            docx_extraction.iter_docx_properties()
+        drop_unlabeled (bool, optional): Skip the paragraphs without a classname
+    Returns:
+        [generator]: A generator of the labelled dictionaries, with the classname as the last key
+    """
+    for para_dict in para_properties_iter:
+        classname = label_paragraph_properties(para_dict)
+        if classname is None and drop_unlabeled:
+            continue
+        yield para_dict
+
+
+# label properties table
+def label_properties_table(para_table, drop_unlabeled = True):
+    """ Function to label an Arrow table or record batch of paragraph properties with vectorised
+        string operations over the columns, rather than a regular expression call per row, see
+        label_paragraph_properties()
+    Args:
+        para_table (pyarrow.Table or pyarrow.RecordBatch): The paragraph properties, see
+            properties_table.create_properties_batch()
+        drop_unlabeled (bool, optional): Remove the rows without a classname
+    Returns:
+        [pyarrow.Table or pyarrow.RecordBatch]: The labelled paragraphs, with the classname as the
+            last column
+    """
+    # Only imported when used, pyarrow is not needed for the dictionaries
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    classname = pc.struct_field(
+        pc.extract_regex(para_table.column("ParaCleanedContent"), ARROW_CLASSNAME_PATTERN), [0])
+    classname = pc.if_else(pc.equal(classname, ""), pa.scalar(None, pa.string()), classname)
+
+    for column_name in ["ParaCleanedContent", "ParaContent"]:
+        column_index = para_table.schema.get_field_index(column_name)
+        cleaned_column = pc.utf8_trim_whitespace(
+            pc.replace_substring_regex(para_table.column(column_index), r"{{.*?}}", ""))
+        para_table = para_table.set_column(column_index, column_name, cleaned_column)
+
+    para_table = para_table.append_column(CLASSNAME_COLUMN, classname)
+    if drop_unlabeled:
+        para_table = para_table.filter(pc.is_valid(classname))
+
+    return para_table
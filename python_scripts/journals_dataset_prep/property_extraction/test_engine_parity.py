@@ -0,0 +1,40 @@
+""" Test that the lxml engine gives the same paragraph properties XML as the python-docx engine on
+the sample manuscripts of the repository, see engine_parity.compare_engines()
+
+    python -m pytest test_engine_parity.py
+"""
+import os
+import logging
+import pytest
+from engine_parity import compare_engines
+
+# The repository folder, the sample manuscripts are kept with the scripts which use them
+REPOSITORY_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", ".."))
+
+# The sample manuscripts, relative to the repository folder
+SAMPLE_DOCX_PATHS = [
+    "Project_Creation/modify.docx",
+    "Project_Creation/testing_briefs/PM Brief Form (1).docx",
+    "Project_Creation/testing_briefs/TNF_04_K60165_C004.docx",
+    "Project_Creation/testing_briefs/Teen Legal Rights- PM Brief Form.docx",
+    "Project_Creation/testing_briefs/symbols.docx",
+    "python_scripts/graphics/testing-heading3_listo to text.docx",
+    "python_scripts/reference_coloring/RL_06_ELMU_REF_colored.docx",
+    "python_scripts/spelling_suggestion/Project Creation Features Update v1.1.docx",
+    "python_scripts/word_docz/shade.docx"
+]
+
+
+# test engine parity
+@pytest.mark.parametrize("read_only", [False, True])
+@pytest.mark.parametrize("docx_path", SAMPLE_DOCX_PATHS)
+def test_engine_parity(docx_path, read_only):
+    """ Function to fail when the engines give a different XML for a sample manuscript """
+    logging.disable(logging.INFO)
+    try:
+        result = compare_engines(os.path.join(REPOSITORY_DIR, docx_path), read_only)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    assert result["errors"] == {}, result["errors"]
+    assert result["difference"] == "", result["difference"]
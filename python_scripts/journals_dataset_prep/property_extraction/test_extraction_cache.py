@@ -0,0 +1,84 @@
+""" Test of the extraction cache, the hits, the least recently used pruning and the formats which
+are cached, see extraction_cache
+
+    python -m pytest test_extraction_cache.py
+"""
+import os
+import logging
+import pytest
+import docx_extraction
+from extraction_cache import ExtractionCache, extract_docx_properties_cached
+from test_engine_parity import REPOSITORY_DIR
+
+# The manuscript extracted through the cache
+SAMPLE_DOCX_PATH = os.path.join(REPOSITORY_DIR, "Project_Creation/modify.docx")
+
+
+# fail extraction
+def fail_extraction(*args, **kwargs):
+    """ Function to replace the extraction once a result is expected from the cache """
+    raise AssertionError("the docx was extracted again rather than read from the cache")
+
+
+# test cache hit
+@pytest.mark.parametrize("output_format", ["xml", "arrow"])
+def test_cache_hit(tmp_path, monkeypatch, output_format):
+    """ Function to fail when a second extraction of the same docx is not served from the cache,
+        or gives a different result """
+    cache = ExtractionCache(str(tmp_path / "cache"))
+
+    logging.disable(logging.INFO)
+    try:
+        extracted_result = extract_docx_properties_cached(SAMPLE_DOCX_PATH, cache, True, output_format = output_format)
+        assert len(list(cache.iter_entries())) == 1
+
+        monkeypatch.setattr(docx_extraction, "extract_docx_properties_to_file", fail_extraction)
+        cached_result = extract_docx_properties_cached(SAMPLE_DOCX_PATH, cache, True, output_format = output_format)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    if output_format == "arrow":
+        assert cached_result.equals(extracted_result)
+    else:
+        assert cached_result == extracted_result
+
+
+# test cache prune
+def test_cache_prune(tmp_path):
+    """ Function to fail when the pruning does not remove the least recently used entry first """
+    cache = ExtractionCache(str(tmp_path / "cache"))
+    source_path = str(tmp_path / "result.xml")
+    with open(source_path, "w", encoding = "UTF-8") as source_file:
+        source_file.write("x" * 1000)
+
+    entry_paths = {}
+    for last_used, cache_key in enumerate(["aa01", "bb02", "cc03"]):
+        entry_paths[cache_key] = cache.put(cache_key, "xml", source_path)
+        os.utime(entry_paths[cache_key], (1000 + last_used, 1000 + last_used))
+
+    # A hit makes the oldest entry the most recently used
+    assert cache.get("aa01", "xml") == entry_paths["aa01"]
+
+    assert cache.prune(max_size_bytes = 2500) == 1
+    assert not os.path.exists(entry_paths["bb02"])
+    assert os.path.exists(entry_paths["aa01"]) and os.path.exists(entry_paths["cc03"])
+
+    # Adding an entry over the size limit prunes the cache back under it
+    cache.max_size_bytes = 2500
+    cache.put("dd04", "xml", source_path)
+    assert not os.path.exists(entry_paths["cc03"])
+    assert sum(entry[1] for entry in cache.iter_entries()) <= cache.max_size_bytes
+
+
+# test cache formats
+def test_cache_formats(tmp_path):
+    """ Function to fail when a format the cache cannot hold, or a missing docx, is accepted """
+    cache = ExtractionCache(str(tmp_path / "cache"))
+
+    with pytest.raises(ValueError):
+        extract_docx_properties_cached(SAMPLE_DOCX_PATH, cache, output_format = "records")
+
+    # A missing docx raises and is never cached
+    with pytest.raises(FileNotFoundError):
+        extract_docx_properties_cached(str(tmp_path / "missing.docx"), cache)
+    assert list(cache.iter_entries()) == []
@@ -0,0 +1,62 @@
+""" Test that the formatting memo gives the same paragraph properties as resolving the formatting
+of every paragraph, on the sample manuscripts of the repository, see formatting_memo
+
+    python -m pytest test_formatting_memo.py
+"""
+import os
+import logging
+import itertools
+import pytest
+import docx_extraction
+import docx_lxml_extraction
+from extraction_stats import ExtractionStats
+from test_engine_parity import REPOSITORY_DIR, SAMPLE_DOCX_PATHS
+
+# The module which creates the FormattingMemo of each engine
+ENGINE_MODULES = {
+    "python-docx" : docx_extraction,
+    "lxml" : docx_lxml_extraction
+}
+
+
+# extract sample properties
+def extract_sample_properties(monkeypatch, engine, read_only, stats = None):
+    """ Function to extract the properties of every sample manuscript, the random paraIds are
+        replaced by a counter so two extractions give the same ids
+    Args:
+        monkeypatch (pytest.MonkeyPatch): The fixture used to replace gen_id
+        engine (str): The extraction engine, see docx_extraction.iter_docx_properties()
+        read_only (bool): Extract in read only mode, see docx_extraction.iter_properties()
+        stats (ExtractionStats, optional): Records the hits of the formatting memo
+    Returns:
+        [list]: A list of the paragraph properties dictionaries of each manuscript
+    """
+    sample_properties = []
+    for docx_path in SAMPLE_DOCX_PATHS:
+        id_counter = itertools.count()
+        monkeypatch.setattr(docx_extraction, "gen_id", lambda: "%07X" % next(id_counter))
+        sample_properties.append(list(docx_extraction.iter_docx_properties(
+            os.path.join(REPOSITORY_DIR, docx_path), read_only, engine, stats)))
+
+    return sample_properties
+
+
+# test formatting memo
+@pytest.mark.parametrize("read_only", [False, True])
+@pytest.mark.parametrize("engine", ["python-docx", "lxml"])
+def test_formatting_memo(monkeypatch, engine, read_only):
+    """ Function to fail when a paragraph reuses formatting which differs from its own """
+    logging.disable(logging.INFO)
+    try:
+        stats = ExtractionStats()
+        memo_properties = extract_sample_properties(monkeypatch, engine, read_only, stats)
+
+        # The engines extract without a memo when there is none
+        monkeypatch.setattr(ENGINE_MODULES[engine], "FormattingMemo", lambda: None)
+        resolved_properties = extract_sample_properties(monkeypatch, engine, read_only)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    for docx_path, memo_paras, resolved_paras in zip(SAMPLE_DOCX_PATHS, memo_properties, resolved_properties):
+        assert memo_paras == resolved_paras, docx_path
+    assert stats.formatting_memo["hits"] > 0
@@ -0,0 +1,14 @@
+""" Test of the cold import of docx_extraction, python-docx, lxml, pandas and pyarrow are only
+imported when an extraction needs them, see extraction_benchmark.check_import_budget()
+
+    python -m pytest test_import_budget.py
+"""
+from extraction_benchmark import IMPORT_BUDGET_MS, check_import_budget
+
+
+# test import budget
+def test_import_budget():
+    """ Function to fail when import docx_extraction takes longer than IMPORT_BUDGET_MS or loads
+        one of the deferred modules """
+    within_budget, seconds = check_import_budget()
+    assert within_budget, f"import docx_extraction took {seconds * 1000:.1f}ms (budget {IMPORT_BUDGET_MS}ms)"
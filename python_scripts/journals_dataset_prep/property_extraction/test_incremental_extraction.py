@@ -0,0 +1,87 @@
+""" Test that the incremental extraction of a revised manuscript gives the same XML as a full
+extraction and only extracts the changed paragraphs again, see incremental_extraction
+
+    python -m pytest test_incremental_extraction.py
+"""
+import logging
+import pytest
+import docx
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Pt
+import docx_extraction
+from incremental_extraction import W14_PARA_ID, STATE_SUFFIX, extract_docx_properties_incremental
+
+# The paraId of each paragraph of the first revision, None for a paragraph without one
+SAMPLE_PARAGRAPHS = [
+    ("00000A01", "Normal", "The first paragraph"),
+    ("00000A02", "Sample Quote", "A quoted paragraph"),
+    ("00000A03", "Sample Quote", "Another quoted paragraph"),
+    ("00000A04", "Normal", "An unchanged paragraph"),
+    (None, "Normal", "A paragraph without a paraId"),
+    ("00000A06", "Normal", "The paragraph which is removed")
+]
+
+
+# create sample revisions
+def create_sample_revisions(tmp_path):
+    """ Function to write two revisions of a manuscript. The second edits the first paragraph,
+        changes the size of the Sample Quote style and removes the last paragraph
+    Args:
+        tmp_path (pathlib.Path): The folder the docx files are written to
+    Returns:
+        [str]: The path of the first revision
+        [str]: The path of the second revision
+    """
+    document = docx.Document()
+    quote_style = document.styles.add_style("Sample Quote", WD_STYLE_TYPE.PARAGRAPH)
+    quote_style.font.size = Pt(12)
+    for para_hex_id, style_name, text in SAMPLE_PARAGRAPHS:
+        para = document.add_paragraph(text, style = style_name)
+        if not para_hex_id is None:
+            para._p.set(W14_PARA_ID, para_hex_id)
+    first_revision_path = str(tmp_path / "revision_1.docx")
+    document.save(first_revision_path)
+
+    document = docx.Document(first_revision_path)
+    document.paragraphs[0].runs[0].text = "The first paragraph, edited"
+    document.styles["Sample Quote"].font.size = Pt(14)
+    removed_p = document.paragraphs[-1]._p
+    removed_p.getparent().remove(removed_p)
+    second_revision_path = str(tmp_path / "revision_2.docx")
+    document.save(second_revision_path)
+
+    return first_revision_path, second_revision_path
+
+
+# test incremental extraction
+@pytest.mark.parametrize("engine", ["python-docx", "lxml"])
+def test_incremental_extraction(tmp_path, engine):
+    """ Function to fail when a changed paragraph is reused, or the merged XML differs from a full
+        extraction of the revision """
+    first_revision_path, second_revision_path = create_sample_revisions(tmp_path)
+    first_output_path = str(tmp_path / "revision_1.xml")
+    second_output_path = str(tmp_path / "revision_2.xml")
+
+    logging.disable(logging.INFO)
+    try:
+        first_changes = extract_docx_properties_incremental(
+            first_revision_path, first_output_path, None, True, engine)
+        second_changes = extract_docx_properties_incremental(
+            second_revision_path, second_output_path, first_output_path + STATE_SUFFIX, True, engine)
+        full_properties_xml = docx_extraction.extract_docx_properties(second_revision_path, True, engine)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    # Without a previous state every paragraph is extracted
+    assert first_changes["reused"] == 0
+    assert len(first_changes["changed"]) == len(SAMPLE_PARAGRAPHS)
+
+    # The edited paragraph, the paragraphs of the edited style and the paragraph without a
+    # paraId are extracted again, only the unchanged paragraph is reused
+    assert second_changes["changed"][:3] == ["00000A01", "00000A02", "00000A03"]
+    assert len(second_changes["changed"]) == 4
+    assert second_changes["reused"] == 1
+    assert second_changes["removed"] == ["00000A06"]
+
+    with open(second_output_path, "r", encoding = "UTF-8") as output_file:
+        assert output_file.read() == full_properties_xml